@@ -0,0 +1,87 @@
+"""
+Measures the request units and bytes saved by the FieldCompressionCodec. The CosmosDb emulator needs to be
+running in order for this benchmark to work.
+"""
+import json
+import random
+import string
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.compression import FieldCompressionCodec
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.diagnostics import OperationRecord
+from pycosmosdal.documentmanager import DocumentManager
+
+DATABASE_NAME = "compression_benchmark"
+COLLECTION_NAME = "documents"
+DOCUMENT_COUNT = 100
+WORDS = ["".join(random.choices(string.ascii_lowercase, k=6)) for _ in range(200)]
+
+
+class RequestChargeCounter:
+    def __init__(self):
+        self.request_charges = {}
+
+    def __call__(self, record: OperationRecord):
+        self.request_charges[record.operation] = (
+            self.request_charges.get(record.operation, 0) + record.request_charge
+        )
+
+
+def create_document(document_id: str) -> dict:
+    return {
+        "id": document_id,
+        "owner_id": "user-123",
+        "body": " ".join(random.choices(WORDS, k=20000)),
+        "payload": [
+            dict(key=random.choice(WORDS), value=random.random()) for _ in range(500)
+        ],
+    }
+
+
+def run(document_manager: DocumentManager, documents: list) -> dict:
+    counter = RequestChargeCounter()
+    document_manager.client.add_listener(counter)
+
+    try:
+        for document in documents:
+            document_manager.upsert_document(document, COLLECTION_NAME, DATABASE_NAME)
+            document_manager.get_document(
+                document["id"], COLLECTION_NAME, DATABASE_NAME
+            )
+    finally:
+        document_manager.client.remove_listener(counter)
+
+    return counter.request_charges
+
+
+def main():
+    client = CosmosDbEmulatorClient()
+    database_manager = DatabaseManager(client)
+    database_manager.create_database(DATABASE_NAME)
+
+    try:
+        CollectionManager(client).create_collection(COLLECTION_NAME, DATABASE_NAME)
+        documents = [create_document(f"doc-{i}") for i in range(DOCUMENT_COUNT)]
+        codec = FieldCompressionCodec(["body", "payload"])
+
+        uncompressed = run(DocumentManager(client), documents)
+        compressed = run(DocumentManager(client, codec), documents)
+
+        document_bytes = sum(len(json.dumps(d)) for d in documents)
+        print(f"Documents: {DOCUMENT_COUNT}, average size: {document_bytes // DOCUMENT_COUNT} bytes")
+        print(f"Compressed field bytes saved: {codec.savings:.1%}")
+
+        for operation in ("UpsertItem", "ReadItem"):
+            print(
+                f"{operation}: {uncompressed[operation]:.1f} RU uncompressed, "
+                f"{compressed[operation]:.1f} RU compressed "
+                f"({1 - compressed[operation] / uncompressed[operation]:.1%} saved)"
+            )
+    finally:
+        database_manager.delete_database(DATABASE_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares the compiled dataclass decoders with generic reflection based decoding. This benchmark doesn't need the
+CosmosDb emulator.
+"""
+import dataclasses
+import timeit
+import typing
+from dataclasses import dataclass
+from typing import List
+
+from pycosmosdal.decoding import get_decoder
+from pycosmosdal.models import Document
+
+DOCUMENT_COUNT = 10000
+
+
+@dataclass
+class LineItem:
+    __slots__ = ("sku", "quantity", "price")
+    sku: str
+    quantity: int
+    price: float
+
+
+@dataclass
+class Order:
+    __slots__ = ("id", "owner_id", "items")
+    id: str
+    owner_id: str
+    items: List[LineItem]
+
+
+def reflection_decode(model_type: type, value: dict):
+    type_hints = typing.get_type_hints(model_type)
+    arguments = {}
+
+    for f in dataclasses.fields(model_type):
+        field_value = value[f.name]
+        field_type = type_hints[f.name]
+
+        if typing.get_origin(field_type) is list:
+            item_type = typing.get_args(field_type)[0]
+            field_value = [reflection_decode(item_type, v) for v in field_value]
+
+        arguments[f.name] = field_value
+
+    return model_type(**arguments)
+
+
+def main():
+    documents = [
+        dict(
+            id=f"order-{i}",
+            owner_id="user-123",
+            items=[dict(sku=f"sku-{j}", quantity=j, price=j * 1.5) for j in range(5)],
+            _ts=1589500000 + i,
+            _etag="etag",
+        )
+        for i in range(DOCUMENT_COUNT)
+    ]
+    decoder = get_decoder(Order)
+
+    timings = dict(
+        document=timeit.timeit(lambda: [Document(d) for d in documents], number=5),
+        reflection=timeit.timeit(
+            lambda: [
+                reflection_decode(Order, Document(d).native_resource) for d in documents
+            ],
+            number=5,
+        ),
+        compiled=timeit.timeit(lambda: [decoder(d) for d in documents], number=5),
+    )
+
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds / 5 / DOCUMENT_COUNT * 1e6:.2f} µs per document")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+The BufferedDocumentWriter class.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+from pycosmosdal.documentmanager import DocumentManager
+
+
+class BufferedDocumentWriter:
+    """
+    Buffers document upserts and writes them in concurrent batches. Pending writes are keyed by document id
+    and partition key, so when a document is written several times before a flush only the last write, or the
+    writes merged by a merge function, is sent to CosmosDb.
+
+    Pending writes are flushed when max_pending documents are buffered, every flush_interval seconds and when
+    the writer is closed. Wrap the writer in a Disposable to guarantee a flush on exit.
+    """
+
+    def __init__(
+        self,
+        document_manager: DocumentManager,
+        collection_id: str,
+        database_id: str,
+        **kwargs,
+    ):
+        """
+        Creates a BufferedDocumentWriter instance.
+        :param document_manager: The DocumentManager that upserts the documents.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Writer options:
+            partition_key_path: The partition key path of the collection, e.g. '/owner_id'. Documents with the same
+            id but different partition key values are kept apart.
+
+            merge_function: A function called with the pending document and the new document when a document
+            is written again before it is flushed. It returns the document to keep. By default the new
+            document replaces the pending document.
+
+            max_pending: The number of pending documents that triggers a flush. Defaults to 1000.
+
+            flush_interval: The number of seconds between flushes. Defaults to 1. When set to None, pending
+            documents are only flushed when max_pending is reached or when flush() is called.
+
+            max_concurrency: The number of concurrent upserts during a flush. Defaults to 8.
+        """
+        self.document_manager = document_manager
+        self.collection_id = collection_id
+        self.database_id = database_id
+        self.merge_function: Callable[[dict, dict], dict] = kwargs.get("merge_function")
+        self.max_pending = int(kwargs.get("max_pending") or 1000)
+        self.flush_interval = kwargs.get("flush_interval", 1.0)
+        self.write_count = 0
+        self.coalesced_count = 0
+        self.flushed_count = 0
+
+        partition_key_path = kwargs.get("partition_key_path")
+        self._partition_key_path = (
+            partition_key_path.strip("/").split("/") if partition_key_path else None
+        )
+        self._pending: Dict[Hashable, dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._closed = threading.Event()
+        self._errors: List[Exception] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(kwargs.get("max_concurrency") or 8),
+            thread_name_prefix="pycosmosdal-writer",
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="pycosmosdal-writer-flush", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def pending_count(self) -> int:
+        """
+        The number of documents waiting to be flushed.
+        :rtype: int
+        """
+        return len(self._pending)
+
+    def write(self, document: dict):
+        """
+        Buffers a document upsert.
+        :param document: The document to upsert.
+        """
+        if self._closed.is_set():
+            raise ValueError("The writer is closed.")
+
+        key = self._get_key(document)
+
+        with self._lock:
+            self.write_count += 1
+            pending_document = self._pending.get(key)
+
+            if pending_document is not None:
+                self.coalesced_count += 1
+
+                if self.merge_function:
+                    document = self.merge_function(pending_document, document)
+
+            self._pending[key] = document
+
+            if len(self._pending) >= self.max_pending:
+                self._flush_requested.set()
+
+    def flush(self) -> int:
+        """
+        Upserts the pending documents. If an upsert fails, e.g. with a DocumentError or a connection error, the
+        remaining documents are still upserted and the first error is raised. The documents that failed stay
+        pending and are written again by the next flush. Errors raised by a background flush are raised by the
+        next call to flush().
+        :return: The number of documents upserted.
+        :rtype: int
+        """
+        flushed_count = self._flush()
+
+        with self._lock:
+            errors, self._errors = self._errors, []
+
+        if errors:
+            raise errors[0]
+
+        return flushed_count
+
+    def close(self):
+        """
+        Stops the background flushes and flushes the pending documents.
+        """
+        if self._closed.is_set():
+            return
+
+        self._closed.set()
+        self._flush_requested.set()
+        self._thread.join()
+
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+    def dispose(self):
+        """
+        Closes the writer. This method is called by Disposable on exit.
+        """
+        self.close()
+
+    def _run(self):
+        """
+        The background thread that flushes the pending documents. Errors are stored for flush() to raise, and
+        the thread keeps flushing.
+        """
+        while not self._closed.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+
+            if self._closed.is_set():
+                return
+
+            try:
+                self._flush()
+            except Exception as e:
+                with self._lock:
+                    self._errors.append(e)
+
+    def _flush(self) -> int:
+        """
+        Upserts the pending documents and stores the errors.
+        :return: The number of documents upserted.
+        :rtype: int
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            if not pending:
+                return 0
+
+            try:
+                results = list(self._executor.map(self._upsert, pending.values()))
+            except BaseException:
+                # It isn't known which documents were written, so they are all written again.
+                with self._lock:
+                    self._restore(pending.items())
+
+                raise
+
+            failed = [
+                (item, error)
+                for item, error in zip(pending.items(), results)
+                if error is not None
+            ]
+
+            with self._lock:
+                errors = [error for _, error in failed]
+                errors.extend(self._restore(item for item, _ in failed))
+                self.flushed_count += len(pending) - len(failed)
+                self._errors.extend(errors)
+
+            return len(pending) - len(failed)
+
+    def _restore(self, items: Iterable[Tuple[Hashable, dict]]) -> List[Exception]:
+        """
+        Makes documents that weren't written pending again, unless a newer write replaced them. A failed
+        document is merged into a newer write when there is a merge function. The caller holds the lock.
+        :param items: The keys and documents.
+        :return: The errors raised by the merge function. The newer write is kept when the merge fails.
+        :rtype: List[Exception]
+        """
+        errors = []
+
+        for key, document in items:
+            newer_document = self._pending.get(key)
+
+            if newer_document is None:
+                self._pending[key] = document
+            elif self.merge_function:
+                try:
+                    self._pending[key] = self.merge_function(document, newer_document)
+                except Exception as e:
+                    errors.append(e)
+
+        return errors
+
+    def _upsert(self, document: dict) -> Any:
+        """
+        Upserts a document.
+        :return: The error if the upsert failed, else None. Any exception is returned, so the other upserts of
+        the flush still run and the document stays pending.
+        """
+        try:
+            self.document_manager.upsert_document(
+                document, self.collection_id, self.database_id
+            )
+        except Exception as e:
+            return e
+
+        return None
+
+    def _get_key(self, document: dict) -> Tuple[Any, Any]:
+        """
+        Gets the key that identifies a document's pending write.
+        :rtype: Tuple[Any, Any]
+        """
+        partition_key = None
+
+        if self._partition_key_path:
+            partition_key = document
+
+            for key in self._partition_key_path:
+                partition_key = (
+                    partition_key.get(key) if isinstance(partition_key, dict) else None
+                )
+
+        return str(document["id"]), repr(partition_key)
@@ -0,0 +1,376 @@
+"""
+The CircuitBreaker class.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict
+
+from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import StatusCodes
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+FAILURE_STATUS_CODES = frozenset(
+    (
+        StatusCodes.REQUEST_TIMEOUT,
+        StatusCodes.TOO_MANY_REQUESTS,
+        StatusCodes.INTERNAL_SERVER_ERROR,
+        StatusCodes.SERVICE_UNAVAILABLE,
+    )
+)
+WRITE_OPERATIONS = frozenset(("CreateItem", "UpsertItem", "ReplaceItem", "DeleteItem"))
+
+
+class CircuitBreaker:
+    """
+    Fails fast while CosmosDb is degraded instead of piling more requests onto it. The outcomes of the requests
+    sent to each collection are tracked over a rolling window, and the collection's circuit opens when too many
+    of them fail with a throttling, timeout or server error, or are too slow. While a circuit is open its
+    requests are rejected with an HTTPFailure with a 503 status code, without being sent. Once the circuit has
+    been open for a while, a few probe requests are let through: the circuit closes if they succeed and opens
+    again if they fail.
+
+    The breaker can also limit the number of requests in flight across all collections, rejecting the requests
+    above the limit immediately, and serve point reads from the documents it last read while their circuit is
+    open. Pass the breaker to CosmosDbClient so every manager uses it.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Creates a CircuitBreaker instance.
+        :param kwargs: Circuit breaker options:
+            error_rate_threshold: The fraction of failed requests that opens a circuit. Defaults to 0.5.
+
+            slow_call_duration: The number of seconds after which a request counts as slow. Defaults to 5.
+
+            slow_call_rate_threshold: The fraction of slow requests that opens a circuit. Defaults to 0.8.
+
+            min_request_count: The number of requests in the window before a circuit can open. Defaults to 20.
+
+            window: The number of seconds of outcomes the rates are calculated from. Defaults to 10.
+
+            open_duration: The number of seconds a circuit stays open before probe requests are let through.
+            Defaults to 30.
+
+            half_open_probe_count: The number of concurrent probe requests of a half open circuit. Defaults to 1.
+
+            collection_thresholds: A dict of the options above by collection link, e.g.
+            {"dbs/database/colls/collection": dict(slow_call_duration=0.5)}, for the collections that need
+            thresholds of their own.
+
+            max_in_flight: The maximum number of concurrent requests. Requests above the limit are rejected with
+            an HTTPFailure with a 429 status code. By default the requests aren't limited.
+
+            fallback_cache_size: The number of documents kept to serve point reads while their circuit is open.
+            The cached documents can be stale. Defaults to 0, which disables the fallback.
+        """
+        self.options = dict(
+            error_rate_threshold=float(kwargs.get("error_rate_threshold", 0.5)),
+            slow_call_duration=float(kwargs.get("slow_call_duration", 5.0)),
+            slow_call_rate_threshold=float(kwargs.get("slow_call_rate_threshold", 0.8)),
+            min_request_count=int(kwargs.get("min_request_count", 20)),
+            window=float(kwargs.get("window", 10.0)),
+            open_duration=float(kwargs.get("open_duration", 30.0)),
+            half_open_probe_count=int(kwargs.get("half_open_probe_count", 1)),
+        )
+        self.collection_thresholds = kwargs.get("collection_thresholds") or {}
+        self.max_in_flight = kwargs.get("max_in_flight")
+        self.fallback_cache_size = int(kwargs.get("fallback_cache_size") or 0)
+        self.rejected_count = 0
+        self.shed_count = 0
+        self.fallback_count = 0
+        self._circuits: Dict[str, _Circuit] = {}
+        self._fallback_cache: OrderedDict = OrderedDict()
+        self._in_flight = (
+            threading.BoundedSemaphore(self.max_in_flight)
+            if self.max_in_flight
+            else None
+        )
+        self._lock = threading.Lock()
+
+    def execute(
+        self,
+        operation: str,
+        resource_link: str,
+        function: Callable[..., Any],
+        *args,
+        **kwargs,
+    ) -> Any:
+        """
+        Calls a function that sends a command to CosmosDb unless the circuit of its collection is open.
+        :param operation: The name of the operation, e.g. 'ReadItem'.
+        :param resource_link: The link of the resource the operation targets.
+        :param function: The function to call.
+        :param args: The positional arguments passed to the function.
+        :param kwargs: The keyword arguments passed to the function.
+        :return: The function's return value, or a cached document if the circuit is open.
+        :rtype: Any
+        """
+        circuit = self._get_circuit(CircuitBreaker.get_collection_link(resource_link))
+
+        token = circuit.try_acquire()
+
+        if token is None:
+            cached_document = self._get_cached_document(operation, args, kwargs)
+
+            if cached_document is not None:
+                with self._lock:
+                    self.fallback_count += 1
+
+                return cached_document
+
+            with self._lock:
+                self.rejected_count += 1
+
+            raise HTTPFailure(
+                StatusCodes.SERVICE_UNAVAILABLE,
+                f"The {operation} operation was rejected because the circuit of {circuit.collection_link} is open.",
+            )
+
+        if self._in_flight and not self._in_flight.acquire(blocking=False):
+            circuit.release(token)
+
+            with self._lock:
+                self.shed_count += 1
+
+            raise HTTPFailure(
+                StatusCodes.TOO_MANY_REQUESTS,
+                f"The {operation} operation was rejected because {self.max_in_flight} requests are in flight.",
+            )
+
+        start = time.perf_counter()
+        failed = True
+
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+        except HTTPFailure as e:
+            failed = e.status_code in FAILURE_STATUS_CODES
+            raise
+        finally:
+            if self._in_flight:
+                self._in_flight.release()
+
+            circuit.record(token, failed, time.perf_counter() - start)
+
+        if self.fallback_cache_size:
+            self._update_cache(operation, resource_link, args, kwargs, result)
+
+        return result
+
+    def get_state(self, resource_link: str) -> str:
+        """
+        Gets the state of the circuit of a collection.
+        :param resource_link: The link of the collection or of one of its resources.
+        :return: 'closed', 'open' or 'half_open'.
+        :rtype: str
+        """
+        return self._get_circuit(
+            CircuitBreaker.get_collection_link(resource_link)
+        ).state
+
+    def _get_circuit(self, collection_link: str) -> "_Circuit":
+        """
+        Gets the circuit of a collection, creating it on first use.
+        :rtype: _Circuit
+        """
+        circuit = self._circuits.get(collection_link)
+
+        if circuit is None:
+            with self._lock:
+                circuit = self._circuits.get(collection_link)
+
+                if circuit is None:
+                    options = dict(
+                        self.options,
+                        **self.collection_thresholds.get(collection_link, {}),
+                    )
+                    circuit = self._circuits[collection_link] = _Circuit(
+                        collection_link, **options
+                    )
+
+        return circuit
+
+    def _get_cached_document(self, operation: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Gets the cached document of a point read.
+        :return: A copy of the document, or None if it isn't cached.
+        :rtype: Any
+        """
+        if operation != "ReadItem" or not self.fallback_cache_size or not args:
+            return None
+
+        with self._lock:
+            documents = self._fallback_cache.get(args[0], {})
+            document = documents.get(CircuitBreaker._get_partition_key(args, kwargs))
+
+        return copy.deepcopy(document)
+
+    def _update_cache(
+        self, operation: str, resource_link: str, args: tuple, kwargs: dict, result: Any
+    ):
+        """
+        Caches the documents of point reads and removes the documents that are written.
+        """
+        if operation == "ReadItem" and args:
+            document = copy.deepcopy(result)
+
+            with self._lock:
+                documents = self._fallback_cache.setdefault(args[0], {})
+                documents[CircuitBreaker._get_partition_key(args, kwargs)] = document
+                self._fallback_cache.move_to_end(args[0])
+
+                while len(self._fallback_cache) > self.fallback_cache_size:
+                    self._fallback_cache.popitem(last=False)
+        elif operation in WRITE_OPERATIONS:
+            if operation in ("CreateItem", "UpsertItem"):
+                document = args[1] if len(args) > 1 else None
+                document_id = document.get("id") if isinstance(document, dict) else None
+                document_link = f"{resource_link}/docs/{document_id}"
+            else:
+                document_link = resource_link
+
+            with self._lock:
+                self._fallback_cache.pop(document_link, None)
+
+    @staticmethod
+    def _get_partition_key(args: tuple, kwargs: dict) -> str:
+        """
+        Gets a hashable key for the partition key option of a point read.
+        :rtype: str
+        """
+        options = (args[1] if len(args) > 1 else None) or kwargs.get("options") or {}
+        return repr(options.get("partitionKey"))
+
+    @staticmethod
+    def get_collection_link(resource_link: str) -> str:
+        """
+        A helper method that gets the collection link of a resource link, e.g. dbs/database/colls/collection for
+        a document link. Links above collections are returned as is.
+        :param resource_link: The resource link.
+        :rtype: str
+        """
+        parts = (resource_link or "").strip("/").split("/")
+
+        if len(parts) >= 4 and parts[2] == "colls":
+            return "/".join(parts[:4])
+
+        return resource_link or ""
+
+
+class _Circuit:
+    """The state and recent request outcomes of a collection."""
+
+    def __init__(self, collection_link: str, **options):
+        self.collection_link = collection_link
+        self.error_rate_threshold = options["error_rate_threshold"]
+        self.slow_call_duration = options["slow_call_duration"]
+        self.slow_call_rate_threshold = options["slow_call_rate_threshold"]
+        self.min_request_count = options["min_request_count"]
+        self.window = options["window"]
+        self.open_duration = options["open_duration"]
+        self.half_open_probe_count = options["half_open_probe_count"]
+        self.state = CLOSED
+        self._generation = 0
+        self._opened = 0.0
+        self._probe_count = 0
+        self._outcomes = deque()
+        self._failed_count = 0
+        self._slow_count = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> tuple:
+        """
+        Checks if a request can be sent. A half open circuit only lets a limited number of probes through.
+        :return: A token passed to release() or record(), or None if the request can't be sent. The token
+        holds the circuit's generation, which changes with every state change, and whether the request is a
+        probe.
+        :rtype: tuple
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened < self.open_duration:
+                    return None
+
+                self._set_state(HALF_OPEN)
+                self._probe_count = 0
+
+            if self.state == HALF_OPEN:
+                if self._probe_count >= self.half_open_probe_count:
+                    return None
+
+                self._probe_count += 1
+                return self._generation, True
+
+            return self._generation, False
+
+    def release(self, token: tuple):
+        """
+        Releases a request that was acquired but not sent.
+        :param token: The token returned by try_acquire().
+        """
+        with self._lock:
+            if self._is_current_probe(token):
+                self._probe_count -= 1
+
+    def record(self, token: tuple, failed: bool, duration: float):
+        """
+        Records the outcome of a request and opens or closes the circuit. Only the probes of the current half
+        open state can close the circuit, and the requests acquired before the last state change are ignored.
+        :param token: The token returned by try_acquire().
+        :param failed: True if the request failed with a throttling, timeout or server error.
+        :param duration: The duration of the request in seconds.
+        """
+        now = time.monotonic()
+        slow = duration >= self.slow_call_duration
+
+        with self._lock:
+            if self._is_current_probe(token):
+                self._probe_count -= 1
+
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._set_state(CLOSED)
+                    self._outcomes.clear()
+                    self._failed_count = self._slow_count = 0
+
+                return
+
+            if self.state != CLOSED or token[0] != self._generation:
+                # A request sent before the circuit opened, or before it closed again.
+                return
+
+            self._outcomes.append((now, failed, slow))
+            self._failed_count += failed
+            self._slow_count += slow
+
+            while self._outcomes and now - self._outcomes[0][0] > self.window:
+                _, old_failed, old_slow = self._outcomes.popleft()
+                self._failed_count -= old_failed
+                self._slow_count -= old_slow
+
+            count = len(self._outcomes)
+
+            if count >= self.min_request_count and (
+                self._failed_count / count >= self.error_rate_threshold
+                or self._slow_count / count >= self.slow_call_rate_threshold
+            ):
+                self._open(now)
+
+    def _is_current_probe(self, token: tuple) -> bool:
+        generation, probe = token
+        return probe and self.state == HALF_OPEN and generation == self._generation
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._generation += 1
+
+    def _open(self, now: float):
+        self._set_state(OPEN)
+        self._opened = now
+        self._outcomes.clear()
+        self._failed_count = self._slow_count = 0
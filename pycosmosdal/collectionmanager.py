@@ -1,15 +1,145 @@
 """
 The CollectionManager class.
 """
-from typing import Generator, Union
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Generator, List, Union
 
 from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import HttpHeaders, StatusCodes
 
 from pycosmosdal.cosmosdbclient import CosmosDbClient
 from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.diagnostics import OperationRecord
 from pycosmosdal.errors import CollectionError
 from pycosmosdal.manager import Manager
 from pycosmosdal.models import Collection
+from pycosmosdal.resourcecache import existing_resources
+from pycosmosdal.singleflight import SingleFlight
+
+
+class _ThrottleObserver:
+    """A client listener that counts the operations and throttled operations that target a collection."""
+
+    def __init__(
+        self, collection_link: str, window: int, on_window: Callable[[float], None]
+    ):
+        """
+        Creates a _ThrottleObserver instance.
+        :param collection_link: The collection link.
+        :param window: The number of operations the throttle rate is calculated over.
+        :param on_window: The function called with the throttle rate after every window of operations.
+        """
+        self._collection_link = collection_link
+        self._window = window
+        self._on_window = on_window
+        self._lock = threading.Lock()
+        self._operation_count = 0
+        self._throttled_count = 0
+
+    def __call__(self, record: OperationRecord):
+        if not record.targets(self._collection_link):
+            return
+
+        with self._lock:
+            self._operation_count += 1
+
+            if record.throttled:
+                self._throttled_count += 1
+
+            if self._operation_count < self._window:
+                return
+
+            throttle_rate = self._throttled_count / self._operation_count
+            self._operation_count = 0
+            self._throttled_count = 0
+
+        self._on_window(throttle_rate)
+
+
+class _ThroughputScaler:
+    """
+    Raises the throughput of a collection when the throttle rate observed by a _ThrottleObserver is too high.
+    Scale-ups run on their own thread, so a slow or failed scale-up doesn't affect the operation that
+    completed the window.
+    """
+
+    def __init__(
+        self,
+        set_throughput: Callable[[int], None],
+        throughput: int,
+        max_throughput: int,
+        throttle_rate: float,
+        scale_factor: float,
+        error_callback: Callable[[Exception], None] = None,
+    ):
+        """
+        Creates a _ThroughputScaler instance.
+        :param set_throughput: The function that changes the throughput of the collection.
+        :param throughput: The current throughput.
+        :param max_throughput: The throughput the collection is never scaled above.
+        :param throttle_rate: The throttle rate that triggers a scale-up.
+        :param scale_factor: The factor the throughput is multiplied by on a scale-up.
+        :param error_callback: An optional function called with the error of a failed scale-up.
+        """
+        self.throughput = throughput
+        self.errors: List[Exception] = []
+        self._set_throughput = set_throughput
+        self._max_throughput = max_throughput
+        self._throttle_rate = throttle_rate
+        self._scale_factor = scale_factor
+        self._error_callback = error_callback
+        self._lock = threading.Lock()
+        self._scaling = False
+        self._closed = False
+
+    def __call__(self, observed_throttle_rate: float):
+        if observed_throttle_rate < self._throttle_rate:
+            return
+
+        with self._lock:
+            if self._closed or self._scaling or self.throughput >= self._max_throughput:
+                return
+
+            self._scaling = True
+
+        threading.Thread(
+            target=self._scale_up, name="pycosmosdal-scale-up", daemon=True
+        ).start()
+
+    def close(self):
+        """
+        Stops further scale-ups. Waits for a scale-up in flight, so the throughput can be restored after it.
+        """
+        with self._lock:
+            self._closed = True
+
+    def _scale_up(self):
+        """
+        Raises the throughput. The lock is held while the throughput is replaced, so close() waits for it.
+        """
+        error = None
+
+        with self._lock:
+            try:
+                if self._closed:
+                    return
+
+                new_throughput = min(
+                    self._max_throughput,
+                    int(self.throughput * self._scale_factor + 99) // 100 * 100,
+                )
+                self._set_throughput(new_throughput)
+                self.throughput = new_throughput
+            except Exception as e:
+                error = e
+                self.errors.append(e)
+            finally:
+                self._scaling = False
+
+        if error and self._error_callback:
+            self._error_callback(error)
 
 
 class CollectionManager(Manager):
@@ -17,12 +147,19 @@ class CollectionManager(Manager):
     This class is responsible for Collection management.
     """
 
-    def __init__(self, client: CosmosDbClient):
+    BULK_LOAD_INDEXING_POLICY = dict(
+        indexing_mode="consistent", included_paths=[], excluded_paths=["/*"]
+    )
+
+    def __init__(self, client: CosmosDbClient, single_flight: SingleFlight = None):
         """
         Creates a CollectionManager instance.
         :param client: The client that is responsible for issuing commands to CosmosDb.
+        :param single_flight: An optional SingleFlight that coalesces concurrent get_collection() calls for
+        the same collection into a single request.
         """
         super().__init__(client)
+        self.single_flight = single_flight
 
     def create_collection(self, collection_id: str, database_id: str, **kwargs):
         """
@@ -38,6 +175,24 @@ class CollectionManager(Manager):
 
             throughput: The number of throughput units. If not specified the collection is created with 400 units. Valid
             values are 400 - 10000.
+
+            indexing_policy: The indexing policy. If not specified every path is indexed. This parameter accepts a
+            dict with the following keys, all of which are optional:
+                indexing_mode: "consistent", "lazy" or "none".
+                automatic: Whether documents are indexed automatically.
+                included_paths: A list of paths to index.
+                excluded_paths: A list of paths not to index.
+                composite_indexes: A list of composite indexes. Each composite index is a list of dicts that
+                contain a path and an order.
+            Example: indexing_policy=dict(
+                included_paths=["/owner_id/?", "/created/?"],
+                excluded_paths=["/*"],
+                composite_indexes=[[dict(path="/owner_id", order="ascending"),
+                                    dict(path="/created", order="descending")]],
+            )
+
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
         """
         parameter_dict = dict(id=collection_id)
         unique_key_policy = kwargs.get("unique_keys")
@@ -52,6 +207,13 @@ class CollectionManager(Manager):
                 paths=partition_key["paths"], kind="Hash", version=2
             )
 
+        indexing_policy = kwargs.get("indexing_policy")
+
+        if indexing_policy:
+            parameter_dict["indexingPolicy"] = CollectionManager.create_indexing_policy(
+                indexing_policy
+            )
+
         collection_options_dict = dict()
         throughput_units = kwargs.get("throughput")
 
@@ -59,45 +221,129 @@ class CollectionManager(Manager):
             collection_options_dict["offerThroughput"] = int(throughput_units)
 
         try:
-            self.client.native_client.CreateContainer(
+            self._execute(
+                "CreateContainer",
+                CollectionManager.get_collection_link(collection_id, database_id),
                 DatabaseManager.get_database_link(database_id),
                 parameter_dict,
                 collection_options_dict,
+                timeout=kwargs.get("timeout"),
             )
         except HTTPFailure as e:
             raise CollectionError(e)
 
-    def delete_collection(self, collection_id: str, database_id: str):
+    def ensure_collection(self, collection_id: str, database_id: str, **kwargs) -> bool:
+        """
+        Creates a collection, and its database, unless they exist. The collections of a database are listed
+        once per process and the collections known to exist are cached, so repeated calls don't send requests
+        to CosmosDb. An existing collection isn't compared with or updated to the create options.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: The create options of create_collection(), which are used if the collection is created.
+        :return: True if the collection was created, False if it already existed.
+        :rtype: bool
+        """
+        host = self.client.host
+        database_link = DatabaseManager.get_database_link(database_id)
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+
+        if existing_resources.contains(host, collection_link):
+            return False
+
+        DatabaseManager(self.client).ensure_database(
+            database_id, timeout=kwargs.get("timeout")
+        )
+        existing_resources.list_once(
+            host,
+            database_link,
+            lambda: [
+                CollectionManager.get_collection_link(c.resource_id, database_id)
+                for c in self.list_collections(
+                    database_id, timeout=kwargs.get("timeout")
+                )
+            ],
+        )
+
+        if existing_resources.contains(host, collection_link):
+            return False
+
+        try:
+            self.create_collection(collection_id, database_id, **kwargs)
+            created = True
+        except CollectionError as e:
+            if e.status_code != StatusCodes.CONFLICT:
+                raise
+
+            created = False
+
+        existing_resources.add(host, collection_link)
+        return created
+
+    def delete_collection(self, collection_id: str, database_id: str, **kwargs):
         """
         Deletes a collection.
         :param collection_id: The collection id.
         :param database_id: The database id.
+        :param kwargs: Delete options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
         """
         try:
-            self.client.native_client.DeleteContainer(
-                CollectionManager.get_collection_link(collection_id, database_id)
+            collection_link = CollectionManager.get_collection_link(
+                collection_id, database_id
+            )
+            self._execute(
+                "DeleteContainer",
+                collection_link,
+                collection_link,
+                timeout=kwargs.get("timeout"),
             )
         except HTTPFailure as e:
             raise CollectionError(e)
+        finally:
+            existing_resources.remove(
+                self.client.host,
+                CollectionManager.get_collection_link(collection_id, database_id),
+            )
 
-    def list_collections(self, database_id: str) -> Generator[Collection, None, None]:
+    def list_collections(
+        self, database_id: str, **kwargs
+    ) -> Generator[Collection, None, None]:
         """
         Gets a list of collections.
+        :param database_id: The database id.
+        :param kwargs: List options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
         :return A generator that can be iterated to get the Collection instances.
         :rtype: Generator[Collection]
         """
-        for collection in self.client.native_client.ReadContainers(
-            DatabaseManager.get_database_link(database_id)
-        ):
-            yield Collection(native_resource=collection)
+        database_link = DatabaseManager.get_database_link(database_id)
+
+        try:
+            for collection in self._fetch_all(
+                "ReadContainers",
+                database_link,
+                self.client.native_client.ReadContainers(database_link),
+                kwargs.get("timeout"),
+                (database_link,),
+            ):
+                yield Collection(native_resource=collection)
+        except HTTPFailure as e:
+            raise CollectionError(e)
 
     def get_collection(
-        self, collection_id: str, database_id: str
+        self, collection_id: str, database_id: str, **kwargs
     ) -> Union[Collection, None]:
         """
         Gets a collection by id
         :param collection_id: The collection id.
         :param database_id: The database id.
+        :param kwargs: Get options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
         :return: A Collection instance else None if the collection isn't found.
         :rtype: Collection
         """
@@ -106,17 +352,425 @@ class CollectionManager(Manager):
             parameters=[dict(name="@id", value=collection_id)],
         )
 
-        collections = list(
-            self.client.native_client.QueryContainers(
-                DatabaseManager.get_database_link(database_id), query
+        database_link = DatabaseManager.get_database_link(database_id)
+
+        def query_collections():
+            return list(
+                self._fetch_all(
+                    "QueryContainers",
+                    database_link,
+                    self.client.native_client.QueryContainers(database_link, query),
+                    kwargs.get("timeout"),
+                    (database_link, query),
+                )
             )
-        )
+
+        try:
+            if self.single_flight:
+                collections = self.single_flight.execute(
+                    (
+                        "get_collection",
+                        CollectionManager.get_collection_link(
+                            collection_id, database_id
+                        ),
+                    ),
+                    query_collections,
+                )
+            else:
+                collections = query_collections()
+        except HTTPFailure as e:
+            raise CollectionError(e)
 
         if len(collections) > 0:
             return Collection(native_resource=collections[0])
 
         return None
 
+    def replace_indexing_policy(
+        self, collection_id: str, database_id: str, indexing_policy: dict, **kwargs
+    ):
+        """
+        Replaces the indexing policy of a collection. CosmosDb re-indexes the collection in the background,
+        use get_index_transformation_progress() to track the progress.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param indexing_policy: The indexing policy. See create_collection() for the accepted keys.
+        :param kwargs: Replace options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        """
+        self._replace_native_indexing_policy(
+            collection_id,
+            database_id,
+            CollectionManager.create_indexing_policy(indexing_policy),
+            kwargs.get("timeout"),
+        )
+
+    def get_index_transformation_progress(
+        self, collection_id: str, database_id: str, **kwargs
+    ) -> int:
+        """
+        Gets the progress of the re-indexing that follows an indexing policy change.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Get options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        :return: The percentage of the collection that is indexed with the current policy.
+        :rtype: int
+        """
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+
+        try:
+            self._execute(
+                "ReadContainer",
+                collection_link,
+                collection_link,
+                dict(populateQuotaInfo=True),
+                timeout=kwargs.get("timeout"),
+            )
+        except HTTPFailure as e:
+            raise CollectionError(e)
+
+        return int(
+            self.client.native_client.last_response_headers.get(
+                HttpHeaders.IndexTransformationProgress, 100
+            )
+        )
+
+    @contextmanager
+    def bulk_load(self, collection_id: str, database_id: str, **kwargs):
+        """
+        A context manager for large imports. The collection's indexing policy is replaced with a minimal
+        policy for the duration of the import, which reduces the request units charged for writes. The
+        original policy is restored on exit, even if the import fails.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Bulk load options:
+            indexing_policy: The indexing policy used during the import. Defaults to
+            BULK_LOAD_INDEXING_POLICY, which only indexes the id.
+
+            wait_for_reindex: When set to True, exiting waits until the collection is re-indexed with the
+            original policy.
+
+            poll_interval: The number of seconds between re-index progress checks. Defaults to 5.
+
+            progress_callback: A function called with the re-index progress percentage after each check.
+
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        """
+        timeout = kwargs.get("timeout")
+        collection = self._read_collection(collection_id, database_id, timeout)
+        original_indexing_policy = collection["indexingPolicy"]
+
+        self.replace_indexing_policy(
+            collection_id,
+            database_id,
+            kwargs.get("indexing_policy")
+            or CollectionManager.BULK_LOAD_INDEXING_POLICY,
+            timeout=timeout,
+        )
+
+        try:
+            yield
+        finally:
+            self._replace_native_indexing_policy(
+                collection_id, database_id, original_indexing_policy, timeout
+            )
+
+        if kwargs.get("wait_for_reindex"):
+            poll_interval = float(kwargs.get("poll_interval") or 5)
+            progress_callback = kwargs.get("progress_callback")
+
+            while True:
+                progress = self.get_index_transformation_progress(
+                    collection_id, database_id, timeout=timeout
+                )
+
+                if progress_callback:
+                    progress_callback(progress)
+
+                if progress >= 100:
+                    break
+
+                time.sleep(poll_interval)
+
+    def get_throughput(self, collection_id: str, database_id: str, **kwargs) -> int:
+        """
+        Gets the provisioned throughput of a collection.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Get options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        :return: The number of throughput units.
+        :rtype: int
+        """
+        offer = self._read_offer(collection_id, database_id, kwargs.get("timeout"))
+        return int(offer["content"]["offerThroughput"])
+
+    def set_throughput(
+        self, collection_id: str, database_id: str, throughput: int, **kwargs
+    ):
+        """
+        Changes the provisioned throughput of a collection.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param throughput: The number of throughput units. Valid values are 400 - 10000.
+        :param kwargs: Set options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        """
+        timeout = kwargs.get("timeout")
+        offer = self._read_offer(collection_id, database_id, timeout)
+        offer["content"]["offerThroughput"] = int(throughput)
+
+        try:
+            self._execute(
+                "ReplaceOffer", offer["_self"], offer["_self"], offer, timeout=timeout
+            )
+        except HTTPFailure as e:
+            raise CollectionError(e)
+
+    @contextmanager
+    def scaled_throughput(
+        self, collection_id: str, database_id: str, throughput: int, **kwargs
+    ):
+        """
+        A context manager that raises the throughput of a collection for the duration of a job. The original
+        throughput is restored on exit, even if the job fails.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param throughput: The number of throughput units used during the job.
+        :param kwargs: Scaling options:
+            max_throughput: When specified, the throughput is raised further while the job runs if the
+            operations that target the collection are throttled, up to this number of units. Operations are
+            observed through the client's listeners.
+
+            throttle_rate: The fraction of throttled operations that triggers a scale-up. Defaults to 0.05.
+
+            window: The number of operations the throttle rate is calculated over. Defaults to 100.
+
+            scale_factor: The factor the throughput is multiplied by on a scale-up. Defaults to 1.5.
+
+            error_callback: A function called with the error of a failed scale-up. Scale-ups run on a
+            background thread, so their errors are never raised to the job's operations.
+
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        """
+        timeout = kwargs.get("timeout")
+        original_throughput = self.get_throughput(
+            collection_id, database_id, timeout=timeout
+        )
+        max_throughput = kwargs.get("max_throughput")
+        observer = scaler = None
+
+        self.set_throughput(collection_id, database_id, throughput, timeout=timeout)
+
+        if max_throughput:
+            scaler = _ThroughputScaler(
+                lambda new_throughput: self.set_throughput(
+                    collection_id, database_id, new_throughput, timeout=timeout
+                ),
+                throughput,
+                int(max_throughput),
+                float(kwargs.get("throttle_rate") or 0.05),
+                float(kwargs.get("scale_factor") or 1.5),
+                kwargs.get("error_callback"),
+            )
+            observer = _ThrottleObserver(
+                CollectionManager.get_collection_link(collection_id, database_id),
+                int(kwargs.get("window") or 100),
+                scaler,
+            )
+            self.client.add_listener(observer)
+
+        try:
+            yield
+        finally:
+            if observer:
+                self.client.remove_listener(observer)
+                scaler.close()
+
+            self.set_throughput(
+                collection_id, database_id, original_throughput, timeout=timeout
+            )
+
+    def get_partition_key_ranges(
+        self, collection_id: str, database_id: str, **kwargs
+    ) -> List[dict]:
+        """
+        Gets the partition key ranges of a collection. Each range can be read independently, which allows
+        a collection to be scanned in parallel.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Get options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a CollectionError with a 408 status code is raised.
+        :return: A list of partition key range dicts. The range id is stored in the 'id' key.
+        :rtype: List[dict]
+        """
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+
+        try:
+            return list(
+                self._fetch_all(
+                    "ReadPartitionKeyRanges",
+                    collection_link,
+                    self.client.native_client._ReadPartitionKeyRanges(collection_link),
+                    kwargs.get("timeout"),
+                    (collection_link,),
+                )
+            )
+        except HTTPFailure as e:
+            raise CollectionError(e)
+
+    def _read_collection(
+        self, collection_id: str, database_id: str, timeout: float = None
+    ) -> dict:
+        """
+        Reads a collection's native resource.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param timeout: The number of seconds to wait for CosmosDb to respond.
+        :return: The CosmosDb collection.
+        :rtype: dict
+        """
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+
+        try:
+            return self._execute(
+                "ReadContainer", collection_link, collection_link, timeout=timeout
+            )
+        except HTTPFailure as e:
+            raise CollectionError(e)
+
+    def _read_offer(
+        self, collection_id: str, database_id: str, timeout: float = None
+    ) -> dict:
+        """
+        Reads the offer that holds a collection's provisioned throughput.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param timeout: The number of seconds to wait for CosmosDb to respond.
+        :return: The CosmosDb offer.
+        :rtype: dict
+        """
+        collection = self._read_collection(collection_id, database_id, timeout)
+        query = dict(
+            query="SELECT * FROM r WHERE r.resource=@link",
+            parameters=[dict(name="@link", value=collection["_self"])],
+        )
+
+        try:
+            offers = list(
+                self._fetch_all(
+                    "QueryOffers",
+                    collection["_self"],
+                    self.client.native_client.QueryOffers(query),
+                    timeout,
+                    (query,),
+                )
+            )
+        except HTTPFailure as e:
+            raise CollectionError(e)
+
+        if len(offers) == 0:
+            raise CollectionError(
+                HTTPFailure(
+                    StatusCodes.NOT_FOUND,
+                    f"The collection {collection_id} does not have provisioned throughput.",
+                )
+            )
+
+        return offers[0]
+
+    def _replace_native_indexing_policy(
+        self,
+        collection_id: str,
+        database_id: str,
+        indexing_policy: dict,
+        timeout: float = None,
+    ):
+        """
+        Replaces the indexing policy of a collection with a policy in the CosmosDb format.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param indexing_policy: The CosmosDb indexing policy.
+        :param timeout: The number of seconds to wait for CosmosDb to respond.
+        """
+        collection = self._read_collection(collection_id, database_id, timeout)
+        collection["indexingPolicy"] = indexing_policy
+
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+
+        try:
+            self._execute(
+                "ReplaceContainer",
+                collection_link,
+                collection_link,
+                collection,
+                timeout=timeout,
+            )
+        except HTTPFailure as e:
+            raise CollectionError(e)
+
+    @staticmethod
+    def create_indexing_policy(indexing_policy: dict) -> dict:
+        """
+        A helper method that converts an indexing policy to the format CosmosDb requires.
+        :param indexing_policy: The indexing policy. See create_collection() for the accepted keys.
+        :return: The CosmosDb indexing policy.
+        :rtype: dict
+        """
+        native_policy = dict()
+
+        indexing_mode = indexing_policy.get("indexing_mode")
+
+        if indexing_mode:
+            native_policy["indexingMode"] = indexing_mode
+
+            if indexing_mode == "none":
+                native_policy["automatic"] = False
+
+        if "automatic" in indexing_policy:
+            native_policy["automatic"] = bool(indexing_policy["automatic"])
+
+        for key, native_key in (
+            ("included_paths", "includedPaths"),
+            ("excluded_paths", "excludedPaths"),
+        ):
+            paths = indexing_policy.get(key)
+
+            if paths is not None:
+                native_policy[native_key] = [
+                    path if isinstance(path, dict) else dict(path=path)
+                    for path in paths
+                ]
+
+        composite_indexes = indexing_policy.get("composite_indexes")
+
+        if composite_indexes:
+            native_policy["compositeIndexes"] = [
+                [
+                    dict(path=index["path"], order=index.get("order", "ascending"))
+                    for index in composite_index
+                ]
+                for composite_index in composite_indexes
+            ]
+
+        return native_policy
+
     @staticmethod
     def get_collection_link(collection_id: str, database_id: str) -> str:
         """
@@ -0,0 +1,191 @@
+"""
+The ColumnarBuilder class.
+"""
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COLUMN_TYPES = dict(float="d", int="q", bool="b", str=None)
+NULL_HANDLING = ("fill", "skip", "raise")
+DEFAULT_FILL_VALUES = dict(float=math.nan, int=0, bool=False, str=None)
+_MISSING = object()
+
+
+class ColumnarBuilder:
+    """
+    Materializes documents into columns, one per field path. Numeric and boolean columns are stored in typed
+    arrays instead of lists of Python objects, and documents are appended page by page, so large query results
+    can be aggregated with vectorized operations without holding the documents in memory.
+    """
+
+    def __init__(self, fields: Union[Dict[str, str], List[str]], **kwargs):
+        """
+        Creates a ColumnarBuilder instance.
+        :param fields: The field paths to materialize, mapped to their column type: 'float', 'int', 'bool' or
+        'str'. Nested fields are separated with dots, and list items are selected by index, e.g. 'items.0.price'.
+        A list of field paths creates float columns.
+        :param kwargs: Materialization options:
+            null_handling: What to do when a field is missing or null. 'fill' stores the column's fill value,
+            'skip' leaves out the document and 'raise' raises a ValueError. Defaults to 'fill'.
+
+            fill_values: A dict of fill values by field path. The defaults are NaN for float columns, 0 for int
+            columns, False for bool columns and None for str columns.
+
+            backend: 'numpy' to build NumPy arrays or 'array' to build array.array columns. str columns are
+            lists with the 'array' backend. Defaults to 'numpy' when NumPy is installed.
+        """
+        if not isinstance(fields, dict):
+            fields = {field: "float" for field in fields}
+
+        for field, column_type in fields.items():
+            if column_type not in COLUMN_TYPES:
+                raise ValueError(f"Unsupported column type {column_type} for {field}.")
+
+        self.null_handling = kwargs.get("null_handling") or "fill"
+
+        if self.null_handling not in NULL_HANDLING:
+            raise ValueError(f"Unsupported null handling {self.null_handling}.")
+
+        self.backend = kwargs.get("backend") or ("numpy" if numpy else "array")
+
+        if self.backend == "numpy" and numpy is None:
+            raise ValueError("The numpy backend requires the numpy package.")
+
+        fill_values = kwargs.get("fill_values") or {}
+
+        self.fields = dict(fields)
+        self.row_count = 0
+        self._paths: List[Tuple[str, Tuple[Any, ...]]] = [
+            (field, ColumnarBuilder.get_path(field)) for field in fields
+        ]
+        self._fill_values = {
+            field: fill_values.get(field, DEFAULT_FILL_VALUES[column_type])
+            for field, column_type in fields.items()
+        }
+        self._columns: Dict[str, Any] = {
+            field: array(COLUMN_TYPES[column_type]) if COLUMN_TYPES[column_type] else []
+            for field, column_type in fields.items()
+        }
+
+    def append(self, documents: Iterable[dict]) -> int:
+        """
+        Appends documents to the columns.
+        :param documents: The documents, e.g. a block of query results.
+        :return: The number of documents appended.
+        :rtype: int
+        """
+        rows = [[] for _ in self._paths]
+        row_count = 0
+
+        for document in documents:
+            values = []
+
+            for field, path in self._paths:
+                value = ColumnarBuilder.get_value(document, path)
+
+                if value is _MISSING or value is None:
+                    if self.null_handling == "skip":
+                        break
+
+                    if self.null_handling == "raise":
+                        raise ValueError(
+                            f"The field {field} of document {document.get('id')} is null."
+                        )
+
+                    value = self._fill_values[field]
+
+                values.append(value)
+            else:
+                for column, value in zip(rows, values):
+                    column.append(value)
+
+                row_count += 1
+
+        typed_rows = []
+
+        # The values are converted before any column is extended, so a bad value leaves the columns aligned.
+        for (field, _), values in zip(self._paths, rows):
+            column = self._columns[field]
+
+            try:
+                typed_rows.append(
+                    array(column.typecode, values)
+                    if isinstance(column, array)
+                    else values
+                )
+            except (TypeError, OverflowError):
+                raise ValueError(
+                    f"The field {field} has values that aren't of type {self.fields[field]}."
+                )
+
+        for (field, _), values in zip(self._paths, typed_rows):
+            self._columns[field].extend(values)
+
+        self.row_count += row_count
+        return row_count
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Gets the columns. NumPy columns share the memory of the typed arrays, so no documents can be appended
+        once NumPy columns are built.
+        :return: A dict of columns by field path, either NumPy arrays or array.array instances and lists
+        depending on the backend.
+        :rtype: Dict[str, Any]
+        """
+        if self.backend == "array":
+            return dict(self._columns)
+
+        columns = {}
+
+        for field, column in self._columns.items():
+            column_type = self.fields[field]
+
+            if column_type == "str":
+                columns[field] = numpy.array(column, dtype=object)
+            elif column_type == "bool":
+                columns[field] = numpy.frombuffer(column, dtype=numpy.int8).astype(bool)
+            else:
+                columns[field] = numpy.frombuffer(column, dtype=column.typecode)
+
+        return columns
+
+    @staticmethod
+    def get_path(field: str) -> Tuple[Any, ...]:
+        """
+        A helper method that splits a field path into keys and list indexes.
+        :param field: The field path, e.g. 'items.0.price'.
+        :rtype: Tuple[Any, ...]
+        """
+        return tuple(int(key) if key.isdigit() else key for key in field.split("."))
+
+    @staticmethod
+    def get_value(document: dict, path: Tuple[Any, ...]) -> Any:
+        """
+        A helper method that gets the value of a field path.
+        :param document: The document.
+        :param path: The path returned by get_path().
+        :return: The value, or a sentinel if the path doesn't exist.
+        :rtype: Any
+        """
+        value = document
+
+        for key in path:
+            if isinstance(key, int) and isinstance(value, list):
+                if key >= len(value):
+                    return _MISSING
+
+                value = value[key]
+            elif isinstance(value, dict):
+                value = value.get(key, _MISSING)
+
+                if value is _MISSING:
+                    return _MISSING
+            else:
+                return _MISSING
+
+        return value
@@ -0,0 +1,219 @@
+"""
+The FieldCompressionCodec class.
+"""
+import base64
+import json
+import threading
+import zlib
+from typing import Any, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_FIELD_MARKER = "__pycosmosdal_codec__"
+
+
+class FieldCompressionCodec:
+    """
+    Compresses large document fields before they are written and decompresses them after they are read.
+    Only the configured fields are compressed, so fields that are indexed or queried stay untouched.
+    A compressed field is stored as a dict that holds the algorithm and the base64 encoded compressed value.
+    """
+
+    ALGORITHMS = ("zlib", "zstd")
+
+    def __init__(
+        self,
+        fields: List[str],
+        threshold: int = 1024,
+        algorithm: str = "zlib",
+        level: int = None,
+    ):
+        """
+        Creates a FieldCompressionCodec instance.
+        :param fields: The paths of the fields to compress. Nested fields are separated with dots,
+        e.g. 'payload.body'. The id field can't be compressed.
+        :param threshold: Values smaller than this number of bytes are stored uncompressed. Values whose
+        encoded compressed form isn't smaller than the value are stored uncompressed as well.
+        :param algorithm: The compression algorithm, 'zlib' or 'zstd'. zstd requires the zstandard package.
+        :param level: The compression level. Defaults to the algorithm's default level.
+        """
+        if algorithm not in FieldCompressionCodec.ALGORITHMS:
+            raise ValueError(
+                f"Unsupported algorithm {algorithm}. Valid values are {FieldCompressionCodec.ALGORITHMS}."
+            )
+
+        if algorithm == "zstd" and zstandard is None:
+            raise ValueError("The zstd algorithm requires the zstandard package.")
+
+        if "id" in fields:
+            raise ValueError("The id field can't be compressed.")
+
+        self.fields = [field.split(".") for field in fields]
+        self.threshold = threshold
+        self.algorithm = algorithm
+        self.level = level
+        self.original_bytes = 0
+        self.encoded_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def savings(self) -> float:
+        """
+        The fraction of bytes saved by compressing the fields that were stored compressed.
+        :rtype: float
+        """
+        if self.original_bytes == 0:
+            return 0.0
+
+        return 1 - self.encoded_bytes / self.original_bytes
+
+    def encode(self, document: dict) -> dict:
+        """
+        Compresses the configured fields of a document.
+        :param document: The document.
+        :return: A copy of the document with the configured fields compressed. The document is returned as is
+        if no field was compressed.
+        :rtype: dict
+        """
+        encoded_document = None
+
+        for path in self.fields:
+            parent = FieldCompressionCodec._get_parent(document, path)
+
+            if parent is None or path[-1] not in parent:
+                continue
+
+            value = parent[path[-1]]
+
+            if FieldCompressionCodec._is_compressed(value):
+                continue
+
+            if isinstance(value, str):
+                encoding = "text"
+                data = value.encode("utf-8")
+            else:
+                encoding = "json"
+                data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+            if len(data) < self.threshold:
+                continue
+
+            compressed_data = base64.b64encode(self._compress(data)).decode("ascii")
+
+            # Data that doesn't compress well grows once it's base64 encoded, so it's stored uncompressed.
+            if len(compressed_data) >= len(data):
+                continue
+
+            with self._lock:
+                self.original_bytes += len(data)
+                self.encoded_bytes += len(compressed_data)
+
+            if encoded_document is None:
+                encoded_document = FieldCompressionCodec._copy_paths(
+                    document, self.fields
+                )
+
+            FieldCompressionCodec._get_parent(encoded_document, path)[path[-1]] = {
+                COMPRESSED_FIELD_MARKER: self.algorithm,
+                "encoding": encoding,
+                "data": compressed_data,
+            }
+
+        return document if encoded_document is None else encoded_document
+
+    def decode(self, document: dict) -> dict:
+        """
+        Decompresses the compressed fields of a document. The document is modified in place.
+        :param document: The document.
+        :return: The document.
+        :rtype: dict
+        """
+        for path in self.fields:
+            parent = FieldCompressionCodec._get_parent(document, path)
+
+            if parent is None:
+                continue
+
+            value = parent.get(path[-1])
+
+            if not FieldCompressionCodec._is_compressed(value):
+                continue
+
+            data = FieldCompressionCodec._decompress(
+                value[COMPRESSED_FIELD_MARKER], base64.b64decode(value["data"])
+            ).decode("utf-8")
+
+            parent[path[-1]] = data if value["encoding"] == "text" else json.loads(data)
+
+        return document
+
+    def _compress(self, data: bytes) -> bytes:
+        """
+        Compresses bytes with the configured algorithm.
+        :param data: The bytes to compress.
+        :rtype: bytes
+        """
+        if self.algorithm == "zstd":
+            return zstandard.ZstdCompressor(level=self.level or 3).compress(data)
+
+        return zlib.compress(data, -1 if self.level is None else self.level)
+
+    @staticmethod
+    def _decompress(algorithm: str, data: bytes) -> bytes:
+        """
+        Decompresses bytes. The algorithm is read from the stored field, so documents written with another
+        algorithm can still be read.
+        :param algorithm: The algorithm the bytes were compressed with.
+        :param data: The compressed bytes.
+        :rtype: bytes
+        """
+        if algorithm == "zstd":
+            if zstandard is None:
+                raise ValueError("The zstd algorithm requires the zstandard package.")
+
+            return zstandard.ZstdDecompressor().decompress(data)
+
+        return zlib.decompress(data)
+
+    @staticmethod
+    def _is_compressed(value: Any) -> bool:
+        return isinstance(value, dict) and COMPRESSED_FIELD_MARKER in value
+
+    @staticmethod
+    def _get_parent(document: dict, path: List[str]) -> Any:
+        """
+        Gets the dict that holds the last field of a path.
+        :return: The dict, None if the path doesn't exist.
+        """
+        parent = document
+
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+
+        return parent if isinstance(parent, dict) else None
+
+    @staticmethod
+    def _copy_paths(document: dict, paths: List[List[str]]) -> dict:
+        """
+        Copies the dicts along the given paths so they can be modified without changing the document.
+        """
+        document_copy = dict(document)
+
+        for path in paths:
+            source, target = document, document_copy
+
+            for key in path[:-1]:
+                if not isinstance(source.get(key), dict):
+                    break
+
+                source = source[key]
+
+                if target[key] is source:
+                    target[key] = dict(source)
+
+                target = target[key]
+
+        return document_copy
@@ -0,0 +1,374 @@
+"""
+The CollectionCopier class.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbClient
+from pycosmosdal.diagnostics import OperationRecord
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.ratelimiter import RequestUnitRateLimiter
+
+SYSTEM_PROPERTIES = ("_rid", "_self", "_etag", "_attachments", "_ts")
+
+
+class CopyResult:
+    """The outcome of a collection copy."""
+
+    def __init__(
+        self,
+        source_count: int,
+        target_count: int,
+        copied_count: int,
+        skipped_count: int,
+    ):
+        """
+        Creates a CopyResult instance.
+        :param source_count: The number of documents in the source collection.
+        :param target_count: The number of documents in the target collection.
+        :param copied_count: The number of documents copied, including the runs that were resumed.
+        :param skipped_count: The number of documents the transform function skipped.
+        """
+        self.source_count = source_count
+        self.target_count = target_count
+        self.copied_count = copied_count
+        self.skipped_count = skipped_count
+
+    @property
+    def verified(self) -> bool:
+        """
+        True if the target has as many documents as the source, less the skipped documents.
+        :rtype: bool
+        """
+        return self.target_count == self.source_count - self.skipped_count
+
+
+class CollectionCopier:
+    """
+    Copies a collection into a new collection, e.g. to change its partition key. The source is read in parallel
+    by partition key range and the documents are upserted with bounded concurrency, optionally within a request
+    unit budget. Progress is checkpointed after every block of documents, so a failed copy resumes where it
+    stopped.
+    """
+
+    def __init__(self, client: CosmosDbClient, **kwargs):
+        """
+        Creates a CollectionCopier instance.
+        :param client: The client that is responsible for issuing commands to CosmosDb.
+        :param kwargs: Copier options:
+            max_parallel_ranges: The number of partition key ranges read at once. Defaults to 4.
+
+            max_concurrency: The number of concurrent upserts. Defaults to 8.
+
+            max_request_units_per_second: The request unit budget of the copy. The reads and writes of both
+            collections count against it, including those sent by other users of the client during the copy.
+            By default the copy isn't limited.
+
+            max_item_count: The number of documents read per request. Defaults to 100.
+        """
+        self.client = client
+        self.max_parallel_ranges = int(kwargs.get("max_parallel_ranges") or 4)
+        self.max_concurrency = int(kwargs.get("max_concurrency") or 8)
+        self.max_item_count = int(kwargs.get("max_item_count") or 100)
+        self.collection_manager = CollectionManager(client)
+        self.document_manager = DocumentManager(client)
+
+        max_request_units_per_second = kwargs.get("max_request_units_per_second")
+        self.rate_limiter = (
+            RequestUnitRateLimiter(max_request_units_per_second)
+            if max_request_units_per_second
+            else None
+        )
+
+    def copy(
+        self,
+        source_collection_id: str,
+        source_database_id: str,
+        target_collection_id: str,
+        target_database_id: str = None,
+        **kwargs,
+    ) -> CopyResult:
+        """
+        Copies the documents of a collection into a target collection. The target is created if it doesn't exist.
+        :param source_collection_id: The source collection id.
+        :param source_database_id: The source database id.
+        :param target_collection_id: The target collection id.
+        :param target_database_id: The target database id. Defaults to the source database id.
+        :param kwargs: Copy options:
+            partition_key, indexing_policy, throughput, unique_keys: The options the target collection is
+            created with. See CollectionManager.create_collection().
+
+            transform: A function called with each source document that returns the document to write, or None
+            to skip the document. The system properties, e.g. _rid and _etag, are removed before it is called.
+
+            checkpoint_path: The path of a file the progress is saved to. If the file exists, the copy resumes
+            from it. The file is kept when the copy completes. If a partition key range of the source split
+            since the progress was saved, its child ranges are skipped if the range had been copied, else
+            they are copied from the start and the documents the range had copied are counted once, by the
+            child ranges.
+
+            timeout: The number of seconds to wait for each request. If CosmosDb doesn't respond in time,
+            a DocumentError with a 408 status code is raised and the copy stops.
+        :return: The copy result. Check CopyResult.verified to confirm the document counts match.
+        :rtype: CopyResult
+        """
+        target_database_id = target_database_id or source_database_id
+        timeout = kwargs.get("timeout")
+
+        if (
+            self.collection_manager.get_collection(
+                target_collection_id, target_database_id, timeout=timeout
+            )
+            is None
+        ):
+            self.collection_manager.create_collection(
+                target_collection_id,
+                target_database_id,
+                **{
+                    key: kwargs[key]
+                    for key in (
+                        "partition_key",
+                        "indexing_policy",
+                        "throughput",
+                        "unique_keys",
+                    )
+                    if key in kwargs
+                },
+                timeout=timeout,
+            )
+
+        checkpoint = _Checkpoint(kwargs.get("checkpoint_path"))
+        partition_key_ranges = self.collection_manager.get_partition_key_ranges(
+            source_collection_id, source_database_id, timeout=timeout
+        )
+        checkpoint.reconcile(partition_key_ranges)
+        collection_links = (
+            CollectionManager.get_collection_link(
+                source_collection_id, source_database_id
+            ),
+            CollectionManager.get_collection_link(
+                target_collection_id, target_database_id
+            ),
+        )
+
+        def consume_request_charge(record: OperationRecord):
+            if any(record.targets(link) for link in collection_links):
+                self.rate_limiter.consume(record.request_charge)
+
+        if self.rate_limiter:
+            self.client.add_listener(consume_request_charge)
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="pycosmosdal-copy"
+            ) as write_executor, ThreadPoolExecutor(
+                max_workers=self.max_parallel_ranges,
+                thread_name_prefix="pycosmosdal-copy-range",
+            ) as range_executor:
+                futures = [
+                    range_executor.submit(
+                        self._copy_partition_key_range,
+                        partition_key_range["id"],
+                        source_collection_id,
+                        source_database_id,
+                        target_collection_id,
+                        target_database_id,
+                        kwargs.get("transform"),
+                        checkpoint,
+                        write_executor,
+                        timeout,
+                    )
+                    for partition_key_range in partition_key_ranges
+                    if not checkpoint.is_done(partition_key_range["id"])
+                ]
+
+                for future in futures:
+                    future.result()
+        finally:
+            if self.rate_limiter:
+                self.client.remove_listener(consume_request_charge)
+
+        copied_count, skipped_count = checkpoint.get_counts()
+
+        return CopyResult(
+            self.document_manager.count_documents(
+                source_collection_id, source_database_id, timeout=timeout
+            ),
+            self.document_manager.count_documents(
+                target_collection_id, target_database_id, timeout=timeout
+            ),
+            copied_count,
+            skipped_count,
+        )
+
+    def _copy_partition_key_range(
+        self,
+        partition_key_range_id: str,
+        source_collection_id: str,
+        source_database_id: str,
+        target_collection_id: str,
+        target_database_id: str,
+        transform: Callable[[dict], dict],
+        checkpoint: "_Checkpoint",
+        write_executor: ThreadPoolExecutor,
+        timeout: float,
+    ):
+        """
+        Copies the documents of a partition key range, saving the progress after every block.
+        """
+        self._wait_for_budget()
+        query_results = self.document_manager.get_documents(
+            source_collection_id,
+            source_database_id,
+            max_item_count=self.max_item_count,
+            partition_key_range_id=partition_key_range_id,
+            continuation=checkpoint.get_continuation(partition_key_range_id),
+            timeout=timeout,
+        )
+
+        while True:
+            documents = query_results.fetch_next()
+            target_documents = []
+
+            for document in documents:
+                target_document = {
+                    key: value
+                    for key, value in document.native_resource.items()
+                    if key not in SYSTEM_PROPERTIES
+                }
+
+                if transform:
+                    target_document = transform(target_document)
+
+                if target_document is not None:
+                    target_documents.append(target_document)
+
+            # Raises the first failed upsert, the block is copied again when the copy resumes.
+            list(
+                write_executor.map(
+                    lambda d: self._upsert(
+                        d, target_collection_id, target_database_id, timeout
+                    ),
+                    target_documents,
+                )
+            )
+
+            checkpoint.save(
+                partition_key_range_id,
+                query_results.continuation,
+                len(target_documents),
+                len(documents) - len(target_documents),
+            )
+
+            if not query_results.continuation:
+                return
+
+            self._wait_for_budget()
+
+    def _upsert(
+        self, document: dict, collection_id: str, database_id: str, timeout: float
+    ):
+        self._wait_for_budget()
+        self.document_manager.upsert_document(
+            document, collection_id, database_id, timeout=timeout
+        )
+
+    def _wait_for_budget(self):
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+
+
+class _Checkpoint:
+    """The progress of a copy, saved to a file after every block of documents."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._ranges: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self._ranges = json.load(file)["partition_key_ranges"]
+
+    def is_done(self, partition_key_range_id: str) -> bool:
+        with self._lock:
+            return self._ranges.get(partition_key_range_id, {}).get("done", False)
+
+    def get_continuation(self, partition_key_range_id: str) -> str:
+        with self._lock:
+            return self._ranges.get(partition_key_range_id, {}).get("continuation")
+
+    def reconcile(self, partition_key_ranges: List[dict]):
+        """
+        Matches the saved progress with the current partition key ranges. A range's continuation token can't
+        be used once the range has split, so a split range is replaced by its child ranges. The children of a
+        range that had been copied are marked as copied. The progress of a range that hadn't been copied is
+        dropped, since its children copy, and count, all of its documents again.
+        :param partition_key_ranges: The current partition key ranges of the source collection.
+        """
+        with self._lock:
+            range_ids = {r["id"] for r in partition_key_ranges}
+            changed = False
+
+            for partition_key_range in partition_key_ranges:
+                if partition_key_range["id"] in self._ranges:
+                    continue
+
+                if any(
+                    self._ranges.get(parent_id, {}).get("done")
+                    for parent_id in partition_key_range.get("parents") or []
+                ):
+                    self._ranges[partition_key_range["id"]] = dict(
+                        copied_count=0, skipped_count=0, continuation=None, done=True
+                    )
+                    changed = True
+
+            for range_id, progress in list(self._ranges.items()):
+                if range_id not in range_ids and not progress.get("done"):
+                    del self._ranges[range_id]
+                    changed = True
+
+            if changed:
+                self._write()
+
+    def get_counts(self) -> List[int]:
+        with self._lock:
+            return [
+                sum(r["copied_count"] for r in self._ranges.values()),
+                sum(r["skipped_count"] for r in self._ranges.values()),
+            ]
+
+    def save(
+        self,
+        partition_key_range_id: str,
+        continuation: str,
+        copied_count: int,
+        skipped_count: int,
+    ):
+        with self._lock:
+            progress = self._ranges.setdefault(
+                partition_key_range_id, dict(copied_count=0, skipped_count=0)
+            )
+            progress["continuation"] = continuation
+            progress["done"] = not continuation
+            progress["copied_count"] += copied_count
+            progress["skipped_count"] += skipped_count
+            self._write()
+
+    def _write(self):
+        """
+        Writes the progress to the file. The caller holds the lock.
+        """
+        if not self.path:
+            return
+
+        temporary_path = f"{self.path}.tmp"
+
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(dict(partition_key_ranges=self._ranges), file)
+
+        os.replace(temporary_path, self.path)
@@ -1,7 +1,44 @@
 """
 The CosmosDbClient class.
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List
+
 from azure.cosmos.cosmos_client import CosmosClient
+from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import StatusCodes
+
+from pycosmosdal.circuitbreaker import CircuitBreaker
+from pycosmosdal.diagnostics import OperationRecord
+
+
+class _CosmosClient(CosmosClient):
+    """
+    A CosmosClient that keeps the last response headers per thread. The CosmosClient stores the headers of
+    every response in a single attribute, so a thread that shares the client with other threads would read the
+    headers of another thread's request.
+    """
+
+    @property
+    def last_response_headers(self) -> dict:
+        return getattr(self._get_thread_headers(), "headers", None)
+
+    @last_response_headers.setter
+    def last_response_headers(self, headers: dict):
+        self._get_thread_headers().headers = headers
+
+    def _get_thread_headers(self) -> threading.local:
+        thread_headers = self.__dict__.get("_thread_headers")
+
+        if thread_headers is None:
+            thread_headers = self.__dict__.setdefault(
+                "_thread_headers", threading.local()
+            )
+
+        return thread_headers
 
 
 class CosmosDbClient:
@@ -9,23 +46,257 @@ class CosmosDbClient:
     The CosmosDbClient class serves as a wrapper around the CosmosClient.
     """
 
-    def __init__(self, host: str, master_key: str):
+    MAX_TIMEOUT_WORKERS = 32
+
+    def __init__(
+        self,
+        host: str,
+        master_key: str,
+        circuit_breaker: CircuitBreaker = None,
+        max_timeout_workers: int = MAX_TIMEOUT_WORKERS,
+    ):
         """
         Creates a CosmosDbClient instance.
         :param host: The CosmosDb host url.
         :param master_key: The CosmosDb access key.
+        :param circuit_breaker: An optional CircuitBreaker that rejects the operations of degraded collections
+        and limits the number of operations in flight. It isn't sent to worker processes with the client.
+        :param max_timeout_workers: The number of threads that run operations that have a timeout. A request
+        that timed out after it was sent keeps its thread until CosmosDb responds, so this is also the number
+        of such operations that can be in flight at once.
         """
-        self._client = CosmosClient(host, {"masterKey": master_key})
+        self._host = host
+        self._master_key = master_key
+        self.circuit_breaker = circuit_breaker
+        self.max_timeout_workers = max_timeout_workers
+        self._timeout_slots = threading.BoundedSemaphore(max_timeout_workers)
+        self._client = _CosmosClient(host, {"masterKey": master_key})
+        self._listeners: List[Callable[[OperationRecord], None]] = []
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __getstate__(self):
+        """
+        Pickles the client as its connection settings so it can be sent to worker processes.
+        The wrapped CosmosClient is not picklable and is recreated when unpickled.
+        """
+        return dict(
+            host=self._host,
+            master_key=self._master_key,
+            max_timeout_workers=self.max_timeout_workers,
+        )
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled client by recreating the wrapped CosmosClient.
+        :param state: The connection settings returned by __getstate__.
+        """
+        CosmosDbClient.__init__(
+            self,
+            state["host"],
+            state["master_key"],
+            max_timeout_workers=state["max_timeout_workers"],
+        )
+
+    @property
+    def host(self) -> str:
+        """
+        The CosmosDb host url.
+        :rtype: str
+        """
+        return self._host
 
     @property
     def native_client(self):
         """
-        The wrapped CosmosClient. Managers use this property to send commands to CosmosDb.
+        The wrapped CosmosClient. Managers use this property to send commands to CosmosDb. Its
+        last_response_headers are those of the last request sent by the calling thread, or by execute() on
+        behalf of the calling thread.
         :return: The wrapped CosmosClient.
         :rtype: CosmosClient
         """
         return self._client
 
+    def add_listener(self, listener: Callable[[OperationRecord], None]):
+        """
+        Registers a function that is called with an OperationRecord after every operation.
+        Listeners are called on the thread that issued the operation, or on a worker thread if the
+        operation has a timeout.
+        :param listener: The listener.
+        """
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[OperationRecord], None]):
+        """
+        Unregisters a listener.
+        :param listener: The listener.
+        """
+        self._listeners = [l for l in self._listeners if l is not listener]
+
+    def execute(
+        self,
+        operation: str,
+        resource_link: str,
+        function: Callable[..., Any],
+        *args,
+        timeout: float = None,
+        arguments: tuple = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Calls a function that sends a command to CosmosDb and notifies the listeners.
+        :param operation: The name of the operation, e.g. 'ReadItem'.
+        :param resource_link: The link of the resource the operation targets.
+        :param function: The function to call, usually a method of the native client.
+        :param args: The positional arguments passed to the function.
+        :param timeout: The number of seconds to wait for the function to complete. If the function doesn't
+        complete in time, an HTTPFailure with a 408 status code is raised. A request that has started can't be
+        cancelled, so it completes in the background and keeps one of the client's max_timeout_workers threads
+        until then. When all of them are busy, the HTTPFailure is raised right away instead of after waiting
+        for a thread.
+        :param arguments: The arguments reported to the listeners when they differ from the arguments passed to
+        the function, e.g. the query of a function that fetches a page of query results.
+        :param kwargs: The keyword arguments passed to the function.
+        :return: The function's return value.
+        :rtype: Any
+        """
+        if timeout is not None:
+            if not self._timeout_slots.acquire(blocking=False):
+                raise HTTPFailure(
+                    StatusCodes.REQUEST_TIMEOUT,
+                    f"The {operation} operation was not sent because all {self.max_timeout_workers} threads that "
+                    f"run operations with a timeout are busy.",
+                )
+
+            try:
+                future = self._get_executor().submit(
+                    self._execute_with_headers,
+                    operation,
+                    resource_link,
+                    function,
+                    *args,
+                    arguments=arguments,
+                    **kwargs,
+                )
+            except BaseException:
+                self._timeout_slots.release()
+                raise
+
+            try:
+                result, headers = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                # A request still waiting for a worker must not be sent after the caller was told it failed.
+                if future.cancel():
+                    self._timeout_slots.release()
+
+                raise HTTPFailure(
+                    StatusCodes.REQUEST_TIMEOUT,
+                    f"The {operation} operation did not complete within {timeout} seconds.",
+                )
+
+            # The response headers are only visible to the worker thread that sent the request.
+            self._client.last_response_headers = headers
+            return result
+
+        listeners = self._listeners
+
+        if arguments is None:
+            arguments, keyword_arguments = args, kwargs
+        else:
+            keyword_arguments = None
+
+        if self.circuit_breaker:
+            args = (operation, resource_link, function) + args
+            function = self.circuit_breaker.execute
+
+        if not listeners:
+            return function(*args, **kwargs)
+
+        start = time.perf_counter()
+
+        try:
+            result = function(*args, **kwargs)
+        except HTTPFailure as e:
+            self._notify(
+                listeners,
+                OperationRecord(
+                    operation,
+                    resource_link,
+                    time.perf_counter() - start,
+                    e.headers,
+                    e.status_code,
+                    arguments,
+                    keyword_arguments,
+                ),
+            )
+            raise
+
+        self._notify(
+            listeners,
+            OperationRecord(
+                operation,
+                resource_link,
+                time.perf_counter() - start,
+                self._client.last_response_headers,
+                arguments=arguments,
+                keyword_arguments=keyword_arguments,
+                result=result,
+            ),
+        )
+
+        return result
+
+    def _execute_with_headers(self, *args, **kwargs) -> tuple:
+        """
+        Calls execute() on a worker thread and frees the worker's slot when it returns.
+        :return: A tuple. The first item is the function's return value, the second item is the headers of the
+        CosmosDb response.
+        :rtype: tuple
+        """
+        try:
+            result = self.execute(*args, **kwargs)
+            return result, self._client.last_response_headers
+        finally:
+            self._timeout_slots.release()
+
+    def dispose(self):
+        """
+        Shuts down the thread pool used by operations that have a timeout. This method is called by
+        Disposable on exit.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+
+        if executor:
+            executor.shutdown(wait=False)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Gets the thread pool that runs operations that have a timeout. The pool is created on first use.
+        :rtype: ThreadPoolExecutor
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_timeout_workers,
+                        thread_name_prefix="pycosmosdal",
+                    )
+
+        return self._executor
+
+    @staticmethod
+    def _notify(
+        listeners: List[Callable[[OperationRecord], None]], record: OperationRecord
+    ):
+        """
+        Calls the listeners with an OperationRecord.
+        :param listeners: The listeners.
+        :param record: The OperationRecord.
+        """
+        for listener in listeners:
+            listener(record)
+
 
 class CosmosDbEmulatorClient(CosmosDbClient):
     """
@@ -33,11 +304,19 @@ class CosmosDbEmulatorClient(CosmosDbClient):
     CosmosDb emulator.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        circuit_breaker: CircuitBreaker = None,
+        max_timeout_workers: int = CosmosDbClient.MAX_TIMEOUT_WORKERS,
+    ):
         """
         Creates a CosmosDbEmulatorClient instance.
+        :param circuit_breaker: An optional CircuitBreaker.
+        :param max_timeout_workers: The number of threads that run operations that have a timeout.
         """
         super().__init__(
             "https://localhost:8081",
             "C2y6yDjf5/R+ob0N8A7Cgv30VRDJIWEHLM+4QDU5DE2nQ9nDuVTqobD4b8mGGyPMbIZnqyMsEcaGQy67XIw/Jw==",
+            circuit_breaker,
+            max_timeout_workers,
         )
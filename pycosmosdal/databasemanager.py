@@ -4,11 +4,13 @@ The DatabaseManager class.
 from typing import Generator, Union
 
 from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import StatusCodes
 
 from pycosmosdal.cosmosdbclient import CosmosDbClient
 from pycosmosdal.errors import DatabaseError
 from pycosmosdal.manager import Manager
 from pycosmosdal.models import Database
+from pycosmosdal.resourcecache import existing_resources
 
 
 class DatabaseManager(Manager):
@@ -23,41 +25,115 @@ class DatabaseManager(Manager):
         """
         super().__init__(client)
 
-    def create_database(self, database_id: str):
+    def create_database(self, database_id: str, **kwargs):
         """
         Creates a new database.
         :param database_id: The database id.
+        :param kwargs: Create options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DatabaseError with a 408 status code is raised.
         """
         try:
-            self.client.native_client.CreateDatabase({"id": database_id})
+            self._execute(
+                "CreateDatabase",
+                DatabaseManager.get_database_link(database_id),
+                {"id": database_id},
+                timeout=kwargs.get("timeout"),
+            )
         except HTTPFailure as e:
             raise DatabaseError(e)
 
-    def delete_database(self, database_id: str):
+    def ensure_database(self, database_id: str, **kwargs) -> bool:
+        """
+        Creates a database unless it exists. The databases of the account are listed once per process and
+        the databases known to exist are cached, so repeated calls don't send requests to CosmosDb.
+        :param database_id: The database id.
+        :param kwargs: Ensure options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DatabaseError with a 408 status code is raised.
+        :return: True if the database was created, False if it already existed.
+        :rtype: bool
+        """
+        host = self.client.host
+        database_link = DatabaseManager.get_database_link(database_id)
+
+        if existing_resources.contains(host, database_link):
+            return False
+
+        existing_resources.list_once(
+            host,
+            "dbs",
+            lambda: [
+                DatabaseManager.get_database_link(d.resource_id)
+                for d in self.list_databases(timeout=kwargs.get("timeout"))
+            ],
+        )
+
+        if existing_resources.contains(host, database_link):
+            return False
+
+        try:
+            self.create_database(database_id, timeout=kwargs.get("timeout"))
+            created = True
+        except DatabaseError as e:
+            if e.status_code != StatusCodes.CONFLICT:
+                raise
+
+            created = False
+
+        existing_resources.add(host, database_link)
+        return created
+
+    def delete_database(self, database_id: str, **kwargs):
         """
         Deletes a database.
         :param database_id: The database id.
+        :param kwargs: Delete options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DatabaseError with a 408 status code is raised.
         """
         try:
-            self.client.native_client.DeleteDatabase(
-                DatabaseManager.get_database_link(database_id)
+            database_link = DatabaseManager.get_database_link(database_id)
+            self._execute(
+                "DeleteDatabase",
+                database_link,
+                database_link,
+                timeout=kwargs.get("timeout"),
             )
         except HTTPFailure as e:
             raise DatabaseError(e)
+        finally:
+            existing_resources.remove(
+                self.client.host, DatabaseManager.get_database_link(database_id)
+            )
 
-    def list_databases(self) -> Generator[Database, None, None]:
+    def list_databases(self, **kwargs) -> Generator[Database, None, None]:
         """
         Gets a list of databases.
+        :param kwargs: List options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DatabaseError with a 408 status code is raised.
         :return A generator that can be iterated to get the Database instances.
         :rtype: Generator[Database]
         """
-        for database in self.client.native_client.ReadDatabases():
-            yield Database(native_resource=database)
+        try:
+            for database in self._fetch_all(
+                "ReadDatabases",
+                "dbs",
+                self.client.native_client.ReadDatabases(),
+                kwargs.get("timeout"),
+            ):
+                yield Database(native_resource=database)
+        except HTTPFailure as e:
+            raise DatabaseError(e)
 
-    def get_database(self, database_id: str) -> Union[Database, None]:
+    def get_database(self, database_id: str, **kwargs) -> Union[Database, None]:
         """
         Gets a database by id
         :param database_id: The database id.
+        :param kwargs: Get options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DatabaseError with a 408 status code is raised.
         :return: A Database instance else None if the database isn't found.
         :rtype: Database
         """
@@ -66,7 +142,18 @@ class DatabaseManager(Manager):
             parameters=[dict(name="@id", value=database_id)],
         )
 
-        databases = list(self.client.native_client.QueryDatabases(query))
+        try:
+            databases = list(
+                self._fetch_all(
+                    "QueryDatabases",
+                    "dbs",
+                    self.client.native_client.QueryDatabases(query),
+                    kwargs.get("timeout"),
+                    (query,),
+                )
+            )
+        except HTTPFailure as e:
+            raise DatabaseError(e)
 
         if len(databases) > 0:
             return Database(native_resource=databases[0])
@@ -0,0 +1,196 @@
+"""
+Decodes CosmosDb documents into dataclasses.
+"""
+import dataclasses
+import threading
+import typing
+from functools import lru_cache
+from typing import Any, Callable, Dict, Type, TypeVar
+
+FIELD_NAME_METADATA = "cosmos_name"
+PRIMITIVE_TYPES = (str, int, float, bool)
+
+T = TypeVar("T")
+
+_MISSING = object()
+_compiling = threading.local()
+
+
+def get_decoder(model_type: Type[T], validate: bool = False) -> Callable[[dict], T]:
+    """
+    Gets the decoder of a dataclass. The decoder is compiled into a function specialized for the dataclass on
+    first use and cached, so documents are decoded without inspecting the dataclass again.
+
+    Fields are read from the document property of the same name, or from the name in the field's
+    'cosmos_name' metadata, e.g. field(metadata=dict(cosmos_name="_ts")). Properties that have no field are
+    ignored, and missing properties take the field's default. Fields annotated with a dataclass, or with a
+    list, dict or Optional of a dataclass, are decoded recursively.
+    :param model_type: The dataclass.
+    :param validate: When set to True, the decoder raises a ValueError if a str, int, float or bool field
+    has a value of another type.
+    :return: A function that decodes a CosmosDb document into an instance of the dataclass.
+    :rtype: Callable[[dict], T]
+    """
+    return _compile_decoder(model_type, validate)
+
+
+@lru_cache(maxsize=None)
+def _compile_decoder(model_type: type, validate: bool) -> Callable[[dict], Any]:
+    """
+    Compiles the decoder of a dataclass. The result is cached.
+    :rtype: Callable[[dict], Any]
+    """
+    if not (isinstance(model_type, type) and dataclasses.is_dataclass(model_type)):
+        raise TypeError(f"{model_type} is not a dataclass.")
+
+    compiling = _get_compiling()
+    compiling.add(model_type)
+
+    try:
+        return _compile_decode_function(model_type, validate)
+    finally:
+        compiling.discard(model_type)
+
+
+def _compile_decode_function(model_type: type, validate: bool) -> Callable[[dict], Any]:
+    """
+    Generates and compiles the decode function of a dataclass.
+    :rtype: Callable[[dict], Any]
+    """
+    type_hints = typing.get_type_hints(model_type)
+    namespace: Dict[str, Any] = dict(
+        model_type=model_type, _MISSING=_MISSING, _raise_missing=_raise_missing
+    )
+    lines = [
+        "def decode(document):",
+        "    get = document.get",
+    ]
+    arguments = []
+
+    for index, field in enumerate(dataclasses.fields(model_type)):
+        if not field.init:
+            continue
+
+        name = field.metadata.get(FIELD_NAME_METADATA, field.name)
+        converter = _get_converter(type_hints.get(field.name, Any), validate)
+        value = f"value_{index}"
+        namespace[f"name_{index}"] = name
+        lines.append(f"    {value} = get(name_{index}, _MISSING)")
+
+        if field.default is not dataclasses.MISSING:
+            namespace[f"default_{index}"] = field.default
+            missing = f"default_{index}"
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"default_factory_{index}"] = field.default_factory
+            missing = f"default_factory_{index}()"
+        else:
+            missing = f"_raise_missing(model_type, name_{index})"
+
+        lines.append(f"    if {value} is _MISSING:")
+        lines.append(f"        {value} = {missing}")
+
+        if converter:
+            namespace[f"convert_{index}"] = converter
+            lines.append("    else:")
+            lines.append(f"        {value} = convert_{index}({value})")
+
+        arguments.append(f"{field.name}={value}")
+
+    lines.append(f"    return model_type({', '.join(arguments)})")
+    exec("\n".join(lines), namespace)
+
+    return namespace["decode"]
+
+
+def _get_converter(annotation: Any, validate: bool) -> Callable[[Any], Any]:
+    """
+    Gets the function that converts a property value to the type of a field.
+    :param annotation: The field's type annotation.
+    :param validate: True if the values of primitive fields are validated.
+    :return: The function, or None if the value is used as is.
+    :rtype: Callable[[Any], Any]
+    """
+    origin = typing.get_origin(annotation)
+    type_arguments = typing.get_args(annotation)
+
+    if isinstance(annotation, type) and dataclasses.is_dataclass(annotation):
+        if annotation in _get_compiling():
+            # The dataclass refers back to a dataclass whose decoder is being compiled, so the decoder is
+            # looked up when it's called.
+            return lambda value: _compile_decoder(annotation, validate)(value)
+
+        return _compile_decoder(annotation, validate)
+
+    if origin is typing.Union:
+        converters = [
+            _get_converter(a, validate) for a in type_arguments if a is not type(None)
+        ]
+
+        if len(converters) != 1 or converters[0] is None:
+            return None
+
+        converter = converters[0]
+        return lambda value: None if value is None else converter(value)
+
+    if origin in (list, typing.List) and type_arguments:
+        item_converter = _get_converter(type_arguments[0], validate)
+
+        if item_converter is None:
+            return None
+
+        return lambda value: [item_converter(item) for item in value]
+
+    if origin in (dict, typing.Dict) and len(type_arguments) == 2:
+        value_converter = _get_converter(type_arguments[1], validate)
+
+        if value_converter is None:
+            return None
+
+        return lambda value: {k: value_converter(v) for k, v in value.items()}
+
+    if validate and annotation in PRIMITIVE_TYPES:
+        return _create_validator(annotation)
+
+    return None
+
+
+def _create_validator(annotation: type) -> Callable[[Any], Any]:
+    """
+    Creates a function that checks the type of a primitive value. int values are accepted for float fields,
+    and bool values are only accepted for bool fields.
+    :param annotation: The field's type.
+    :rtype: Callable[[Any], Any]
+    """
+    accepted_types = (int, float) if annotation is float else (annotation,)
+    reject_bool = annotation is not bool
+
+    def validate(value: Any) -> Any:
+        if not isinstance(value, accepted_types) or (
+            reject_bool and isinstance(value, bool)
+        ):
+            raise ValueError(
+                f"Expected a value of type {annotation.__name__}, got {value!r}."
+            )
+
+        return value
+
+    return validate
+
+
+def _get_compiling() -> set:
+    """
+    Gets the dataclasses whose decoders the current thread is compiling.
+    :rtype: set
+    """
+    compiling = getattr(_compiling, "types", None)
+
+    if compiling is None:
+        compiling = _compiling.types = set()
+
+    return compiling
+
+
+def _raise_missing(model_type: type, name: str):
+    raise ValueError(
+        f"The document has no {name} property, which {model_type.__name__} requires."
+    )
@@ -0,0 +1,176 @@
+"""
+Diagnostics describing the operations sent to CosmosDb.
+"""
+import json
+from typing import Any, Mapping, Tuple
+
+from azure.cosmos.http_constants import HttpHeaders, StatusCodes
+
+QUERY_METRICS_HEADER = "x-ms-documentdb-query-metrics"
+
+
+class OperationRecord:
+    """Describes a single operation sent to CosmosDb. Listeners registered with
+    CosmosDbClient.add_listener() receive an OperationRecord for every operation."""
+
+    def __init__(
+        self,
+        operation: str,
+        resource_link: str,
+        duration: float,
+        response_headers: Mapping[str, Any] = None,
+        status_code: int = None,
+        arguments: Tuple = (),
+        keyword_arguments: Mapping[str, Any] = None,
+        result: Any = None,
+    ):
+        """
+        Creates an OperationRecord instance.
+        :param operation: The name of the operation, e.g. 'ReadItem'.
+        :param resource_link: The link of the resource the operation targeted.
+        :param duration: The duration of the operation in seconds.
+        :param response_headers: The headers of the CosmosDb response.
+        :param status_code: The status code of the failed request, None if the operation succeeded.
+        :param arguments: The positional arguments of the operation.
+        :param keyword_arguments: The keyword arguments of the operation.
+        :param result: The result of the operation.
+        """
+        response_headers = response_headers or {}
+
+        self.operation = operation
+        self.resource_link = resource_link
+        self.duration = duration
+        self.status_code = status_code
+        self.arguments = arguments
+        self.keyword_arguments = keyword_arguments or {}
+        self.result = result
+        self.request_charge = get_request_charge(response_headers)
+        self.throttle_retry_count = int(
+            response_headers.get(HttpHeaders.ThrottleRetryCount, 0)
+        )
+        self._query_metrics_header = response_headers.get(QUERY_METRICS_HEADER)
+
+    @property
+    def throttled(self) -> bool:
+        """
+        True if CosmosDb throttled the operation, even if it succeeded after retrying.
+        :rtype: bool
+        """
+        return (
+            self.throttle_retry_count > 0
+            or self.status_code == StatusCodes.TOO_MANY_REQUESTS
+        )
+
+    @property
+    def result_size(self) -> int:
+        """
+        The size in bytes of the JSON encoded result, 0 if the operation failed or returned nothing.
+        :rtype: int
+        """
+        if self.result is None:
+            return 0
+
+        return len(json.dumps(self.result, default=str))
+
+    @property
+    def query_metrics(self) -> "QueryMetrics":
+        """
+        The server side metrics of a query page, None unless the query was sent with query metrics enabled.
+        :rtype: QueryMetrics
+        """
+        if not self._query_metrics_header:
+            return None
+
+        return QueryMetrics.parse(self._query_metrics_header, self.request_charge)
+
+    def targets(self, resource_link: str) -> bool:
+        """
+        Checks if the operation targeted a resource or one of its children.
+        :param resource_link: The resource link, e.g. a collection link.
+        :rtype: bool
+        """
+        return self.resource_link == resource_link or self.resource_link.startswith(
+            f"{resource_link}/"
+        )
+
+
+class QueryMetrics:
+    """The server side metrics of a page of query results."""
+
+    def __init__(self, metrics: Mapping[str, float], request_charge: float = 0.0):
+        """
+        Creates a QueryMetrics instance.
+        :param metrics: The metrics by their CosmosDb name, e.g. 'retrievedDocumentCount'.
+        :param request_charge: The request charge of the page.
+        """
+        self.metrics = dict(metrics)
+        self.request_charge = request_charge
+        self.total_execution_time = self.metrics.get("totalExecutionTimeInMs", 0.0)
+        self.query_compile_time = self.metrics.get("queryCompileTimeInMs", 0.0)
+        self.index_lookup_time = self.metrics.get("indexLookupTimeInMs", 0.0)
+        self.document_load_time = self.metrics.get("documentLoadTimeInMs", 0.0)
+        self.retrieved_document_count = int(
+            self.metrics.get("retrievedDocumentCount", 0)
+        )
+        self.retrieved_document_size = int(self.metrics.get("retrievedDocumentSize", 0))
+        self.output_document_count = int(self.metrics.get("outputDocumentCount", 0))
+        self.output_document_size = int(self.metrics.get("outputDocumentSize", 0))
+        self.index_hit_ratio = self.metrics.get("indexUtilizationRatio", 1.0)
+
+    @property
+    def wasted_ratio(self) -> float:
+        """
+        The fraction of the page's work spent on documents the query didn't return: the larger of the
+        fraction of retrieved documents that were filtered out and the fraction of documents the index
+        didn't match.
+        :rtype: float
+        """
+        filtered_ratio = 0.0
+
+        if self.retrieved_document_count > self.output_document_count:
+            filtered_ratio = (
+                1 - self.output_document_count / self.retrieved_document_count
+            )
+
+        return max(filtered_ratio, 1 - self.index_hit_ratio, 0.0)
+
+    def __repr__(self) -> str:
+        return (
+            f"QueryMetrics({self.request_charge:.1f} RU, {self.total_execution_time:.2f} ms, "
+            f"retrieved {self.retrieved_document_count}, output {self.output_document_count}, "
+            f"index hit ratio {self.index_hit_ratio:.2f})"
+        )
+
+    @staticmethod
+    def parse(header: str, request_charge: float = 0.0) -> "QueryMetrics":
+        """
+        A helper method that parses the query metrics response header, e.g.
+        'totalExecutionTimeInMs=0.89;retrievedDocumentCount=1;outputDocumentCount=1;indexUtilizationRatio=1.00'.
+        :param header: The value of the query metrics header.
+        :param request_charge: The request charge of the page.
+        :rtype: QueryMetrics
+        """
+        metrics = {}
+
+        for item in header.split(";"):
+            name, _, value = item.partition("=")
+
+            try:
+                metrics[name.strip()] = float(value)
+            except ValueError:
+                continue
+
+        return QueryMetrics(metrics, request_charge)
+
+
+def get_request_charge(response_headers: Mapping[str, Any]) -> float:
+    """
+    Gets the request units charged for a request.
+    :param response_headers: The headers of the CosmosDb response.
+    :return: The request charge, 0 if the response has no charge.
+    :rtype: float
+    """
+    if not response_headers:
+        return 0.0
+
+    return float(response_headers.get(HttpHeaders.RequestCharge, 0) or 0)
@@ -1,5 +1,5 @@
 """The Disposable class is used as a context manager for automatic cleanup of resources. This class allows
-for the use of the 'with' statement."""
+for the use of the 'with' statement. If the managed object has a dispose method, it is called on exit."""
 from typing import Any
 
 
@@ -15,4 +15,8 @@ class Disposable:
         return self._obj
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._obj = None
+        obj, self._obj = self._obj, None
+        dispose = getattr(obj, "dispose", None)
+
+        if callable(dispose):
+            dispose()
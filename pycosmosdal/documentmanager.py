@@ -1,15 +1,85 @@
 """
 The DocumentManager class.
 """
-from typing import Any, Generator, Dict, List
+import copy
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Generator, Dict, List, Union
 
+from azure.cosmos import base, documents
 from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import HttpHeaders, StatusCodes
+from azure.cosmos.query_iterable import QueryIterable
 
 from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.compression import FieldCompressionCodec
 from pycosmosdal.cosmosdbclient import CosmosDbClient
+from pycosmosdal.decoding import get_decoder
+from pycosmosdal.diagnostics import OperationRecord, get_request_charge
 from pycosmosdal.errors import DocumentError
+from pycosmosdal.hedging import HedgingPolicy
 from pycosmosdal.manager import Manager
 from pycosmosdal.models import Document, DocumentQueryResults
+from pycosmosdal.pagesizing import AdaptivePageSizer
+from pycosmosdal.querybuilder import QueryBuilder
+from pycosmosdal.ratelimiter import RequestUnitRateLimiter
+from pycosmosdal.singleflight import SingleFlight
+
+POINT_READ_QUERY_OPERATION = "PointReadQuery"
+POINT_READ_QUERY_PATTERN = re.compile(
+    r"^\s*(?i:SELECT)\s+\*\s+(?i:FROM)\s+(?P<alias>[A-Za-z_][A-Za-z0-9_]*)\s+(?i:WHERE)\s+"
+    r"(?P=alias)(?:\.id|\[\s*[\"']id[\"']\s*\])\s*=\s*"
+    r"(?:(?P<parameter>@[A-Za-z0-9_]+)|'(?P<single_quoted>[^'\\]*)'|\"(?P<double_quoted>[^\"\\]*)\")\s*$"
+)
+
+DELETE_QUERY_PATTERN = re.compile(
+    r"^\s*(?i:SELECT)\s+(?P<top>(?i:TOP)\s+\S+\s+)?.*?\b(?i:FROM)\s+"
+    r"(?P<source>[A-Za-z_]\w*(?:\s+(?:(?i:AS)\s+)?(?!(?i:WHERE|ORDER|JOIN|OFFSET|GROUP)\b)[A-Za-z_]\w*)?)"
+    r"(?P<rest>.*)$",
+    re.DOTALL,
+)
+
+
+class DeleteResult:
+    """The progress or outcome of DocumentManager.delete_documents()."""
+
+    def __init__(
+        self,
+        matched_count: int = 0,
+        deleted_count: int = 0,
+        missing_count: int = 0,
+        request_charge: float = 0.0,
+        duration: float = 0.0,
+    ):
+        """
+        Creates a DeleteResult instance.
+        :param matched_count: The number of documents the query matched.
+        :param deleted_count: The number of documents deleted.
+        :param missing_count: The number of matched documents that were already deleted.
+        :param request_charge: The request units charged for the query and the deletes.
+        :param duration: The number of seconds since the delete started.
+        """
+        self.matched_count = matched_count
+        self.deleted_count = deleted_count
+        self.missing_count = missing_count
+        self.request_charge = request_charge
+        self.duration = duration
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of documents deleted per second.
+        :rtype: float
+        """
+        return self.deleted_count / self.duration if self.duration else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"DeleteResult({self.deleted_count}/{self.matched_count} deleted, {self.missing_count} missing, "
+            f"{self.request_charge:.1f} RU, {self.throughput:.1f} documents/s)"
+        )
 
 
 class DocumentManager(Manager):
@@ -17,49 +87,125 @@ class DocumentManager(Manager):
     This class is responsible for Document management and querying.
     """
 
-    def __init__(self, client: CosmosDbClient):
+    def __init__(
+        self,
+        client: CosmosDbClient,
+        codec: FieldCompressionCodec = None,
+        hedging_policy: HedgingPolicy = None,
+        single_flight: SingleFlight = None,
+    ):
         """
         Creates a DocumentManager instance.
         :param client: The client that is responsible for issuing commands to CosmosDb.
+        :param codec: An optional codec that compresses large document fields when documents are written
+        and decompresses them when documents are read.
+        :param hedging_policy: An optional policy that sends a duplicate read when get_document() is slow
+        to respond.
+        :param single_flight: An optional SingleFlight that coalesces concurrent get_document() calls for the
+        same document into a single request.
         """
         super().__init__(client)
+        self.codec = codec
+        self.hedging_policy = hedging_policy
+        self.single_flight = single_flight
 
     def upsert_document(
-        self, document: dict, collection_id: str, database_id: str
+        self, document: dict, collection_id: str, database_id: str, **kwargs
     ) -> Document:
         """
         Inserts a new document or if the document exists, updates the document.
         :param document: The document to upsert.
         :param collection_id: The collection id.
         :param database_id: The database id.
+        :param kwargs: Upsert options:
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DocumentError with a 408 status code is raised.
         :return: A Document instance which wraps a CosmosDb document.
         ":rtype: Document
         """
         try:
-            document = self.client.native_client.UpsertItem(
-                CollectionManager.get_collection_link(collection_id, database_id),
+            collection_link = CollectionManager.get_collection_link(
+                collection_id, database_id
+            )
+            if self.codec:
+                document = self.codec.encode(document)
+
+            document = self._execute(
+                "UpsertItem",
+                collection_link,
+                collection_link,
                 document,
+                timeout=kwargs.get("timeout"),
             )
-            return Document(document)
+            return self._create_document(document)
         except HTTPFailure as e:
             raise DocumentError(e)
 
-    def get_document(self, document_id: Any, collection_id: str, database_id: str):
+    def get_document(
+        self, document_id: Any, collection_id: str, database_id: str, **kwargs
+    ):
         """
         Gets a document by its id.
         :param document_id: The document id.
         :param collection_id: The collection id.
         :param database_id: The database id.
-        :return: A Document instance which wraps a CosmosDb document.
+        :param kwargs: Get options:
+            partition_key: This must be specified when reading from a partitioned collection.
+
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DocumentError with a 408 status code is raised.
+
+            hedge: When set to False, no duplicate read is sent even if the manager has a hedging policy.
+
+            model_type: A dataclass the document is decoded into instead of a Document instance. See
+            get_decoder().
+
+            validate_model: When set to True, the types of the model's str, int, float and bool fields are
+            validated.
+        :return: A Document instance which wraps a CosmosDb document, or an instance of the model type.
         ":rtype: Document
         """
-        try:
-            document = self.client.native_client.ReadItem(
-                DocumentManager.get_document_link(
-                    document_id, collection_id, database_id
+        options = dict()
+        partition_key = kwargs.get("partition_key")
+
+        if partition_key:
+            options["partitionKey"] = partition_key
+
+        timeout = kwargs.get("timeout")
+
+        document_link = DocumentManager.get_document_link(
+            document_id, collection_id, database_id
+        )
+
+        def read_document() -> Any:
+            if self.hedging_policy and kwargs.get("hedge", True):
+                document = self.hedging_policy.execute(
+                    lambda: self._hedged_read(document_link, options), timeout
+                )
+            else:
+                document = self._execute(
+                    "ReadItem", document_link, document_link, options, timeout=timeout
                 )
+
+            return self._create_document(
+                document, kwargs.get("model_type"), kwargs.get("validate_model")
             )
-            return Document(document)
+
+        try:
+            if self.single_flight:
+                return self.single_flight.execute(
+                    (
+                        "get_document",
+                        document_link,
+                        repr(partition_key),
+                        kwargs.get("model_type"),
+                        bool(kwargs.get("validate_model")),
+                    ),
+                    read_document,
+                    timeout,
+                )
+
+            return read_document()
         except HTTPFailure as e:
             raise DocumentError(e)
 
@@ -73,6 +219,9 @@ class DocumentManager(Manager):
         :param database_id: The database id.
         :param kwargs: Delete options:
             partition_key: This must be specified when deleting from a partitioned collection.
+
+            timeout: The number of seconds to wait for CosmosDb to respond. If CosmosDb doesn't respond in
+            time, a DocumentError with a 408 status code is raised.
         """
         options = dict()
         partition_key = kwargs.get("partition_key")
@@ -81,15 +230,180 @@ class DocumentManager(Manager):
             options["partitionKey"] = partition_key
 
         try:
-            self.client.native_client.DeleteItem(
-                DocumentManager.get_document_link(
-                    document_id, collection_id, database_id
-                ),
+            document_link = DocumentManager.get_document_link(
+                document_id, collection_id, database_id
+            )
+            self._execute(
+                "DeleteItem",
+                document_link,
+                document_link,
                 options=options,
+                timeout=kwargs.get("timeout"),
             )
         except HTTPFailure as e:
             raise DocumentError(e)
 
+    def delete_documents(
+        self,
+        collection_id: str,
+        database_id: str,
+        query: Union[str, QueryBuilder],
+        query_parameters: List[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> DeleteResult:
+        """
+        Deletes the documents a SQL query matches. The query's SELECT clause is replaced with a projection of the
+        document id and partition key, the matches are read block by block and each block is deleted concurrently.
+        Documents that are already deleted count as deleted, so a failed delete can be run again.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param query: The SQL query, e.g. SELECT * FROM c WHERE c.expires < @now, or a QueryBuilder.
+        :param query_parameters: If the SQL query is parameterized, the parameter names and values are specified here.
+        They are ignored when a QueryBuilder is passed.
+        :param kwargs: Delete options:
+            partition_key_path: The partition key path of the collection, e.g. '/owner_id'. By default the
+            collection is read to find it.
+
+            partition_key: Only deletes the matching documents of this partition key.
+
+            max_concurrency: The number of concurrent deletes. Defaults to 8.
+
+            max_request_units_per_second: The request unit budget of the delete. The query, the deletes and the
+            other operations sent to the collection through the client during the delete count against it. By
+            default the delete isn't limited.
+
+            max_item_count: The number of matches read per request. Defaults to 100.
+
+            progress: A function called with a DeleteResult after every block of documents is deleted.
+
+            timeout: The number of seconds to wait for each request. If CosmosDb doesn't respond in time,
+            a DocumentError with a 408 status code is raised and the delete stops.
+        :return: The outcome of the delete.
+        :rtype: DeleteResult
+        """
+        if isinstance(query, QueryBuilder):
+            query_spec = query.compile()
+            query, query_parameters = query_spec["query"], query_spec.get("parameters")
+
+        timeout = kwargs.get("timeout")
+        partition_key_path = kwargs.get("partition_key_path")
+
+        if partition_key_path is None:
+            collection = CollectionManager(self.client).get_collection(
+                collection_id, database_id, timeout=timeout
+            )
+
+            if collection is None:
+                raise DocumentError(
+                    HTTPFailure(
+                        StatusCodes.NOT_FOUND,
+                        f"The collection {collection_id} wasn't found.",
+                    )
+                )
+
+            partition_key_paths = collection.native_resource.get(
+                "partitionKey", {}
+            ).get("paths", [])
+            partition_key_path = partition_key_paths[0] if partition_key_paths else ""
+
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+        partition_key = kwargs.get("partition_key")
+        query_results = self.query_documents(
+            collection_id,
+            database_id,
+            DocumentManager.get_delete_query(query, partition_key_path),
+            query_parameters,
+            max_item_count=int(kwargs.get("max_item_count") or 100),
+            partition_key=partition_key,
+            enable_cross_partition_query=partition_key is None,
+            point_read=False,
+            timeout=timeout,
+        )
+
+        max_request_units_per_second = kwargs.get("max_request_units_per_second")
+        rate_limiter = (
+            RequestUnitRateLimiter(max_request_units_per_second)
+            if max_request_units_per_second
+            else None
+        )
+        result = DeleteResult()
+        result_lock = threading.Lock()
+        start = time.perf_counter()
+
+        def add_request_charge(record: OperationRecord):
+            if record.targets(collection_link):
+                with result_lock:
+                    result.request_charge += record.request_charge
+
+                if rate_limiter:
+                    rate_limiter.consume(record.request_charge)
+
+        def delete(match: Document) -> bool:
+            if rate_limiter:
+                rate_limiter.wait()
+
+            document_link = DocumentManager.get_document_link(
+                match.resource_id, collection_id, database_id
+            )
+            options = dict()
+
+            if partition_key_path:
+                # The projection leaves out the partition key of a document that doesn't have one. Such a
+                # document is stored under the undefined partition key, not under null.
+                options["partitionKey"] = match.native_resource.get(
+                    "partitionKey", documents.Undefined
+                )
+
+            try:
+                self._execute(
+                    "DeleteItem",
+                    document_link,
+                    document_link,
+                    options=options,
+                    timeout=timeout,
+                )
+                return True
+            except HTTPFailure as e:
+                if e.status_code == StatusCodes.NOT_FOUND:
+                    return False
+
+                raise DocumentError(e)
+
+        self.client.add_listener(add_request_charge)
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=int(kwargs.get("max_concurrency") or 8),
+                thread_name_prefix="pycosmosdal-delete",
+            ) as executor:
+                while True:
+                    if rate_limiter:
+                        rate_limiter.wait()
+
+                    matches = query_results.fetch_next()
+
+                    if not matches:
+                        break
+
+                    deleted = list(executor.map(delete, matches))
+
+                    with result_lock:
+                        result.matched_count += len(matches)
+                        result.deleted_count += sum(deleted)
+                        result.missing_count += len(deleted) - sum(deleted)
+                        result.duration = time.perf_counter() - start
+                        progress = copy.copy(result)
+
+                    if kwargs.get("progress"):
+                        kwargs["progress"](progress)
+        finally:
+            self.client.remove_listener(add_request_charge)
+
+        result.duration = time.perf_counter() - start
+        return result
+
     def get_documents(
         self, collection_id: str, database_id: str, **kwargs
     ) -> DocumentQueryResults:
@@ -101,6 +415,25 @@ class DocumentManager(Manager):
         :param kwargs: Get document options:
             max_item_count: This controls the maximum number of documents retrieved in a single call to
             DocumentQueryResults.fetch_next().
+
+            partition_key_range_id: Only reads the documents in this partition key range. The range ids
+            are returned by CollectionManager.get_partition_key_ranges().
+
+            continuation: Resumes a partition key range read from the DocumentQueryResults.continuation token
+            of an earlier read. Requires partition_key_range_id.
+
+            model_type: A dataclass that DocumentQueryResults.fetch_next() decodes the documents into instead of
+            Document instances. See get_decoder().
+
+            validate_model: When set to True, the types of the model's str, int, float and bool fields are
+            validated.
+
+            adaptive_page_size: When set to True, or to an AdaptivePageSizer, the page size is tuned while the
+            documents are read, starting from max_item_count, and max_item_count no longer bounds the block
+            size. The decisions are listed in DocumentQueryResults.page_sizer.decisions.
+
+            timeout: The number of seconds to wait for each call to DocumentQueryResults.fetch_next(). If
+            CosmosDb doesn't respond in time, a DocumentError with a 408 status code is raised.
         :return: A DocumentQueryResults instance which can be iterated through by calling
         DocumentQueryResults.fetch_next()
         :rtype: DocumentQueryResults
@@ -112,13 +445,73 @@ class DocumentManager(Manager):
         if max_item_count:
             options["maxItemCount"] = int(max_item_count)
 
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+        partition_key_range_id = kwargs.get("partition_key_range_id")
+
+        def set_continuation(continuation: str):
+            query_results.continuation = continuation
+
         try:
-            query_iterable = self.client.native_client.ReadItems(
-                CollectionManager.get_collection_link(collection_id, database_id),
+            if partition_key_range_id is not None:
+                query_iterable = self._read_partition_key_range(
+                    collection_link,
+                    str(partition_key_range_id),
+                    options,
+                    kwargs.get("continuation"),
+                    set_continuation,
+                )
+            else:
+                query_iterable = self.client.native_client.ReadItems(
+                    collection_link, feed_options=options,
+                )
+
+            query_results = DocumentQueryResults(
+                query_iterable,
+                self.client,
+                collection_link,
+                self.codec,
+                kwargs.get("timeout"),
+                arguments=(collection_link, None, options),
+                page_sizer=DocumentManager._get_page_sizer(options, kwargs),
                 feed_options=options,
+                model_type=kwargs.get("model_type"),
+                validate_model=bool(kwargs.get("validate_model")),
             )
+            return query_results
+        except HTTPFailure as e:
+            raise DocumentError(e)
 
-            return DocumentQueryResults(query_iterable)
+    def count_documents(self, collection_id: str, database_id: str, **kwargs) -> int:
+        """
+        Counts the documents in a collection.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Count options:
+            timeout: The number of seconds to wait for each block of results. If CosmosDb doesn't respond in
+            time, a DocumentError with a 408 status code is raised.
+        :return: The number of documents.
+        :rtype: int
+        """
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+        query = dict(query="SELECT VALUE COUNT(1) FROM r")
+        options = dict(enableCrossPartitionQuery=True)
+
+        try:
+            return sum(
+                self._fetch_all(
+                    "FetchNextBlock",
+                    collection_link,
+                    self.client.native_client.QueryItems(
+                        collection_link, query, options=options
+                    ),
+                    kwargs.get("timeout"),
+                    (collection_link, query, options),
+                )
+            )
         except HTTPFailure as e:
             raise DocumentError(e)
 
@@ -126,7 +519,7 @@ class DocumentManager(Manager):
         self,
         collection_id: str,
         database_id: str,
-        query: str,
+        query: Union[str, QueryBuilder],
         query_parameters: List[Dict[str, Any]] = None,
         **kwargs,
     ) -> DocumentQueryResults:
@@ -135,8 +528,11 @@ class DocumentManager(Manager):
         other than -1 to reduce the chance of CosmosDb throttling errors.
         :param collection_id: The collection id.
         :param database_id: The database id.
-        :param query: The SQL query.
+        :param query: The SQL query, or a QueryBuilder. When a QueryBuilder that knows the partition key path is
+        passed without a partition_key option, the query is sent to the partition its partition key equality
+        predicate targets, or across partitions if there is none.
         :param query_parameters: If the SQL query is parameterized, the parameter names and values are specified here.
+        They are ignored when a QueryBuilder is passed.
         :param kwargs: Query options:
             max_item_count: This controls the maximum number of documents retrieved in a single call to
             DocumentQueryResults.fetch_next().
@@ -145,14 +541,54 @@ class DocumentManager(Manager):
 
             enable_cross_partition_query: When set to True, this query will work across multiple partitions.
 
+            partition_key_range_id: Only queries the documents in this partition key range. The range ids
+            are returned by CollectionManager.get_partition_key_ranges(). Aggregates, e.g. COUNT, are
+            computed for the range.
+
+            populate_query_metrics: When set to True, CosmosDb returns the server side metrics of every block,
+            e.g. the index hit ratio and the number of retrieved and returned documents. They are listed in
+            DocumentQueryResults.query_metrics and in the OperationRecord.query_metrics of the listeners.
+
+            adaptive_page_size: When set to True, or to an AdaptivePageSizer, the page size is tuned while the
+            query runs, starting from max_item_count, and max_item_count no longer bounds the block size. The
+            decisions are listed in DocumentQueryResults.page_sizer.decisions. The page size of cross partition
+            queries that CosmosDb must merge, e.g. with ORDER BY, can't change once the first block is fetched.
+
+            timeout: The number of seconds to wait for each call to DocumentQueryResults.fetch_next(). If
+            CosmosDb doesn't respond in time, a DocumentError with a 408 status code is raised.
+
+            model_type: A dataclass that DocumentQueryResults.fetch_next() decodes the documents into instead of
+            Document instances. See get_decoder().
+
+            validate_model: When set to True, the types of the model's str, int, float and bool fields are
+            validated.
+
+            point_read: When a partition key is specified and the query only selects a document by its id,
+            e.g. SELECT * FROM c WHERE c.id = @id, the document is fetched with a point read, which costs
+            fewer request units than a query. Listeners receive a 'PointReadQuery' operation instead of a
+            'FetchNextBlock' operation. Set to False to always run the query.
+
         :return: A DocumentQueryResults instance which can be iterated through by calling
         DocumentQueryResults.fetch_next()
         :rtype: DocumentQueryResults
         """
-        query_spec = dict(query=query)
+        if isinstance(query, QueryBuilder):
+            query_spec = query.compile()
+
+            if "partition_key" not in kwargs and query.partition_key_path:
+                found, partition_key = query.get_partition_key()
+                kwargs = dict(kwargs)
+
+                # A null partition key is sent across partitions, but falsy keys like 0 or "" are sent as is.
+                if found and partition_key is not None:
+                    kwargs["partition_key"] = partition_key
+                else:
+                    kwargs["enable_cross_partition_query"] = True
+        else:
+            query_spec = dict(query=query)
 
-        if query_parameters:
-            query_spec["parameters"] = query_parameters
+            if query_parameters:
+                query_spec["parameters"] = query_parameters
 
         options = dict()
 
@@ -163,7 +599,7 @@ class DocumentManager(Manager):
 
         partition_key = kwargs.get("partition_key")
 
-        if partition_key:
+        if partition_key is not None:
             options["partitionKey"] = partition_key
 
         enable_cross_partition_query = kwargs.get("enable_cross_partition_query")
@@ -171,17 +607,253 @@ class DocumentManager(Manager):
         if enable_cross_partition_query:
             options["enableCrossPartitionQuery"] = bool(enable_cross_partition_query)
 
+        if kwargs.get("populate_query_metrics"):
+            options["populateQueryMetrics"] = True
+
+        collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+
+        if partition_key is not None and kwargs.get("point_read", True):
+            document_id = DocumentManager.get_point_read_document_id(query_spec)
+
+            if document_id is not None:
+                document_link = DocumentManager.get_document_link(
+                    document_id, collection_id, database_id
+                )
+
+                return DocumentQueryResults(
+                    self._read_document_as_query(document_link, options),
+                    self.client,
+                    collection_link,
+                    self.codec,
+                    kwargs.get("timeout"),
+                    POINT_READ_QUERY_OPERATION,
+                    (document_link, dict(partitionKey=partition_key)),
+                    model_type=kwargs.get("model_type"),
+                    validate_model=bool(kwargs.get("validate_model")),
+                )
+
+        partition_key_range_id = kwargs.get("partition_key_range_id")
+
         try:
-            query_iterable = self.client.native_client.QueryItems(
-                CollectionManager.get_collection_link(collection_id, database_id),
-                query_spec,
-                options=options,
-            )
+            if partition_key_range_id is not None:
+                query_iterable = self._read_partition_key_range(
+                    collection_link,
+                    str(partition_key_range_id),
+                    options,
+                    query_spec=query_spec,
+                )
+            else:
+                query_iterable = self.client.native_client.QueryItems(
+                    collection_link, query_spec, options=options,
+                )
 
-            return DocumentQueryResults(query_iterable)
+            return DocumentQueryResults(
+                query_iterable,
+                self.client,
+                collection_link,
+                self.codec,
+                kwargs.get("timeout"),
+                arguments=(collection_link, query_spec, options),
+                page_sizer=DocumentManager._get_page_sizer(options, kwargs),
+                feed_options=options,
+                model_type=kwargs.get("model_type"),
+                validate_model=bool(kwargs.get("validate_model")),
+            )
         except HTTPFailure as e:
             raise DocumentError(e)
 
+    def _hedged_read(self, document_link: str, options: dict) -> dict:
+        """
+        Reads a document and records the request charge with the hedging policy.
+        :param document_link: The document link.
+        :param options: The read options.
+        :return: The CosmosDb document.
+        :rtype: dict
+        """
+        document = self._execute("ReadItem", document_link, document_link, options)
+        # The primary and duplicate reads run on separate worker threads, and the last response headers are
+        # kept per thread, so these are the headers of this read.
+        self.hedging_policy.record_request_charge(
+            get_request_charge(self.client.native_client.last_response_headers)
+        )
+        return document
+
+    def _create_document(
+        self,
+        native_document: dict,
+        model_type: type = None,
+        validate_model: bool = False,
+    ) -> Any:
+        """
+        Wraps a CosmosDb document in a Document instance, or decodes it into a model type, decoding it first
+        if a codec is configured.
+        :param native_document: The CosmosDb document.
+        :param model_type: The dataclass the document is decoded into instead of a Document instance.
+        :param validate_model: True if the types of the model's primitive fields are validated.
+        :rtype: Any
+        """
+        if self.codec:
+            native_document = self.codec.decode(native_document)
+
+        if model_type:
+            return get_decoder(model_type, bool(validate_model))(native_document)
+
+        return Document(native_document)
+
+    def _read_partition_key_range(
+        self,
+        collection_link: str,
+        partition_key_range_id: str,
+        options: dict,
+        continuation: str = None,
+        on_continuation: Callable[[str], None] = None,
+        query_spec: dict = None,
+    ) -> QueryIterable:
+        """
+        Creates a QueryIterable that reads, or queries, the documents of a single partition key range.
+        :param collection_link: The collection link.
+        :param partition_key_range_id: The partition key range id.
+        :param options: The feed options.
+        :param continuation: The continuation token the read starts from.
+        :param on_continuation: A function called with the continuation token of every fetched block.
+        :param query_spec: The query spec dict, or None to read all the documents of the range.
+        :return: The QueryIterable.
+        :rtype: QueryIterable
+        """
+        native_client = self.client.native_client
+        path = base.GetPathFromLink(collection_link, "docs")
+        collection_id = base.GetResourceIdOrFullNameFromLink(collection_link)
+        start_continuation = [continuation]
+
+        def fetch_function(feed_options):
+            if start_continuation[0] and not feed_options.get("continuation"):
+                feed_options = dict(feed_options, continuation=start_continuation[0])
+
+            start_continuation[0] = None
+            documents, headers = native_client.QueryFeed(
+                path, collection_id, query_spec, feed_options, partition_key_range_id
+            )
+
+            if on_continuation:
+                on_continuation(headers.get(HttpHeaders.Continuation))
+
+            return documents, headers
+
+        return QueryIterable(native_client, None, options, fetch_function)
+
+    def _read_document_as_query(
+        self, document_link: str, options: dict
+    ) -> QueryIterable:
+        """
+        Creates a QueryIterable that reads a single document with a point read. A missing document is returned
+        as an empty result, like a query that matches no documents.
+        :param document_link: The document link.
+        :param options: The query options. The partition key option is passed to the point read.
+        :return: The QueryIterable.
+        :rtype: QueryIterable
+        """
+        native_client = self.client.native_client
+        read_options = dict(partitionKey=options["partitionKey"])
+
+        def fetch_function(_):
+            try:
+                document = native_client.ReadItem(document_link, read_options)
+            except HTTPFailure as e:
+                if e.status_code != StatusCodes.NOT_FOUND:
+                    raise
+
+                return [], {}
+
+            return [document], native_client.last_response_headers
+
+        return QueryIterable(native_client, None, options, fetch_function)
+
+    @staticmethod
+    def _get_page_sizer(options: dict, kwargs: dict) -> AdaptivePageSizer:
+        """
+        Gets the page sizer of a query from the adaptive_page_size option.
+        :param options: The feed options, whose maxItemCount is the initial page size.
+        :param kwargs: The query options.
+        :return: The page sizer, or None if the page size isn't adaptive.
+        :rtype: AdaptivePageSizer
+        """
+        adaptive_page_size = kwargs.get("adaptive_page_size")
+
+        if not adaptive_page_size:
+            return None
+
+        if isinstance(adaptive_page_size, AdaptivePageSizer):
+            return adaptive_page_size
+
+        max_item_count = options.get("maxItemCount", -1)
+
+        if max_item_count > 0:
+            return AdaptivePageSizer(
+                initial_page_size=max_item_count,
+                min_page_size=min(10, max_item_count),
+                max_page_size=max(1000, max_item_count),
+            )
+
+        return AdaptivePageSizer()
+
+    @staticmethod
+    def get_delete_query(query: str, partition_key_path: str) -> str:
+        """
+        A helper method that replaces the SELECT clause of a query with a projection of the document id and
+        partition key, e.g. SELECT c.id, c["owner_id"] AS partitionKey FROM c WHERE c.expires < @now.
+        :param query: The SQL query.
+        :param partition_key_path: The partition key path, or an empty string if the collection isn't partitioned.
+        :return: The SQL query.
+        :rtype: str
+        """
+        match = DELETE_QUERY_PATTERN.match(query)
+
+        if match is None:
+            raise ValueError(f"The query {query} can't be projected to ids.")
+
+        alias = match.group("source").split()[-1]
+        projection = f"{alias}.id"
+
+        if partition_key_path:
+            accessor = "".join(
+                f'["{key}"]' for key in partition_key_path.strip("/").split("/")
+            )
+            projection += f", {alias}{accessor} AS partitionKey"
+
+        return f"SELECT {match.group('top') or ''}{projection} FROM {match.group('source')}{match.group('rest')}"
+
+    @staticmethod
+    def get_point_read_document_id(query_spec: dict) -> Any:
+        """
+        A helper method that gets the document id of a query that only selects a document by its id.
+        :param query_spec: The query spec dict that contains the query text and parameters.
+        :return: The document id, or None if the query can't be served by a point read.
+        :rtype: Any
+        """
+        match = POINT_READ_QUERY_PATTERN.match(query_spec["query"])
+
+        if not match:
+            return None
+
+        parameter = match.group("parameter")
+
+        if parameter is None:
+            values = [match.group("single_quoted") or match.group("double_quoted")]
+        else:
+            values = [
+                p.get("value")
+                for p in query_spec.get("parameters") or []
+                if p.get("name") == parameter
+            ]
+
+        # Document ids are strings, a query comparing the id to any other value matches no documents.
+        if len(values) != 1 or not isinstance(values[0], str) or not values[0]:
+            return None
+
+        return values[0]
+
     @staticmethod
     def get_document_link(
         document_id: Any, collection_id: str, database_id: str
@@ -15,6 +15,25 @@ class CosmosDalError(Exception):
         self.status_code = cosmos_error.status_code
         self.message = cosmos_error._http_error_message
 
+    def __reduce__(self):
+        """
+        Rebuilds the wrapped CosmosDb error when unpickled so errors raised in worker processes
+        keep their status code and message.
+        """
+        return _rebuild_error, (self.__class__, self.status_code, self.message)
+
+
+def _rebuild_error(error_class: type, status_code: int, message: str) -> CosmosDalError:
+    """
+    Recreates a pickled DAL error.
+    :param error_class: The CosmosDalError derived class.
+    :param status_code: The status code of the wrapped CosmosDb error.
+    :param message: The message of the wrapped CosmosDb error.
+    :return: The DAL error.
+    :rtype: CosmosDalError
+    """
+    return error_class(HTTPFailure(status_code, message))
+
 
 class DatabaseError(CosmosDalError):
     """Represents errors raised by the DatabaseManager."""
@@ -0,0 +1,172 @@
+"""
+The HedgingPolicy class.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import StatusCodes
+
+
+class HedgingPolicy:
+    """
+    Reduces the tail latency of point reads. When a read doesn't complete within an adaptive delay, by default
+    the observed 95th percentile latency, a duplicate read is sent and the first response is returned.
+    Duplicate reads are only sent while the request units they are estimated to cost stay within a budget.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        initial_delay: float = 0.05,
+        min_delay: float = 0.001,
+        max_extra_request_charge_ratio: float = 0.1,
+        min_samples: int = 20,
+        sample_size: int = 1000,
+        max_workers: int = 32,
+    ):
+        """
+        Creates a HedgingPolicy instance.
+        :param percentile: The latency percentile after which a duplicate read is sent.
+        :param initial_delay: The delay in seconds used until min_samples latencies, and at least one, have
+        been observed.
+        :param min_delay: The minimum delay in seconds.
+        :param max_extra_request_charge_ratio: The request units spent on duplicate reads, as a fraction of
+        the request units spent on reads.
+        :param min_samples: The number of reads observed before duplicate reads are sent. Duplicate reads are
+        never sent before the request charge of at least one read has been recorded.
+        :param sample_size: The number of recent read latencies the delay is calculated from.
+        :param max_workers: The number of threads that send reads.
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_extra_request_charge_ratio = max_extra_request_charge_ratio
+        self.min_samples = min_samples
+        self.read_count = 0
+        self.hedged_read_count = 0
+        self.read_request_charge = 0.0
+        self.hedged_request_charge = 0.0
+        self._latencies = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pycosmosdal-hedging"
+        )
+
+    @property
+    def delay(self) -> float:
+        """
+        The number of seconds to wait for a read before a duplicate read is sent.
+        :rtype: float
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if not latencies or len(latencies) < self.min_samples:
+            return self.initial_delay
+
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def execute(self, read_function: Callable[[], Any], timeout: float = None) -> Any:
+        """
+        Calls a read function and calls it again if it doesn't complete within the delay.
+        :param read_function: The function that reads from CosmosDb.
+        :param timeout: The number of seconds to wait for a response. If no response arrives in time,
+        an HTTPFailure with a 408 status code is raised.
+        :return: The result of the first read that succeeded.
+        :rtype: Any
+        """
+        start = time.perf_counter()
+        primary = self._executor.submit(read_function)
+        primary.add_done_callback(
+            lambda f: self._record_latency(f, time.perf_counter() - start)
+        )
+
+        delay = self.delay
+        futures = {primary}
+
+        if timeout is None or delay < timeout:
+            done, _ = wait(futures, timeout=delay)
+
+            if not done and self._try_reserve_hedge():
+                futures.add(self._executor.submit(read_function))
+
+        error = None
+
+        while futures:
+            remaining = (
+                None if timeout is None else timeout - (time.perf_counter() - start)
+            )
+
+            if remaining is not None and remaining <= 0:
+                break
+
+            done, futures = wait(
+                futures, timeout=remaining, return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+
+                error = error or future.exception()
+
+        if error and not futures:
+            raise error
+
+        raise HTTPFailure(
+            StatusCodes.REQUEST_TIMEOUT,
+            f"The read did not complete within {timeout} seconds.",
+        )
+
+    def record_request_charge(self, request_charge: float):
+        """
+        Records the request units charged for a read. The hedging budget is calculated from these charges.
+        :param request_charge: The request charge.
+        """
+        with self._lock:
+            self.read_count += 1
+            self.read_request_charge += request_charge
+
+    def close(self):
+        """
+        Shuts down the thread pool that sends reads. Reads in flight complete in the background.
+        """
+        self._executor.shutdown(wait=False)
+
+    def dispose(self):
+        """
+        Closes the policy. This method is called by Disposable on exit.
+        """
+        self.close()
+
+    def _try_reserve_hedge(self) -> bool:
+        """
+        Reserves the request units of a duplicate read if the budget allows it.
+        :return: True if a duplicate read can be sent.
+        :rtype: bool
+        """
+        with self._lock:
+            if not self.read_count or self.read_count < self.min_samples:
+                return False
+
+            estimated_request_charge = self.read_request_charge / self.read_count
+
+            if (
+                self.hedged_request_charge + estimated_request_charge
+                > self.read_request_charge * self.max_extra_request_charge_ratio
+            ):
+                return False
+
+            self.hedged_read_count += 1
+            self.hedged_request_charge += estimated_request_charge
+            return True
+
+    def _record_latency(self, future, latency: float):
+        if future.exception() is None:
+            with self._lock:
+                self._latencies.append(latency)
@@ -0,0 +1,467 @@
+"""
+The HotPartitionAnalyzer class.
+"""
+import json
+import random
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Tuple
+
+from azure.cosmos.http_constants import StatusCodes
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.diagnostics import OperationRecord
+from pycosmosdal.documentmanager import POINT_READ_QUERY_OPERATION, DocumentManager
+
+READ_OPERATIONS = frozenset(("ReadItem", "FetchNextBlock", POINT_READ_QUERY_OPERATION))
+WRITE_OPERATIONS = frozenset(("CreateItem", "UpsertItem", "ReplaceItem", "DeleteItem"))
+COUNT_QUERY = "SELECT COUNT(1) AS document_count FROM c"
+
+
+@dataclass
+class _DocumentCount:
+    """A row of the COUNT_QUERY results."""
+
+    document_count: int = 0
+
+
+class PartitionKeyStatistics:
+    """
+    The activity and size observed for a partition key value. A live operation that is analyzed stands for the
+    1 / sample_rate operations it was sampled from, and a document read by sample_documents() stands for the
+    documents of its partition key range that weren't read. The counts, charges and sizes are estimates when
+    estimated is True.
+    """
+
+    def __init__(self, partition_key: Any):
+        """
+        Creates a PartitionKeyStatistics instance.
+        :param partition_key: The partition key value.
+        """
+        self.partition_key = partition_key
+        self.read_count = 0
+        self.write_count = 0
+        self.read_request_charge = 0.0
+        self.write_request_charge = 0.0
+        self.throttled_count = 0
+        self.document_count = 0
+        self.document_bytes = 0
+        self.estimated = False
+
+    @property
+    def request_charge(self) -> float:
+        """
+        The request units charged for the reads and writes of the partition key.
+        :rtype: float
+        """
+        return self.read_request_charge + self.write_request_charge
+
+
+class HotPartitionReport:
+    """Ranks partition key values by the request units spent on them."""
+
+    def __init__(
+        self,
+        statistics: List[PartitionKeyStatistics],
+        unattributed_request_charge: float,
+    ):
+        """
+        Creates a HotPartitionReport instance.
+        :param statistics: The statistics of every observed partition key value.
+        :param unattributed_request_charge: The request units of operations that don't target a single partition
+        key, e.g. cross partition queries.
+        """
+        self.partition_keys = sorted(
+            statistics,
+            key=lambda s: (s.request_charge, s.throttled_count),
+            reverse=True,
+        )
+        self.unattributed_request_charge = unattributed_request_charge
+        self.read_skew = HotPartitionReport.get_skew(
+            [s.read_request_charge for s in statistics]
+        )
+        self.write_skew = HotPartitionReport.get_skew(
+            [s.write_request_charge for s in statistics]
+        )
+        self.size_skew = HotPartitionReport.get_skew(
+            [s.document_bytes for s in statistics]
+        )
+
+    def __str__(self) -> str:
+        lines = [
+            f"Partition keys: {len(self.partition_keys)}, read skew: {self.read_skew:.1f}, "
+            f"write skew: {self.write_skew:.1f}, size skew: {self.size_skew:.1f}, "
+            f"unattributed: {self.unattributed_request_charge:.1f} RU",
+        ]
+
+        for rank, s in enumerate(self.partition_keys, start=1):
+            lines.append(
+                f"{rank:>4}. {json.dumps(s.partition_key, default=str)}: {s.request_charge:.1f} RU "
+                f"(reads {s.read_count:.0f}/{s.read_request_charge:.1f} RU, writes {s.write_count:.0f}/"
+                f"{s.write_request_charge:.1f} RU, throttled {s.throttled_count:.0f}), "
+                f"{s.document_count} documents, {s.document_bytes} bytes"
+                f"{' (estimated)' if s.estimated else ''}"
+            )
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def get_skew(values: List[float]) -> float:
+        """
+        A helper method that gets the ratio of the largest value to the mean value. A skew of 1 means the values
+        are evenly spread.
+        :param values: The values, one per partition key.
+        :return: The skew, 0 if the values are all 0.
+        :rtype: float
+        """
+        total = sum(values)
+
+        if not total:
+            return 0.0
+
+        return max(values) / (total / len(values))
+
+
+class HotPartitionAnalyzer:
+    """
+    Finds the partition key values that receive a disproportionate share of a collection's request units, which
+    get throttled even while the collection as a whole is within its throughput.
+
+    The analyzer can be registered as a low overhead hook that samples live operations, fed a trace recorded by
+    an OperationRecorder, and can sample the collection's documents to estimate the size of each partition.
+    """
+
+    def __init__(
+        self,
+        document_manager: DocumentManager,
+        collection_id: str,
+        database_id: str,
+        partition_key_path: str,
+        **kwargs,
+    ):
+        """
+        Creates a HotPartitionAnalyzer instance.
+        :param document_manager: The DocumentManager used to sample documents. Its client is hooked by start().
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param partition_key_path: The partition key path of the collection, e.g. '/owner_id'.
+        :param kwargs: Analyzer options:
+            sample_rate: The fraction of live operations that are analyzed. Defaults to 0.1. The statistics of
+            the analyzed operations are scaled by 1 / sample_rate. Traces are always analyzed completely.
+        """
+        self.document_manager = document_manager
+        self.collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+        self.collection_id = collection_id
+        self.database_id = database_id
+        self.sample_rate = float(kwargs.get("sample_rate", 0.1))
+        self._partition_key_path = partition_key_path.strip("/").split("/")
+        self._statistics: Dict[Hashable, PartitionKeyStatistics] = {}
+        self._document_sizes: Dict[Hashable, Dict[str, Tuple[int, float]]] = {}
+        self._unattributed_request_charge = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, record: OperationRecord):
+        """
+        Analyzes a sample of the operations. This method is called by CosmosDbClient once the analyzer is started.
+        :param record: The OperationRecord.
+        """
+        if random.random() >= self.sample_rate or not record.targets(
+            self.collection_link
+        ):
+            return
+
+        if record.operation not in READ_OPERATIONS | WRITE_OPERATIONS:
+            return
+
+        self._add(
+            record.operation,
+            record.resource_link,
+            record.arguments,
+            record.keyword_arguments,
+            record.request_charge,
+            record.throttled,
+            record.result_size if record.operation == "ReadItem" else 0,
+            1 / self.sample_rate,
+        )
+
+    def start(self):
+        """
+        Starts sampling the operations of the document manager's client.
+        """
+        self.document_manager.client.add_listener(self)
+
+    def stop(self):
+        """
+        Stops sampling operations.
+        """
+        self.document_manager.client.remove_listener(self)
+
+    def dispose(self):
+        """
+        Stops sampling operations. This method is called by Disposable on exit.
+        """
+        self.stop()
+
+    def add_trace(self, entries: Iterable[dict]):
+        """
+        Analyzes the operations of a trace. The trace must have been recorded with arguments.
+        :param entries: The recorded operations, e.g. the operations returned by read_trace().
+        """
+        for entry in entries:
+            link = entry["resource_link"]
+
+            if entry["operation"] not in READ_OPERATIONS | WRITE_OPERATIONS or not (
+                link == self.collection_link
+                or link.startswith(f"{self.collection_link}/")
+            ):
+                continue
+
+            self._add(
+                entry["operation"],
+                link,
+                entry.get("arguments") or (),
+                entry.get("keyword_arguments") or {},
+                entry["request_charge"],
+                bool(entry["throttle_retry_count"])
+                or entry["status_code"] == StatusCodes.TOO_MANY_REQUESTS,
+                entry["result_size"] if entry["operation"] == "ReadItem" else 0,
+            )
+
+    def sample_documents(self, max_documents: int = 1000, max_item_count: int = 100):
+        """
+        Reads a sample of the documents of every partition key range to estimate the number of documents and
+        bytes stored under each partition key. The documents of a range that has more documents than its share
+        of the sample are counted, and each document read stands for range count / sample size documents.
+        Within a range the documents are read in feed order, so documents written recently are less likely to
+        be read.
+        :param max_documents: The maximum number of documents to read. It is split evenly across the ranges.
+        :param max_item_count: The number of documents read per request.
+        """
+        partition_key_ranges = CollectionManager(
+            self.document_manager.client
+        ).get_partition_key_ranges(self.collection_id, self.database_id)
+        range_max_documents = max(1, max_documents // max(1, len(partition_key_ranges)))
+
+        for partition_key_range in partition_key_ranges:
+            self._sample_partition_key_range(
+                partition_key_range["id"], range_max_documents, max_item_count
+            )
+
+    def get_report(self) -> HotPartitionReport:
+        """
+        Gets the hot partition key report.
+        :rtype: HotPartitionReport
+        """
+        with self._lock:
+            statistics = list(self._statistics.values())
+
+            for s in statistics:
+                sizes = self._document_sizes.get(
+                    HotPartitionAnalyzer._to_key(s.partition_key), {}
+                ).values()
+                s.document_count = round(sum(weight for _, weight in sizes))
+                s.document_bytes = round(sum(size * weight for size, weight in sizes))
+                s.estimated = s.estimated or any(weight != 1 for _, weight in sizes)
+
+            return HotPartitionReport(statistics, self._unattributed_request_charge)
+
+    def _sample_partition_key_range(
+        self, partition_key_range_id: str, max_documents: int, max_item_count: int
+    ):
+        """
+        Reads a sample of the documents of a partition key range and weights them by the share of the range
+        they stand for.
+        """
+        query_results = self.document_manager.get_documents(
+            self.collection_id,
+            self.database_id,
+            max_item_count=min(max_item_count, max_documents),
+            partition_key_range_id=partition_key_range_id,
+        )
+        sample = []
+
+        while len(sample) < max_documents:
+            documents = query_results.fetch_next()
+
+            if not documents:
+                break
+
+            sample.extend(
+                document.native_resource
+                for document in documents[: max_documents - len(sample)]
+            )
+
+        weight = 1.0
+
+        if sample and len(sample) == max_documents:
+            weight = self._count_partition_key_range(partition_key_range_id) / len(
+                sample
+            )
+
+        for native_document in sample:
+            self._set_document_size(
+                self._get_document_partition_key(native_document),
+                str(native_document["id"]),
+                len(json.dumps(native_document, default=str)),
+                weight,
+            )
+
+    def _count_partition_key_range(self, partition_key_range_id: str) -> int:
+        """
+        Counts the documents of a partition key range.
+        :rtype: int
+        """
+        query_results = self.document_manager.query_documents(
+            self.collection_id,
+            self.database_id,
+            COUNT_QUERY,
+            partition_key_range_id=partition_key_range_id,
+            model_type=_DocumentCount,
+        )
+        document_count = 0
+        block = query_results.fetch_next()
+
+        # A range's count can be returned in parts, one per block.
+        while block:
+            document_count += sum(result.document_count for result in block)
+            block = query_results.fetch_next()
+
+        return document_count
+
+    def _add(
+        self,
+        operation: str,
+        resource_link: str,
+        arguments: tuple,
+        keyword_arguments: Mapping[str, Any],
+        request_charge: float,
+        throttled: bool,
+        result_size: int,
+        weight: float = 1.0,
+    ):
+        """
+        Attributes an operation to the partition key it targeted.
+        :param weight: The number of operations the operation stands for.
+        """
+        found, partition_key = self._get_operation_partition_key(
+            operation, arguments, keyword_arguments
+        )
+
+        if not found:
+            with self._lock:
+                self._unattributed_request_charge += request_charge * weight
+
+            return
+
+        statistics = self._get_statistics(partition_key)
+
+        with self._lock:
+            if operation in WRITE_OPERATIONS:
+                statistics.write_count += weight
+                statistics.write_request_charge += request_charge * weight
+            else:
+                statistics.read_count += weight
+                statistics.read_request_charge += request_charge * weight
+
+            statistics.throttled_count += int(throttled) * weight
+            statistics.estimated = statistics.estimated or weight != 1
+
+        if operation == "DeleteItem":
+            self._set_document_size(partition_key, resource_link.rsplit("/", 1)[-1], 0)
+        elif operation in WRITE_OPERATIONS and len(arguments) > 1:
+            document = arguments[1]
+            self._set_document_size(
+                partition_key,
+                str(document.get("id")),
+                len(json.dumps(document, default=str)),
+            )
+        elif result_size:
+            self._set_document_size(
+                partition_key, resource_link.rsplit("/", 1)[-1], result_size
+            )
+
+    def _get_operation_partition_key(
+        self, operation: str, arguments: tuple, keyword_arguments: Mapping[str, Any]
+    ) -> tuple:
+        """
+        Gets the partition key an operation targeted.
+        :return: A tuple. The first item is True if the operation targeted a single partition key, the second
+        item is the partition key value.
+        :rtype: tuple
+        """
+        if operation in ("CreateItem", "UpsertItem", "ReplaceItem"):
+            if len(arguments) > 1 and isinstance(arguments[1], dict):
+                return True, self._get_document_partition_key(arguments[1])
+
+            return False, None
+
+        if operation == "FetchNextBlock":
+            options = arguments[2] if len(arguments) > 2 else None
+        else:
+            options = arguments[1] if len(arguments) > 1 else None
+            options = options or keyword_arguments.get("options")
+
+        if options and "partitionKey" in options:
+            return True, options["partitionKey"]
+
+        return False, None
+
+    def _get_document_partition_key(self, document: dict) -> Any:
+        """
+        Gets the partition key value of a document.
+        :rtype: Any
+        """
+        value = document
+
+        for key in self._partition_key_path:
+            value = value.get(key) if isinstance(value, dict) else None
+
+        return value
+
+    def _get_statistics(self, partition_key: Any) -> PartitionKeyStatistics:
+        """
+        Gets the statistics of a partition key, creating them on first use.
+        :rtype: PartitionKeyStatistics
+        """
+        key = HotPartitionAnalyzer._to_key(partition_key)
+
+        with self._lock:
+            statistics = self._statistics.get(key)
+
+            if statistics is None:
+                statistics = self._statistics[key] = PartitionKeyStatistics(
+                    partition_key
+                )
+
+            return statistics
+
+    def _set_document_size(
+        self, partition_key: Any, document_id: str, size: int, weight: float = None
+    ):
+        """
+        Records the size of a document, or removes it when the size is 0.
+        :param weight: The number of documents the document stands for. When None, the weight a sample gave
+        the document is kept, and a document seen in an operation stands for itself.
+        """
+        self._get_statistics(partition_key)
+        key = HotPartitionAnalyzer._to_key(partition_key)
+
+        with self._lock:
+            sizes = self._document_sizes.setdefault(key, {})
+
+            if not size:
+                sizes.pop(document_id, None)
+            elif weight is None:
+                sizes[document_id] = (size, sizes.get(document_id, (0, 1.0))[1])
+            else:
+                sizes[document_id] = (size, weight)
+
+    @staticmethod
+    def _to_key(partition_key: Any) -> Hashable:
+        """
+        Gets a hashable key for a partition key value.
+        :rtype: Hashable
+        """
+        return json.dumps(partition_key, sort_keys=True, default=str)
@@ -0,0 +1,373 @@
+"""
+The IndexAdvisor class.
+"""
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.diagnostics import OperationRecord, QueryMetrics
+
+WRITE_OPERATIONS = frozenset(("CreateItem", "UpsertItem", "ReplaceItem"))
+FROM_PATTERN = re.compile(
+    r"\bFROM\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?(?!(?:WHERE|ORDER|JOIN|GROUP|OFFSET)\b)([A-Za-z_]\w*))?",
+    re.IGNORECASE,
+)
+WHERE_PATTERN = re.compile(
+    r"\bWHERE\b(.*?)(?:\bORDER\s+BY\b|\bGROUP\s+BY\b|\bOFFSET\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+ORDER_BY_PATTERN = re.compile(
+    r"\bORDER\s+BY\b(.*?)(?:\bOFFSET\b|$)", re.IGNORECASE | re.DOTALL
+)
+PROPERTY_PATTERN = r"\b{alias}((?:\.[A-Za-z_]\w*|\[\s*[\"'][^\"']+[\"']\s*\])+)"
+COMPARISON_PATTERN = r"\s*(=|!=|<>|<=|>=|<|>|\bBETWEEN\b)"
+ACCESSOR_PATTERN = re.compile(r"\.([A-Za-z_]\w*)|\[\s*[\"']([^\"']+)[\"']\s*\]")
+
+
+class IndexRecommendation:
+    """A change to a collection's indexing policy recommended by an IndexAdvisor."""
+
+    def __init__(
+        self,
+        kind: str,
+        paths: List[Any],
+        estimated_request_charge_savings: float,
+        queries: List[str] = None,
+    ):
+        """
+        Creates an IndexRecommendation instance.
+        :param kind: 'composite_index' or 'excluded_path'.
+        :param paths: The composite index, a list of dicts that contain a path and an order, or a list with the
+        excluded path. Both are in the format CollectionManager.create_collection() accepts.
+        :param estimated_request_charge_savings: The request units the recorded operations are estimated to
+        have saved with the change.
+        :param queries: The recorded queries a composite index would serve.
+        """
+        self.kind = kind
+        self.paths = paths
+        self.estimated_request_charge_savings = estimated_request_charge_savings
+        self.queries = queries or []
+
+    def __repr__(self) -> str:
+        return (
+            f"IndexRecommendation({self.kind} {self.paths}, saves ~"
+            f"{self.estimated_request_charge_savings:.1f} RU)"
+        )
+
+
+class IndexAdvisor:
+    """
+    Recommends indexing policy changes from the recorded queries and writes of a collection. Register the
+    advisor as a listener and send queries with the populate_query_metrics option. Queries sent without it
+    still keep the properties they read from being recommended as excluded paths:
+
+        advisor = IndexAdvisor("collection", "database")
+        client.add_listener(advisor)
+
+    A composite index is recommended for queries that filter and sort on several properties when the query
+    metrics show that CosmosDb retrieved documents the query didn't return, and the estimated savings are the
+    request units spent on those documents. An excluded path is recommended for top level properties that no
+    recorded query reads, and the estimated savings are the share of the write request units spent on indexing
+    them, assuming the charge of a write grows with the number of indexed values. The recommendations are only
+    as good as the recorded workload is complete.
+    """
+
+    def __init__(self, collection_id: str, database_id: str, **kwargs):
+        """
+        Creates an IndexAdvisor instance.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Advisor options:
+            indexing_policy: The collection's current CosmosDb indexing policy, e.g. the indexingPolicy of the
+            collection returned by CollectionManager.get_collection(). The composite indexes and excluded paths
+            it already has aren't recommended.
+
+            partition_key_path: The partition key path of the collection, e.g. '/owner_id'. The partition key
+            is never recommended as an excluded path.
+        """
+        self.collection_link = CollectionManager.get_collection_link(
+            collection_id, database_id
+        )
+        indexing_policy = kwargs.get("indexing_policy") or {}
+        self._existing_composite_indexes = [
+            [(index["path"], index.get("order", "ascending")) for index in composite]
+            for composite in indexing_policy.get("compositeIndexes", [])
+        ]
+        self._existing_excluded_paths = {
+            path["path"] for path in indexing_policy.get("excludedPaths", [])
+        }
+        partition_key_path = kwargs.get("partition_key_path")
+        self._partition_key_property = (
+            partition_key_path.strip("/").split("/")[0] if partition_key_path else None
+        )
+        self._queries: Dict[str, dict] = {}
+        self._queried_properties = set()
+        self._property_request_charges: Dict[str, float] = {}
+        self._container_properties = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, record: OperationRecord):
+        """
+        Records the queries and writes of the collection. This method is called by CosmosDbClient.
+        :param record: The OperationRecord.
+        """
+        if not record.targets(self.collection_link) or record.status_code is not None:
+            return
+
+        arguments = record.arguments or ()
+
+        if record.operation == "FetchNextBlock" and len(arguments) > 1:
+            query_spec = arguments[1]
+            query_metrics = record.query_metrics
+
+            # Every query reads its properties, but only the pages with query metrics estimate the savings.
+            if isinstance(query_spec, dict):
+                self.add_query(
+                    query_spec["query"], [query_metrics] if query_metrics else []
+                )
+        elif record.operation in WRITE_OPERATIONS and len(arguments) > 1:
+            if isinstance(arguments[1], dict):
+                self.add_write(arguments[1], record.request_charge)
+
+    def add_query(self, query: str, query_metrics: List[QueryMetrics]):
+        """
+        Records the pages of a query, e.g. the DocumentQueryResults.query_metrics of a query.
+        :param query: The SQL query.
+        :param query_metrics: The metrics of the query's pages. An empty list records the properties the query
+        reads without estimating savings.
+        """
+        _, filters, order_by, properties = IndexAdvisor.parse_query(query)
+        composite_index = IndexAdvisor._get_composite_index(filters, order_by)
+        wasted_request_charge = sum(
+            m.request_charge * m.wasted_ratio for m in query_metrics
+        )
+
+        with self._lock:
+            self._queried_properties.update(properties)
+
+            if composite_index:
+                statistics = self._queries.setdefault(
+                    query, dict(composite_index=composite_index, savings=0.0)
+                )
+                statistics["savings"] += wasted_request_charge
+
+    def add_write(self, document: dict, request_charge: float):
+        """
+        Records a write, spreading its request charge over the document's top level properties by their number
+        of indexed values.
+        :param document: The written document.
+        :param request_charge: The request charge of the write.
+        """
+        value_counts = {
+            key: IndexAdvisor._count_values(value)
+            for key, value in document.items()
+            if key != "id" and not key.startswith("_")
+        }
+        # The id is always indexed.
+        total = sum(value_counts.values()) + 1
+
+        with self._lock:
+            for key, value_count in value_counts.items():
+                self._property_request_charges[key] = (
+                    self._property_request_charges.get(key, 0.0)
+                    + request_charge * value_count / total
+                )
+
+                if isinstance(document[key], (dict, list)):
+                    self._container_properties.add(key)
+
+    def get_recommendations(self) -> List[IndexRecommendation]:
+        """
+        Gets the recommended indexing policy changes.
+        :return: The recommendations, ranked by their estimated request unit savings.
+        :rtype: List[IndexRecommendation]
+        """
+        recommendations = []
+
+        with self._lock:
+            composite_indexes: Dict[Tuple, IndexRecommendation] = {}
+
+            for query, statistics in self._queries.items():
+                key = tuple(statistics["composite_index"])
+
+                if not statistics["savings"] or self._has_composite_index(key):
+                    continue
+
+                recommendation = composite_indexes.get(key)
+
+                if recommendation is None:
+                    recommendation = composite_indexes[key] = IndexRecommendation(
+                        "composite_index",
+                        [dict(path=path, order=order) for path, order in key],
+                        0.0,
+                    )
+
+                recommendation.estimated_request_charge_savings += statistics["savings"]
+                recommendation.queries.append(query)
+
+            recommendations.extend(composite_indexes.values())
+
+            if self._queries or self._queried_properties:
+                for key, request_charge in self._property_request_charges.items():
+                    path = (
+                        f"/{key}/*"
+                        if key in self._container_properties
+                        else f"/{key}/?"
+                    )
+
+                    if (
+                        key in self._queried_properties
+                        or key == self._partition_key_property
+                        or path in self._existing_excluded_paths
+                        or not request_charge
+                    ):
+                        continue
+
+                    recommendations.append(
+                        IndexRecommendation("excluded_path", [path], request_charge)
+                    )
+
+        return sorted(
+            recommendations,
+            key=lambda r: r.estimated_request_charge_savings,
+            reverse=True,
+        )
+
+    def _has_composite_index(self, composite_index: Tuple) -> bool:
+        """
+        Checks if the indexing policy has a composite index, or the composite index with every order reversed.
+        :rtype: bool
+        """
+        reversed_index = [
+            (path, "descending" if order == "ascending" else "ascending")
+            for path, order in composite_index
+        ]
+
+        return any(
+            existing in (list(composite_index), reversed_index)
+            for existing in self._existing_composite_indexes
+        )
+
+    @staticmethod
+    def parse_query(query: str) -> tuple:
+        """
+        A helper method that finds the properties a query filters, sorts and reads.
+        :param query: The SQL query.
+        :return: A tuple of the root alias, the filters as (path, operator) tuples, the sort order as
+        (path, order) tuples and the set of top level properties the query references.
+        :rtype: tuple
+        """
+        match = FROM_PATTERN.search(query)
+
+        if match is None:
+            return None, [], [], set()
+
+        alias = re.escape(match.group(2) or match.group(1))
+        property_pattern = PROPERTY_PATTERN.format(alias=alias)
+        filters = []
+        order_by = []
+        where_match = WHERE_PATTERN.search(query)
+
+        if where_match:
+            for property_match in re.finditer(
+                property_pattern + COMPARISON_PATTERN,
+                where_match.group(1),
+                re.IGNORECASE,
+            ):
+                operator = property_match.group(2).upper()
+                filters.append(
+                    (
+                        IndexAdvisor._to_path(property_match.group(1)),
+                        "=" if operator == "=" else "range",
+                    )
+                )
+
+        order_by_match = ORDER_BY_PATTERN.search(query)
+
+        if order_by_match:
+            for item in order_by_match.group(1).split(","):
+                property_match = re.match(
+                    r"\s*" + property_pattern + r"(?:\s+(ASC|DESC))?\s*$",
+                    item,
+                    re.IGNORECASE,
+                )
+
+                if property_match:
+                    order = (property_match.group(2) or "ASC").upper()
+                    order_by.append(
+                        (
+                            IndexAdvisor._to_path(property_match.group(1)),
+                            "descending" if order == "DESC" else "ascending",
+                        )
+                    )
+
+        properties = {
+            IndexAdvisor._to_path(m.group(1)).split("/")[1]
+            for m in re.finditer(property_pattern, query)
+        }
+
+        return match.group(2) or match.group(1), filters, order_by, properties
+
+    @staticmethod
+    def _get_composite_index(
+        filters: List[Tuple[str, str]], order_by: List[Tuple[str, str]]
+    ) -> List[Tuple[str, str]]:
+        """
+        Gets the composite index that serves a query: the equality filters, then the range filters, then the
+        sort order.
+        :return: The composite index as (path, order) tuples, or None if the query doesn't need one.
+        :rtype: List[Tuple[str, str]]
+        """
+        order_by_paths = [path for path, _ in order_by]
+        equality_paths = [path for path, operator in filters if operator == "="]
+        range_paths = [
+            path
+            for path, operator in filters
+            if operator != "=" and path not in equality_paths
+        ]
+
+        if order_by:
+            leading_paths = [
+                path
+                for path in dict.fromkeys(equality_paths + range_paths)
+                if path not in order_by_paths
+            ]
+            composite_index = [(path, "ascending") for path in leading_paths] + order_by
+        elif range_paths:
+            composite_index = [
+                (path, "ascending")
+                for path in dict.fromkeys(equality_paths + range_paths[:1])
+            ]
+        else:
+            return None
+
+        if len(composite_index) < 2:
+            return None
+
+        return composite_index
+
+    @staticmethod
+    def _to_path(accessor: str) -> str:
+        """
+        A helper method that converts a property accessor, e.g. .address["city"], to a path, e.g. /address/city.
+        :rtype: str
+        """
+        return "/" + "/".join(
+            name or quoted_name
+            for name, quoted_name in ACCESSOR_PATTERN.findall(accessor)
+        )
+
+    @staticmethod
+    def _count_values(value: Any) -> int:
+        """
+        A helper method that counts the scalar values CosmosDb indexes in a property value.
+        :rtype: int
+        """
+        if isinstance(value, dict):
+            return sum(IndexAdvisor._count_values(v) for v in value.values())
+
+        if isinstance(value, list):
+            return sum(IndexAdvisor._count_values(v) for v in value)
+
+        return 1
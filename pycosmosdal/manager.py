@@ -1,4 +1,7 @@
 from abc import ABC
+from typing import Any, Generator
+
+from azure.cosmos.query_iterable import QueryIterable
 
 from pycosmosdal.cosmosdbclient import CosmosDbClient
 
@@ -20,3 +23,55 @@ class Manager(ABC):
         :param client: The client that is responsible for issuing commands to CosmosDb.
         """
         self.client = client
+
+    def _execute(self, operation: str, resource_link: str, *args, **kwargs) -> Any:
+        """
+        Calls a method of the native client through CosmosDbClient.execute() so the client's
+        listeners are notified.
+        :param operation: The name of the native client method, e.g. 'ReadItem'.
+        :param resource_link: The link of the resource the operation targets.
+        :param args: The positional arguments passed to the method.
+        :param kwargs: The keyword arguments passed to the method.
+        :return: The method's return value.
+        :rtype: Any
+        """
+        return self.client.execute(
+            operation,
+            resource_link,
+            getattr(self.client.native_client, operation),
+            *args,
+            **kwargs,
+        )
+
+    def _fetch_all(
+        self,
+        operation: str,
+        resource_link: str,
+        query_iterable: QueryIterable,
+        timeout: float = None,
+        arguments: tuple = (),
+    ) -> Generator[dict, None, None]:
+        """
+        Iterates a QueryIterable block by block through CosmosDbClient.execute().
+        :param operation: The name of the operation, e.g. 'ReadContainers'.
+        :param resource_link: The link of the resource the operation targets.
+        :param query_iterable: The QueryIterable.
+        :param timeout: The number of seconds to wait for each block.
+        :param arguments: The arguments of the native client method that created the QueryIterable. They are
+        reported to the client's listeners.
+        :return: A generator that yields the CosmosDb resources.
+        :rtype: Generator[dict]
+        """
+        while True:
+            block = self.client.execute(
+                operation,
+                resource_link,
+                query_iterable.fetch_next_block,
+                timeout=timeout,
+                arguments=arguments,
+            )
+
+            if not block:
+                return
+
+            yield from block
@@ -0,0 +1,528 @@
+"""
+The CollectionMirror class.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import StatusCodes
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.decoding import get_decoder
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.errors import DocumentError
+from pycosmosdal.models import Document
+
+POLL_QUERY = "SELECT * FROM c WHERE c._ts >= @ts"
+
+_MISSING = object()
+
+
+class CollectionMirror:
+    """
+    Keeps an in-memory copy of a small collection, e.g. tenants or price lists, and serves reads from it
+    without a round trip. The whole collection is read once, then the mirror polls for the documents whose _ts
+    is newer than the last poll and applies them. Declared fields are indexed in hash tables, so finding the
+    documents that have a value costs a dict lookup.
+
+    Reads are as stale as the last successful refresh, which the staleness property reports. A poll doesn't
+    see deleted documents, so the collection is read again every reload_interval seconds to drop them.
+    The returned documents are shared by every reader and must not be modified.
+    """
+
+    def __init__(
+        self,
+        document_manager: DocumentManager,
+        collection_id: str,
+        database_id: str,
+        **kwargs,
+    ):
+        """
+        Creates a CollectionMirror instance. The collection is read by a background thread, or by the first
+        read if poll_interval is None.
+        :param document_manager: The DocumentManager that reads the documents.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param kwargs: Mirror options:
+            indexes: The fields that find() looks documents up by, e.g. ["tenant_id", "address.city"].
+            Documents whose value is a list or a dict aren't indexed.
+
+            partition_key_path: The partition key path of the collection, e.g. '/owner_id'. Documents are keyed
+            by their id and partition key. By default the collection is read to find it.
+
+            poll_interval: The number of seconds between polls. Defaults to 10. When set to None, the mirror
+            is only refreshed when refresh() is called or when a read finds it staler than max_staleness.
+
+            reload_interval: The number of seconds between reads of the whole collection. Defaults to 300.
+            When set to None, the collection is read once and deleted documents are never dropped.
+
+            max_staleness: The number of seconds after which a read refreshes the mirror before it's served,
+            raising a DocumentError if the refresh fails. By default stale reads are served.
+
+            clock_skew: The number of seconds polls overlap with the previous refresh, to allow for clock skew
+            between the client and CosmosDb and for writes in flight during a refresh. Defaults to 5.
+
+            max_item_count: The number of documents read per request. Defaults to 1000.
+
+            model_type: A dataclass the documents are decoded into instead of Document instances. Documents are
+            decoded once, when they're read from CosmosDb. See get_decoder().
+
+            validate_model: When set to True, the types of the model's str, int, float and bool fields are
+            validated.
+        """
+        self.document_manager = document_manager
+        self.collection_id = collection_id
+        self.database_id = database_id
+        self.indexes = list(kwargs.get("indexes") or [])
+        self.poll_interval = kwargs.get("poll_interval", 10.0)
+        self.reload_interval = kwargs.get("reload_interval", 300.0)
+        self.max_staleness = kwargs.get("max_staleness")
+        self.clock_skew = int(kwargs.get("clock_skew", 5))
+        self.max_item_count = int(kwargs.get("max_item_count") or 1000)
+        self.last_refreshed: float = None
+        self.last_error: Exception = None
+        self.poll_count = 0
+        self.reload_count = 0
+
+        model_type = kwargs.get("model_type")
+        self._decoder = (
+            get_decoder(model_type, bool(kwargs.get("validate_model")))
+            if model_type
+            else None
+        )
+        partition_key_path = kwargs.get("partition_key_path")
+        self._partition_key_path = (
+            partition_key_path.strip("/").split("/") if partition_key_path else None
+        )
+        self._index_paths = {field: field.split(".") for field in self.indexes}
+        self._documents: Dict[Tuple[str, str], tuple] = {}
+        self._ids: Dict[str, Dict[Tuple[str, str], tuple]] = {}
+        self._index_tables: Dict[str, Dict[Any, Dict[Tuple[str, str], tuple]]] = {
+            field: {} for field in self.indexes
+        }
+        self._since = 0
+        self._last_reloaded: float = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = None
+
+        if self.poll_interval is not None:
+            self._thread = threading.Thread(
+                target=self._run, name="pycosmosdal-mirror-poll", daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def staleness(self) -> float:
+        """
+        The number of seconds since the last successful refresh started, or None if the collection hasn't been
+        read yet. Writes committed since then may be missing from the mirror.
+        :rtype: float
+        """
+        last_refreshed = self.last_refreshed
+
+        if last_refreshed is None:
+            return None
+
+        return max(0.0, time.time() - last_refreshed)
+
+    def __len__(self) -> int:
+        self._refresh_if_stale()
+        return len(self._documents)
+
+    def get(self, document_id: Any, partition_key: Any = None) -> Any:
+        """
+        Gets a document by its id.
+        :param document_id: The document id.
+        :param partition_key: The partition key of the document. It's only needed when several partitions have
+        a document with the id.
+        :return: The Document or model instance, or None if the mirror has no such document.
+        :rtype: Any
+        """
+        self._refresh_if_stale()
+
+        if partition_key is not None and self._partition_key_path:
+            entry = self._documents.get((str(document_id), repr(partition_key)))
+            return entry[1] if entry else None
+
+        with self._lock:
+            entries = list(self._ids.get(str(document_id), {}).values())
+
+        if not entries:
+            return None
+
+        if len(entries) > 1:
+            raise ValueError(
+                f"Several documents have the id {document_id}, pass their partition key to tell them apart."
+            )
+
+        return entries[0][1]
+
+    def find(self, field: str, value: Any) -> List[Any]:
+        """
+        Finds the documents that have a value in an indexed field.
+        :param field: The field, one of the indexes option.
+        :param value: The value.
+        :return: The Document or model instances.
+        :rtype: List[Any]
+        """
+        if field not in self._index_paths:
+            raise ValueError(f"The mirror has no index on {field}.")
+
+        key = CollectionMirror._get_index_key(value)
+
+        if key is None:
+            return []
+
+        self._refresh_if_stale()
+
+        with self._lock:
+            return [
+                entry[1] for entry in self._index_tables[field].get(key, {}).values()
+            ]
+
+    def find_one(self, field: str, value: Any) -> Any:
+        """
+        Finds a document that has a value in an indexed field.
+        :param field: The field, one of the indexes option.
+        :param value: The value.
+        :return: The Document or model instance, or None if no document has the value.
+        :rtype: Any
+        """
+        documents = self.find(field, value)
+        return documents[0] if documents else None
+
+    def get_documents(self) -> List[Any]:
+        """
+        Gets every document in the mirror.
+        :return: The Document or model instances.
+        :rtype: List[Any]
+        """
+        self._refresh_if_stale()
+
+        with self._lock:
+            return [entry[1] for entry in self._documents.values()]
+
+    def refresh(self) -> int:
+        """
+        Applies the documents written since the last refresh, or reads the whole collection again if it was
+        never read or reload_interval has elapsed.
+        :return: The number of documents added or changed, or the number of documents read by a reload.
+        :rtype: int
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def close(self):
+        """
+        Stops the background polls.
+        """
+        self._closed.set()
+
+        if self._thread:
+            self._thread.join()
+
+    def dispose(self):
+        """
+        Closes the mirror. This method is called by Disposable on exit.
+        """
+        self.close()
+
+    def _run(self):
+        """
+        The background thread that refreshes the mirror. Any error, e.g. a DocumentError, a connection error
+        or the ValueError of a document that fails validation, is stored in last_error and the thread keeps
+        polling, while the reads are served from the mirror.
+        """
+        while not self._closed.is_set():
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+            self._closed.wait(self.poll_interval)
+
+    def _refresh_if_stale(self):
+        """
+        Refreshes the mirror before a read if it was never read or is staler than max_staleness. Concurrent
+        readers wait for a single refresh.
+        """
+        last_refreshed = self.last_refreshed
+
+        if last_refreshed is not None and (
+            self.max_staleness is None
+            or time.time() - last_refreshed <= self.max_staleness
+        ):
+            return
+
+        with self._refresh_lock:
+            if self.last_refreshed == last_refreshed:
+                self._refresh()
+
+    def _refresh(self) -> int:
+        """
+        Polls or reloads the mirror. The caller holds the refresh lock.
+        :rtype: int
+        """
+        if self._last_reloaded is None or (
+            self.reload_interval is not None
+            and time.monotonic() - self._last_reloaded >= self.reload_interval
+        ):
+            return self._reload()
+
+        return self._poll()
+
+    def _reload(self) -> int:
+        """
+        Reads the whole collection into new tables and swaps them in, so readers never see a partial read.
+        :rtype: int
+        """
+        if self._partition_key_path is None:
+            self._partition_key_path = self._read_partition_key_path()
+
+        started, reloaded = time.time(), time.monotonic()
+        documents: Dict[Tuple[str, str], tuple] = {}
+        ids: Dict[str, Dict[Tuple[str, str], tuple]] = {}
+        index_tables = {field: {} for field in self.indexes}
+        max_ts = 0
+
+        query_results = self.document_manager.get_documents(
+            self.collection_id, self.database_id, max_item_count=self.max_item_count
+        )
+        block = query_results.fetch_next()
+
+        while block:
+            for document in block:
+                native_document = document.native_resource
+                max_ts = max(max_ts, native_document.get("_ts", 0))
+                self._add(
+                    (native_document, self._decode(document)),
+                    documents,
+                    ids,
+                    index_tables,
+                )
+
+            block = query_results.fetch_next()
+
+        with self._lock:
+            self._documents = documents
+            self._ids = ids
+            self._index_tables = index_tables
+
+        self._set_since(started, max_ts)
+        self._last_reloaded = reloaded
+        self.last_refreshed = started
+        self.reload_count += 1
+        return len(documents)
+
+    def _poll(self) -> int:
+        """
+        Reads the documents written since the last refresh and applies the ones that changed.
+        :rtype: int
+        """
+        started = time.time()
+        changed_count = 0
+        max_ts = 0
+
+        query_results = self.document_manager.query_documents(
+            self.collection_id,
+            self.database_id,
+            POLL_QUERY,
+            [dict(name="@ts", value=self._since)],
+            max_item_count=self.max_item_count,
+            enable_cross_partition_query=True,
+            point_read=False,
+        )
+        block = query_results.fetch_next()
+
+        while block:
+            with self._lock:
+                for document in block:
+                    native_document = document.native_resource
+                    max_ts = max(max_ts, native_document.get("_ts", 0))
+                    document_key = self._get_key(native_document)
+                    entry = self._documents.get(document_key)
+
+                    if entry and entry[0].get("_etag") == native_document.get("_etag"):
+                        continue
+
+                    if entry:
+                        self._remove(
+                            document_key,
+                            entry,
+                            self._documents,
+                            self._ids,
+                            self._index_tables,
+                        )
+
+                    self._add(
+                        (native_document, self._decode(document)),
+                        self._documents,
+                        self._ids,
+                        self._index_tables,
+                    )
+                    changed_count += 1
+
+            block = query_results.fetch_next()
+
+        self._set_since(started, max_ts)
+        self.last_refreshed = started
+        self.poll_count += 1
+        return changed_count
+
+    def _set_since(self, started: float, max_ts: int):
+        """
+        Sets the _ts the next poll starts from. The poll overlaps the refresh that just completed, since a
+        document written while the refresh was running may have a _ts older than the newest document it read.
+        """
+        since = int(started) - self.clock_skew
+
+        if max_ts:
+            since = min(since, max_ts)
+
+        self._since = max(self._since, since)
+
+    def _decode(self, document: Document) -> Any:
+        """
+        Decodes a document into the value the reads return.
+        :rtype: Any
+        """
+        if self._decoder:
+            return self._decoder(document.native_resource)
+
+        return document
+
+    def _add(
+        self,
+        entry: Tuple[dict, Any],
+        documents: Dict[Tuple[str, str], tuple],
+        ids: Dict[str, Dict[Tuple[str, str], tuple]],
+        index_tables: Dict[str, Dict[Any, Dict[Tuple[str, str], tuple]]],
+    ):
+        """
+        Adds a document to the tables.
+        :param entry: A tuple of the CosmosDb document and the value the reads return.
+        """
+        native_document = entry[0]
+        document_key = self._get_key(native_document)
+        documents[document_key] = entry
+        ids.setdefault(document_key[0], {})[document_key] = entry
+
+        for field, path in self._index_paths.items():
+            key = CollectionMirror._get_index_key(
+                CollectionMirror._get_value(native_document, path)
+            )
+
+            if key is not None:
+                index_tables[field].setdefault(key, {})[document_key] = entry
+
+    def _remove(
+        self,
+        document_key: Tuple[str, str],
+        entry: Tuple[dict, Any],
+        documents: Dict[Tuple[str, str], tuple],
+        ids: Dict[str, Dict[Tuple[str, str], tuple]],
+        index_tables: Dict[str, Dict[Any, Dict[Tuple[str, str], tuple]]],
+    ):
+        """
+        Removes a document from the tables.
+        """
+        native_document = entry[0]
+        del documents[document_key]
+        CollectionMirror._discard(ids, document_key[0], document_key)
+
+        for field, path in self._index_paths.items():
+            key = CollectionMirror._get_index_key(
+                CollectionMirror._get_value(native_document, path)
+            )
+
+            if key is not None:
+                CollectionMirror._discard(index_tables[field], key, document_key)
+
+    def _read_partition_key_path(self) -> List[str]:
+        """
+        Reads the partition key path of the collection.
+        :return: The keys of the path, or an empty list if the collection isn't partitioned.
+        :rtype: List[str]
+        """
+        collection = CollectionManager(self.document_manager.client).get_collection(
+            self.collection_id, self.database_id
+        )
+
+        if collection is None:
+            raise DocumentError(
+                HTTPFailure(
+                    StatusCodes.NOT_FOUND,
+                    f"The collection {self.collection_id} wasn't found.",
+                )
+            )
+
+        partition_key_paths = collection.native_resource.get("partitionKey", {}).get(
+            "paths", []
+        )
+        return (
+            partition_key_paths[0].strip("/").split("/") if partition_key_paths else []
+        )
+
+    def _get_key(self, document: dict) -> Tuple[str, str]:
+        """
+        Gets the key that identifies a document: its id and partition key.
+        :rtype: Tuple[str, str]
+        """
+        partition_key = None
+
+        if self._partition_key_path:
+            partition_key = document
+
+            for key in self._partition_key_path:
+                partition_key = (
+                    partition_key.get(key) if isinstance(partition_key, dict) else None
+                )
+
+        return str(document["id"]), repr(partition_key)
+
+    @staticmethod
+    def _discard(table: Dict[Any, dict], key: Any, document_key: Tuple[str, str]):
+        """
+        A helper method that removes a document from a hash table, and its value once no document has it.
+        """
+        entries = table.get(key)
+
+        if entries is not None:
+            entries.pop(document_key, None)
+
+            if not entries:
+                del table[key]
+
+    @staticmethod
+    def _get_value(document: dict, path: List[str]) -> Any:
+        """
+        A helper method that gets the value of a field path.
+        :return: The value, or a sentinel if the path doesn't exist.
+        :rtype: Any
+        """
+        value = document
+
+        for key in path:
+            if not isinstance(value, dict):
+                return _MISSING
+
+            value = value.get(key, _MISSING)
+
+        return value
+
+    @staticmethod
+    def _get_index_key(value: Any) -> Any:
+        """
+        A helper method that gets the hash table key of a value. Booleans are kept apart from the numbers they
+        equal in Python, since CosmosDb doesn't consider true equal to 1.
+        :return: The key, or None if the value is missing, a list or a dict.
+        :rtype: Any
+        """
+        if isinstance(value, (list, dict)) or value is _MISSING:
+            return None
+
+        return isinstance(value, bool), value
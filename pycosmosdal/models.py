@@ -1,13 +1,24 @@
 """
 Models serving as wrappers around CosmosDb resources.
 """
+import time
 from abc import ABC
-from typing import Any
+from typing import Any, Dict, List, Union
 
 from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import HttpHeaders, StatusCodes
 from azure.cosmos.query_iterable import QueryIterable
 
+from pycosmosdal.columnar import ColumnarBuilder
+from pycosmosdal.cosmosdbclient import CosmosDbClient
+from pycosmosdal.decoding import get_decoder
+from pycosmosdal.diagnostics import (
+    QUERY_METRICS_HEADER,
+    QueryMetrics,
+    get_request_charge,
+)
 from pycosmosdal.errors import DocumentError
+from pycosmosdal.pagesizing import AdaptivePageSizer
 
 
 class CosmosResource(ABC):
@@ -60,23 +71,202 @@ class Document(CosmosResource):
 
 class DocumentQueryResults:
     """Represents the results of a CosmosDb Document query.
-    This class is a wrapper around a QueryIterable."""
+    This class is a wrapper around a QueryIterable. When the results are read from a single partition
+    key range, the continuation attribute holds the continuation token of the last fetched block, or None
+    once all the results have been read. When the query was sent with query metrics enabled, the
+    query_metrics attribute lists the QueryMetrics of every fetched block. Once a block times out, the
+    results can't be read further, since the timed out fetch may still be running."""
 
-    def __init__(self, query_iterable: QueryIterable):
+    def __init__(
+        self,
+        query_iterable: QueryIterable,
+        client: CosmosDbClient = None,
+        resource_link: str = None,
+        codec: Any = None,
+        timeout: float = None,
+        operation: str = "FetchNextBlock",
+        arguments: tuple = (),
+        page_sizer: AdaptivePageSizer = None,
+        feed_options: dict = None,
+        model_type: type = None,
+        validate_model: bool = False,
+    ):
         """
         Creates a DocumentQueryResults instance.
         :param query_iterable: The CosmosDb QueryIterable to wrap.
+        :param client: The client whose listeners are notified when a block of documents is fetched.
+        :param resource_link: The link of the queried collection.
+        :param codec: An optional codec, e.g. a FieldCompressionCodec, that decodes the fetched documents.
+        :param timeout: The number of seconds to wait for each block of documents. Requires a client.
+        :param operation: The operation name reported to the client's listeners when a block is fetched.
+        :param arguments: The operation arguments reported to the client's listeners, e.g. the collection link,
+        query spec and options of a query.
+        :param page_sizer: An optional AdaptivePageSizer that picks the size of each block. Requires a client.
+        :param feed_options: The feed options the query iterable was created with. The page sizer sets their
+        maxItemCount before each block is fetched, and their populateQueryMetrics option enables query metrics.
+        :param model_type: An optional dataclass that fetch_next() decodes the documents into instead of
+        Document instances. See get_decoder().
+        :param validate_model: When set to True, the types of the model's str, int, float and bool fields
+        are validated.
         """
         self._query_iterable = query_iterable
+        self._client = client
+        self._resource_link = resource_link
+        self._codec = codec
+        self._timeout = timeout
+        self._operation = operation
+        self._arguments = arguments
+        self._feed_options = feed_options
+        self.page_sizer = page_sizer
+        self.continuation = None
+        self.query_metrics: List[QueryMetrics] = []
+        self._decoder = get_decoder(model_type, validate_model) if model_type else None
+        self._timed_out = False
 
     def fetch_next(self) -> list:
         """
         Gets the next block of documents from the query result.
-        :return: The list of results. If all the results have been read,
-        a zero length list is returned.
+        :return: The list of results, Document instances or instances of the model type. If all the results have
+        been read, a zero length list is returned.
         :rtype: list
         """
+        if self._decoder:
+            return [self._decoder(d) for d in self._fetch_next_block()]
+
+        return [Document(d) for d in self._fetch_next_block()]
+
+    def to_columns(
+        self, fields: Union[Dict[str, str], List[str]], **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Reads the remaining results into columns, one per field path. The blocks are appended to the columns
+        as they are fetched, without creating Document instances.
+        :param fields: The field paths to materialize, mapped to their column type: 'float', 'int', 'bool' or
+        'str'. See ColumnarBuilder.
+        :param kwargs: Materialization options:
+            null_handling: 'fill', 'skip' or 'raise'. Defaults to 'fill'.
+
+            fill_values: A dict of fill values by field path.
+
+            backend: 'numpy' or 'array'. Defaults to 'numpy' when NumPy is installed.
+        :return: A dict of columns by field path.
+        :rtype: Dict[str, Any]
+        """
+        builder = ColumnarBuilder(fields, **kwargs)
+        block = self._fetch_next_block()
+
+        while block:
+            builder.append(block)
+            block = self._fetch_next_block()
+
+        return builder.build()
+
+    def _fetch_next_block(self) -> list:
+        """
+        Gets the next block of decoded CosmosDb documents.
+        :rtype: list
+        """
+        if self._timed_out:
+            raise DocumentError(
+                HTTPFailure(
+                    StatusCodes.REQUEST_TIMEOUT,
+                    "An earlier block of the query timed out, run the query again to read its results.",
+                )
+            )
+
+        if self.page_sizer and self._client:
+            return self._fetch_next_sized_block()
+
         try:
-            return [Document(d) for d in self._query_iterable.fetch_next_block()]
+            if self._client:
+                block = self._client.execute(
+                    self._operation,
+                    self._resource_link,
+                    self._query_iterable.fetch_next_block,
+                    timeout=self._timeout,
+                    arguments=self._arguments,
+                )
+                self._add_query_metrics(
+                    self._client.native_client.last_response_headers
+                )
+            else:
+                block = self._query_iterable.fetch_next_block()
+
+            if self._codec:
+                return [self._codec.decode(d) for d in block]
+
+            return block
         except HTTPFailure as e:
+            self._check_timed_out(e)
             raise DocumentError(e)
+
+    def _fetch_next_sized_block(self) -> list:
+        """
+        Gets the next block of decoded CosmosDb documents with the page size picked by the page sizer, and
+        reports the block's duration, request charge, size and throttling to the page sizer.
+        :rtype: list
+        """
+        self.page_sizer.wait()
+        self._feed_options["maxItemCount"] = self.page_sizer.page_size
+        start = time.perf_counter()
+
+        try:
+            block = self._client.execute(
+                self._operation,
+                self._resource_link,
+                self._query_iterable.fetch_next_block,
+                timeout=self._timeout,
+                arguments=self._arguments,
+            )
+        except HTTPFailure as e:
+            self._check_timed_out(e)
+            self.page_sizer.record_page(
+                0,
+                time.perf_counter() - start,
+                get_request_charge(e.headers),
+                e.status_code == StatusCodes.TOO_MANY_REQUESTS,
+            )
+            raise DocumentError(e)
+
+        duration = time.perf_counter() - start
+        headers = self._client.native_client.last_response_headers or {}
+        self.page_sizer.record_page(
+            len(block),
+            duration,
+            get_request_charge(headers),
+            int(headers.get(HttpHeaders.ThrottleRetryCount, 0)) > 0,
+            int(headers.get("Content-Length", 0)),
+        )
+        self._add_query_metrics(headers)
+
+        if self._codec:
+            return [self._codec.decode(d) for d in block]
+
+        return block
+
+    def _check_timed_out(self, error: HTTPFailure):
+        """
+        Stops the reads of the results if a block timed out. The timed out fetch may still be running, and a
+        concurrent fetch on the same QueryIterable could skip or repeat blocks.
+        :param error: The error raised by the fetch.
+        """
+        if (
+            self._timeout is not None
+            and error.status_code == StatusCodes.REQUEST_TIMEOUT
+        ):
+            self._timed_out = True
+
+    def _add_query_metrics(self, headers: dict):
+        """
+        Parses the query metrics of a fetched block, if the query was sent with query metrics enabled.
+        :param headers: The response headers of the block.
+        """
+        if not (self._feed_options and self._feed_options.get("populateQueryMetrics")):
+            return
+
+        header = (headers or {}).get(QUERY_METRICS_HEADER)
+
+        if header:
+            self.query_metrics.append(
+                QueryMetrics.parse(header, get_request_charge(headers))
+            )
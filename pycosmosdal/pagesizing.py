@@ -0,0 +1,249 @@
+"""
+The AdaptivePageSizer class.
+"""
+import threading
+from typing import List
+
+from pycosmosdal.ratelimiter import RequestUnitRateLimiter
+
+
+class PageSizeDecision:
+    """A page size change made by an AdaptivePageSizer, with the observations of the page that caused it."""
+
+    def __init__(
+        self,
+        page_number: int,
+        previous_page_size: int,
+        page_size: int,
+        reason: str,
+        item_count: int,
+        duration: float,
+        request_charge: float,
+        response_bytes: int,
+    ):
+        """
+        Creates a PageSizeDecision instance.
+        :param page_number: The number of the page that caused the change, starting at 1.
+        :param previous_page_size: The page size the page was requested with.
+        :param page_size: The page size of the next pages.
+        :param reason: 'throttled', 'duration', 'request_charge', 'response_bytes' or 'growth'.
+        :param item_count: The number of documents in the page.
+        :param duration: The duration of the page request in seconds.
+        :param request_charge: The request charge of the page.
+        :param response_bytes: The size of the page response in bytes, 0 if it's unknown.
+        """
+        self.page_number = page_number
+        self.previous_page_size = previous_page_size
+        self.page_size = page_size
+        self.reason = reason
+        self.item_count = item_count
+        self.duration = duration
+        self.request_charge = request_charge
+        self.response_bytes = response_bytes
+
+    def __repr__(self) -> str:
+        return (
+            f"PageSizeDecision(page {self.page_number}: {self.previous_page_size} -> {self.page_size}, "
+            f"{self.reason}, {self.item_count} documents in {self.duration * 1000:.0f} ms, "
+            f"{self.request_charge:.1f} RU, {self.response_bytes} bytes)"
+        )
+
+
+class AdaptivePageSizer:
+    """
+    Tunes the page size of a query while it runs. The page size grows while full pages stay within the targets
+    and shrinks as soon as a page is throttled or exceeds a target, so long reads make few round trips without
+    requesting pages that CosmosDb throttles or that are too large to hold in memory.
+
+    The per document duration, request charge and response size are averaged over the recent pages, and the
+    next page size is the largest one that is estimated to stay within every target.
+    """
+
+    SMOOTHING = 0.5
+
+    def __init__(
+        self,
+        initial_page_size: int = 100,
+        min_page_size: int = 10,
+        max_page_size: int = 1000,
+        target_page_duration: float = 0.5,
+        target_request_units_per_second: float = None,
+        max_page_bytes: int = None,
+        growth_factor: float = 2.0,
+        backoff_factor: float = 0.5,
+    ):
+        """
+        Creates an AdaptivePageSizer instance.
+        :param initial_page_size: The page size of the first page.
+        :param min_page_size: The minimum page size.
+        :param max_page_size: The maximum page size.
+        :param target_page_duration: The target duration of a page request in seconds.
+        :param target_request_units_per_second: The request units the query may consume per second. Pages are
+        sized to cost at most one second of budget, and the next page is only requested once the budget allows.
+        By default the query isn't limited.
+        :param max_page_bytes: The maximum size of a page response in bytes. By default the size isn't limited.
+        :param growth_factor: The largest factor the page size grows by after a full page.
+        :param backoff_factor: The factor the page size shrinks by after a throttled page.
+        """
+        if not 0 < min_page_size <= initial_page_size <= max_page_size:
+            raise ValueError(
+                "The page sizes must satisfy 0 < min_page_size <= initial_page_size <= max_page_size."
+            )
+
+        self.min_page_size = int(min_page_size)
+        self.max_page_size = int(max_page_size)
+        self.target_page_duration = target_page_duration
+        self.target_request_units_per_second = target_request_units_per_second
+        self.max_page_bytes = max_page_bytes
+        self.growth_factor = growth_factor
+        self.backoff_factor = backoff_factor
+        self.page_count = 0
+        self.decisions: List[PageSizeDecision] = []
+        self._page_size = int(initial_page_size)
+        self._item_duration = None
+        self._item_request_charge = None
+        self._item_bytes = None
+        self._lock = threading.Lock()
+        self._rate_limiter = (
+            RequestUnitRateLimiter(target_request_units_per_second)
+            if target_request_units_per_second
+            else None
+        )
+
+    @property
+    def page_size(self) -> int:
+        """
+        The page size of the next page.
+        :rtype: int
+        """
+        return self._page_size
+
+    def wait(self) -> float:
+        """
+        Blocks until the request unit budget allows the next page to be requested.
+        :return: The number of seconds waited.
+        :rtype: float
+        """
+        if self._rate_limiter:
+            return self._rate_limiter.wait()
+
+        return 0.0
+
+    def record_page(
+        self,
+        item_count: int,
+        duration: float,
+        request_charge: float,
+        throttled: bool = False,
+        response_bytes: int = 0,
+    ) -> int:
+        """
+        Records the observations of a page and picks the size of the next page.
+        :param item_count: The number of documents in the page.
+        :param duration: The duration of the page request in seconds.
+        :param request_charge: The request charge of the page.
+        :param throttled: True if CosmosDb throttled the page request.
+        :param response_bytes: The size of the page response in bytes, 0 if it's unknown.
+        :return: The page size of the next page.
+        :rtype: int
+        """
+        if self._rate_limiter:
+            self._rate_limiter.consume(request_charge)
+
+        with self._lock:
+            self.page_count += 1
+            page_size = self._page_size
+
+            if item_count:
+                self._item_duration = self._average(
+                    self._item_duration, duration / item_count
+                )
+                self._item_request_charge = self._average(
+                    self._item_request_charge, request_charge / item_count
+                )
+
+                if response_bytes:
+                    self._item_bytes = self._average(
+                        self._item_bytes, response_bytes / item_count
+                    )
+
+            if throttled:
+                reason = "throttled"
+                next_page_size = int(page_size * self.backoff_factor)
+            else:
+                reason, limit = self._get_limit()
+
+                if limit < page_size:
+                    next_page_size = limit
+                elif item_count >= page_size:
+                    reason = "growth"
+                    next_page_size = min(limit, int(page_size * self.growth_factor))
+                else:
+                    # A partial page is the last page, or a page CosmosDb cut short, so it says nothing about
+                    # larger pages.
+                    next_page_size = page_size
+
+            next_page_size = max(
+                self.min_page_size, min(self.max_page_size, next_page_size)
+            )
+
+            if next_page_size != page_size:
+                self._page_size = next_page_size
+                self.decisions.append(
+                    PageSizeDecision(
+                        self.page_count,
+                        page_size,
+                        next_page_size,
+                        reason,
+                        item_count,
+                        duration,
+                        request_charge,
+                        response_bytes,
+                    )
+                )
+
+            return next_page_size
+
+    def _get_limit(self) -> tuple:
+        """
+        Gets the largest page size estimated to stay within every target.
+        :return: A tuple. The first item is the target that limits the page size, the second item is the limit.
+        :rtype: tuple
+        """
+        limits = [("max_page_size", self.max_page_size)]
+
+        if self.target_page_duration and self._item_duration:
+            limits.append(
+                ("duration", int(self.target_page_duration / self._item_duration))
+            )
+
+        if self.target_request_units_per_second and self._item_request_charge:
+            limits.append(
+                (
+                    "request_charge",
+                    int(
+                        self.target_request_units_per_second / self._item_request_charge
+                    ),
+                )
+            )
+
+        if self.max_page_bytes and self._item_bytes:
+            limits.append(
+                ("response_bytes", int(self.max_page_bytes / self._item_bytes))
+            )
+
+        return min(limits, key=lambda l: l[1])
+
+    @staticmethod
+    def _average(average: float, value: float) -> float:
+        """
+        Adds a value to an exponential moving average.
+        :rtype: float
+        """
+        if average is None:
+            return value
+
+        return (
+            AdaptivePageSizer.SMOOTHING * value
+            + (1 - AdaptivePageSizer.SMOOTHING) * average
+        )
@@ -0,0 +1,237 @@
+"""
+The QueryBuilder class.
+"""
+import re
+from functools import lru_cache
+from typing import Any, List, Tuple
+
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+COMPARISON_OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+FUNCTION_OPERATORS = dict(
+    STARTSWITH="STARTSWITH({field}, {value})",
+    ENDSWITH="ENDSWITH({field}, {value})",
+    CONTAINS="CONTAINS({field}, {value})",
+    ARRAY_CONTAINS="ARRAY_CONTAINS({field}, {value})",
+)
+
+
+class QueryBuilder:
+    """
+    Builds parameterized SQL queries for DocumentManager.query_documents(). The query text is compiled once
+    per query shape, i.e. the projection, the filtered fields and operators, and the ordering, and cached,
+    so queries that only differ by their parameter values share the compiled text.
+
+    If the builder knows the collection's partition key path and the query filters the partition key with
+    an equality predicate, query_documents() sends the query to that partition only.
+    """
+
+    def __init__(self, partition_key_path: str = None, alias: str = "c"):
+        """
+        Creates a QueryBuilder instance.
+        :param partition_key_path: The partition key path of the queried collection, e.g. '/owner_id'.
+        :param alias: The alias of the queried collection.
+        """
+        self.partition_key_path = partition_key_path
+        self.alias = alias
+        self._fields: Tuple[str, ...] = ()
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order_by: List[Tuple[str, bool]] = []
+        self._offset = None
+        self._limit = None
+
+    def select(self, *fields: str) -> "QueryBuilder":
+        """
+        Projects the query results to the given fields. Nested fields are separated with dots and are returned
+        under their last name. The id field is always selected. If no fields are selected, whole documents are
+        returned.
+        :param fields: The fields to select.
+        :rtype: QueryBuilder
+        """
+        self._fields = tuple(dict.fromkeys(("id",) + fields))
+        return self
+
+    def where(self, field: str, operator: str, value: Any) -> "QueryBuilder":
+        """
+        Adds a predicate. Predicates are combined with AND.
+        :param field: The field. Nested fields are separated with dots.
+        :param operator: One of =, !=, <, <=, >, >=, IN, STARTSWITH, ENDSWITH, CONTAINS or ARRAY_CONTAINS.
+        :param value: The value the field is compared to. For the IN operator this is a list of values.
+        :rtype: QueryBuilder
+        """
+        operator = operator.upper()
+
+        if (
+            operator not in COMPARISON_OPERATORS
+            and operator not in FUNCTION_OPERATORS
+            and operator != "IN"
+        ):
+            raise ValueError(f"Unsupported operator {operator}.")
+
+        if operator == "IN":
+            value = list(value)
+
+            if not value:
+                raise ValueError("The IN operator requires at least one value.")
+
+        self._filters.append((field, operator, value))
+        return self
+
+    def order_by(self, field: str, descending: bool = False) -> "QueryBuilder":
+        """
+        Orders the results by a field. Ordering by several fields requires a composite index.
+        :param field: The field.
+        :param descending: When set to True, the results are sorted in descending order.
+        :rtype: QueryBuilder
+        """
+        self._order_by.append((field, descending))
+        return self
+
+    def offset(self, offset: int) -> "QueryBuilder":
+        """
+        Skips a number of results. Requires limit().
+        :param offset: The number of results to skip.
+        :rtype: QueryBuilder
+        """
+        self._offset = int(offset)
+        return self
+
+    def limit(self, limit: int) -> "QueryBuilder":
+        """
+        Limits the number of results.
+        :param limit: The maximum number of results.
+        :rtype: QueryBuilder
+        """
+        self._limit = int(limit)
+        return self
+
+    def compile(self) -> dict:
+        """
+        Compiles the query.
+        :return: A query spec dict that contains the query text and parameters.
+        :rtype: dict
+        """
+        shape = (
+            self.alias,
+            self._fields,
+            tuple(
+                (field, operator, len(value) if operator == "IN" else None)
+                for field, operator, value in self._filters
+            ),
+            tuple(self._order_by),
+            self._offset is not None or self._limit is not None,
+        )
+
+        parameters = []
+
+        for index, (_, operator, value) in enumerate(self._filters):
+            if operator == "IN":
+                parameters.extend(
+                    dict(name=f"@p{index}_{value_index}", value=v)
+                    for value_index, v in enumerate(value)
+                )
+            else:
+                parameters.append(dict(name=f"@p{index}", value=value))
+
+        if shape[-1]:
+            parameters.append(dict(name="@offset", value=self._offset or 0))
+            parameters.append(
+                dict(
+                    name="@limit",
+                    value=self._limit if self._limit is not None else 2**31 - 1,
+                )
+            )
+
+        query_spec = dict(query=QueryBuilder._compile_query_text(shape))
+
+        if parameters:
+            query_spec["parameters"] = parameters
+
+        return query_spec
+
+    def get_partition_key(self) -> Tuple[bool, Any]:
+        """
+        Gets the partition key value if the query filters the partition key with an equality predicate.
+        :return: A tuple. The first item is True if a partition key value was found, the second item is the value.
+        :rtype: Tuple[bool, Any]
+        """
+        if not self.partition_key_path:
+            return False, None
+
+        partition_key_field = ".".join(self.partition_key_path.strip("/").split("/"))
+
+        for field, operator, value in self._filters:
+            if field == partition_key_field and operator == "=":
+                return True, value
+
+        return False, None
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _compile_query_text(shape: tuple) -> str:
+        """
+        Compiles the query text of a query shape. The result is cached.
+        :param shape: The query shape.
+        :rtype: str
+        """
+        alias, fields, filters, order_by, paginated = shape
+
+        if fields:
+            projection = ", ".join(
+                QueryBuilder.get_field_expression(alias, field) for field in fields
+            )
+        else:
+            projection = "*"
+
+        query = f"SELECT {projection} FROM {alias}"
+        predicates = []
+
+        for index, (field, operator, value_count) in enumerate(filters):
+            field_expression = QueryBuilder.get_field_expression(alias, field)
+
+            if operator == "IN":
+                values = ", ".join(f"@p{index}_{i}" for i in range(value_count))
+                predicates.append(f"{field_expression} IN ({values})")
+            elif operator in FUNCTION_OPERATORS:
+                predicates.append(
+                    FUNCTION_OPERATORS[operator].format(
+                        field=field_expression, value=f"@p{index}"
+                    )
+                )
+            else:
+                predicates.append(f"{field_expression} {operator} @p{index}")
+
+        if predicates:
+            query += " WHERE " + " AND ".join(predicates)
+
+        if order_by:
+            query += " ORDER BY " + ", ".join(
+                f"{QueryBuilder.get_field_expression(alias, field)} {'DESC' if descending else 'ASC'}"
+                for field, descending in order_by
+            )
+
+        if paginated:
+            query += " OFFSET @offset LIMIT @limit"
+
+        return query
+
+    @staticmethod
+    def get_field_expression(alias: str, field: str) -> str:
+        """
+        A helper method that gets the SQL expression of a field. Field names that aren't valid identifiers are
+        quoted.
+        :param alias: The collection alias.
+        :param field: The field. Nested fields are separated with dots.
+        :return: The field expression, e.g. c.address.city
+        :rtype: str
+        """
+        expression = alias
+
+        for name in field.split("."):
+            if IDENTIFIER_PATTERN.match(name):
+                expression += f".{name}"
+            else:
+                escaped_name = name.replace("\\", "\\\\").replace('"', '\\"')
+                expression += f'["{escaped_name}"]'
+
+        return expression
@@ -0,0 +1,68 @@
+"""
+The RequestUnitRateLimiter class.
+"""
+import threading
+import time
+
+
+class RequestUnitRateLimiter:
+    """
+    Keeps a workload within a request unit budget. The charge of a request is only known once it completes, so
+    callers wait() before sending a request and consume() its charge afterwards. The budget refills continuously
+    and requests wait while it is overdrawn.
+    """
+
+    def __init__(self, request_units_per_second: float, burst: float = None):
+        """
+        Creates a RequestUnitRateLimiter instance.
+        :param request_units_per_second: The budget.
+        :param burst: The request units that can be spent at once after the budget was left unused. Defaults to
+        one second of budget.
+        """
+        if request_units_per_second <= 0:
+            raise ValueError("The request unit budget must be positive.")
+
+        self.request_units_per_second = float(request_units_per_second)
+        self.burst = float(burst or request_units_per_second)
+        self.consumed_request_charge = 0.0
+        self._available = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """
+        Blocks until the budget is no longer overdrawn.
+        :return: The number of seconds waited.
+        :rtype: float
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+
+                if self._available > 0:
+                    return waited
+
+                delay = -self._available / self.request_units_per_second
+
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, request_charge: float):
+        """
+        Charges a completed request to the budget.
+        :param request_charge: The request charge.
+        """
+        with self._lock:
+            self._refill()
+            self._available -= request_charge
+            self.consumed_request_charge += request_charge
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(
+            self.burst,
+            self._available + (now - self._updated) * self.request_units_per_second,
+        )
+        self._updated = now
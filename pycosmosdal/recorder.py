@@ -0,0 +1,142 @@
+"""
+The OperationRecorder class.
+"""
+import gzip
+import json
+import queue
+import threading
+import time
+from typing import Generator
+
+from pycosmosdal.diagnostics import OperationRecord
+
+
+class OperationRecorder:
+    """
+    Records the operations of a CosmosDbClient to a trace file, e.g. to replay production traffic with
+    pycosmosdal.replay before changing throughput or partitioning. Register the recorder as a listener:
+
+        recorder = OperationRecorder("trace.jsonl.gz")
+        client.add_listener(recorder)
+
+    Each operation is written as a JSON line that contains its start time, arguments, duration, request charge,
+    status code and result size. The trace is gzip compressed. Operations are serialized and written by the
+    recorder's thread, so recording adds little latency to the operations it measures. The arguments and
+    result of an operation are serialized after it completes, so they must not be modified afterwards.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Creates an OperationRecorder instance.
+        :param path: The path of the trace file. An existing file is overwritten.
+        :param kwargs: Recorder options:
+            record_arguments: When set to False, the operation arguments, which include the written documents
+            and the query parameters, aren't recorded. The trace can then be analyzed but not replayed.
+            Defaults to True.
+
+            compression_level: The gzip compression level. Defaults to 6.
+        """
+        self.path = path
+        self.record_arguments = kwargs.get("record_arguments", True)
+        self.record_count = 0
+        self.last_error: Exception = None
+        self._file = gzip.open(
+            path,
+            "wt",
+            encoding="utf-8",
+            compresslevel=kwargs.get("compression_level", 6),
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="pycosmosdal-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, record: OperationRecord):
+        """
+        Queues an operation to be written to the trace. This method is called by CosmosDbClient.
+        :param record: The OperationRecord.
+        """
+        if not self._closed:
+            self._queue.put((time.time() - record.duration, record))
+
+    def close(self):
+        """
+        Writes the queued operations, then flushes and closes the trace file. Operations completed after the
+        recorder is closed aren't recorded.
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            self._closed = True
+
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def dispose(self):
+        """
+        Closes the recorder. This method is called by Disposable on exit.
+        """
+        self.close()
+
+    def _run(self):
+        """
+        The thread that serializes the queued operations and writes them to the trace. An operation that can't
+        be serialized is skipped and its error is stored in last_error.
+        """
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                return
+
+            try:
+                line = self._serialize(*item)
+            except Exception as e:
+                self.last_error = e
+                continue
+
+            self._file.write(line)
+            self._file.write("\n")
+            self.record_count += 1
+
+    def _serialize(self, start: float, record: OperationRecord) -> str:
+        """
+        Serializes an operation to a JSON line.
+        :param start: The time the operation started.
+        :param record: The OperationRecord.
+        :rtype: str
+        """
+        entry = dict(
+            start=start,
+            operation=record.operation,
+            resource_link=record.resource_link,
+            duration=record.duration,
+            request_charge=record.request_charge,
+            throttle_retry_count=record.throttle_retry_count,
+            status_code=record.status_code,
+            result_size=record.result_size,
+        )
+
+        if self.record_arguments:
+            entry["arguments"] = record.arguments
+            entry["keyword_arguments"] = record.keyword_arguments
+
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+def read_trace(path: str) -> Generator[dict, None, None]:
+    """
+    Reads the operations of a trace written by an OperationRecorder.
+    :param path: The path of the trace file.
+    :return: A generator that yields the recorded operations in the order they completed.
+    :rtype: Generator[dict]
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
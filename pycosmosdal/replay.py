@@ -0,0 +1,339 @@
+"""
+Replays a trace recorded by an OperationRecorder against a CosmosDb account and reports the achieved throughput,
+latency percentiles and throttling. Run it as a module:
+
+    python -m pycosmosdal.replay trace.jsonl.gz --speed 2 --concurrency 16
+
+Replayed writes modify the target account, so replay production traces against a copy of the data or pass
+--read-only.
+"""
+import argparse
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Tuple
+
+from azure.cosmos.errors import HTTPFailure
+
+from pycosmosdal.cosmosdbclient import CosmosDbClient, CosmosDbEmulatorClient
+from pycosmosdal.diagnostics import OperationRecord
+from pycosmosdal.documentmanager import POINT_READ_QUERY_OPERATION
+from pycosmosdal.recorder import read_trace
+
+PAGED_OPERATIONS = dict(
+    ReadContainers="ReadContainers",
+    QueryContainers="QueryContainers",
+    ReadDatabases="ReadDatabases",
+    QueryDatabases="QueryDatabases",
+    QueryOffers="QueryOffers",
+    ReadPartitionKeyRanges="_ReadPartitionKeyRanges",
+)
+READ_OPERATIONS = frozenset(
+    (
+        "FetchNextBlock",
+        "ReadItem",
+        "ReadContainer",
+        POINT_READ_QUERY_OPERATION,
+    )
+    + tuple(PAGED_OPERATIONS)
+)
+
+
+class ReplayReport:
+    """The outcome of a replay."""
+
+    def __init__(
+        self,
+        records: List[OperationRecord],
+        duration: float,
+        skipped_count: int,
+        max_lag: float,
+    ):
+        """
+        Creates a ReplayReport instance.
+        :param records: The records of the replayed operations.
+        :param duration: The duration of the replay in seconds.
+        :param skipped_count: The number of recorded operations that weren't replayed, or whose recorded
+        arguments were rejected by the native client.
+        :param max_lag: The largest delay in seconds between an operation's scheduled and actual start.
+        """
+        self.records = records
+        self.duration = duration
+        self.skipped_count = skipped_count
+        self.max_lag = max_lag
+        self.operation_count = len(records)
+        self.error_count = sum(1 for r in records if r.status_code is not None)
+        self.throttled_count = sum(1 for r in records if r.throttled)
+        self.request_charge = sum(r.request_charge for r in records)
+
+    @property
+    def throughput(self) -> float:
+        """
+        The number of operations per second.
+        :rtype: float
+        """
+        return self.operation_count / self.duration if self.duration else 0.0
+
+    @property
+    def request_units_per_second(self) -> float:
+        """
+        The request units consumed per second.
+        :rtype: float
+        """
+        return self.request_charge / self.duration if self.duration else 0.0
+
+    def get_latency_percentile(self, percentile: float, operation: str = None) -> float:
+        """
+        Gets a latency percentile.
+        :param percentile: The percentile, e.g. 99.
+        :param operation: Only the latencies of this operation are considered.
+        :return: The latency in seconds, 0 if no operation was replayed.
+        :rtype: float
+        """
+        latencies = sorted(
+            r.duration
+            for r in self.records
+            if operation is None or r.operation == operation
+        )
+
+        if not latencies:
+            return 0.0
+
+        return latencies[
+            min(len(latencies) - 1, int(len(latencies) * percentile / 100))
+        ]
+
+    def __str__(self) -> str:
+        lines = [
+            f"Operations: {self.operation_count} ({self.error_count} failed, {self.throttled_count} throttled, "
+            f"{self.skipped_count} skipped)",
+            f"Duration: {self.duration:.1f} s, throughput: {self.throughput:.1f} operations/s, "
+            f"{self.request_units_per_second:.1f} RU/s, max lag: {self.max_lag * 1000:.0f} ms",
+            "Latency (ms): " + self._format_percentiles(),
+        ]
+
+        for operation in sorted({r.operation for r in self.records}):
+            count = sum(1 for r in self.records if r.operation == operation)
+            lines.append(
+                f"  {operation}: {count} operations, "
+                + self._format_percentiles(operation)
+            )
+
+        return "\n".join(lines)
+
+    def _format_percentiles(self, operation: str = None) -> str:
+        return ", ".join(
+            f"p{p} {self.get_latency_percentile(p, operation) * 1000:.1f}"
+            for p in (50, 95, 99)
+        )
+
+
+class WorkloadReplayer:
+    """
+    Replays recorded operations with the timing they were recorded with, optionally sped up. Query pages are
+    replayed as the first page of the recorded query, since continuation tokens don't outlive the recorded
+    queries.
+    """
+
+    def __init__(self, client: CosmosDbClient, **kwargs):
+        """
+        Creates a WorkloadReplayer instance.
+        :param client: The client the operations are sent with.
+        :param kwargs: Replay options:
+            speed: The replay speed. At a speed of 2 the operations are sent twice as fast as they were recorded.
+            Defaults to 1.
+
+            concurrency: The maximum number of concurrent operations. When more operations are due, they are
+            delayed and the delay is reported as lag. Defaults to 8.
+
+            read_only: When set to True, only read operations are replayed. Defaults to False.
+        """
+        self.client = client
+        self.speed = float(kwargs.get("speed") or 1.0)
+        self.concurrency = int(kwargs.get("concurrency") or 8)
+        self.read_only = bool(kwargs.get("read_only"))
+        self._local = threading.local()
+
+    def replay(self, entries: Iterable[dict]) -> ReplayReport:
+        """
+        Replays operations.
+        :param entries: The recorded operations, e.g. the operations returned by read_trace().
+        :return: The replay report.
+        :rtype: ReplayReport
+        """
+        entries = sorted(entries, key=lambda e: e["start"])
+        records: List[OperationRecord] = []
+        invalid_calls = []
+        skipped_count = 0
+        max_lag = 0.0
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        def listener(record: OperationRecord):
+            if getattr(self._local, "replaying", False):
+                # The report only needs the timing and the charge, not the results.
+                summary = copy.copy(record)
+                summary.arguments = summary.result = None
+                records.append(summary)
+
+        def replay_entry(function, args, kwargs, resource_link, operation):
+            self._local.replaying = True
+
+            try:
+                self.client.execute(operation, resource_link, function, *args, **kwargs)
+            except HTTPFailure:
+                # The listener recorded the failure.
+                pass
+            except Exception as e:
+                invalid_calls.append(e)
+            finally:
+                self._local.replaying = False
+                slots.release()
+
+        self.client.add_listener(listener)
+        start = time.perf_counter()
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="pycosmosdal-replay"
+            ) as executor:
+                for entry in entries:
+                    call = self._create_call(entry)
+
+                    if call is None:
+                        skipped_count += 1
+                        continue
+
+                    due = start + (entry["start"] - entries[0]["start"]) / self.speed
+                    delay = due - time.perf_counter()
+
+                    if delay > 0:
+                        time.sleep(delay)
+
+                    slots.acquire()
+                    max_lag = max(max_lag, time.perf_counter() - due)
+                    executor.submit(
+                        replay_entry,
+                        *call,
+                        entry["resource_link"],
+                        entry["operation"],
+                    )
+        finally:
+            self.client.remove_listener(listener)
+
+        return ReplayReport(
+            records,
+            time.perf_counter() - start,
+            skipped_count + len(invalid_calls),
+            max_lag,
+        )
+
+    def _create_call(self, entry: dict) -> Tuple[Callable[..., Any], tuple, dict]:
+        """
+        Creates the call that replays a recorded operation.
+        :param entry: The recorded operation.
+        :return: The function, its positional arguments and its keyword arguments, or None if the operation
+        can't be replayed.
+        :rtype: Tuple[Callable, tuple, dict]
+        """
+        operation = entry["operation"]
+        arguments = entry.get("arguments")
+        keyword_arguments = entry.get("keyword_arguments") or {}
+        native_client = self.client.native_client
+
+        if arguments is None or (self.read_only and operation not in READ_OPERATIONS):
+            return None
+
+        if operation == "FetchNextBlock":
+            resource_link, query_spec, options = arguments
+            options = WorkloadReplayer._get_first_page_options(options)
+
+            if query_spec:
+                query_iterable = native_client.QueryItems(
+                    resource_link, query_spec, options
+                )
+            else:
+                query_iterable = native_client.ReadItems(resource_link, options)
+
+            return query_iterable.fetch_next_block, (), {}
+
+        if operation in PAGED_OPERATIONS:
+            query_iterable = getattr(native_client, PAGED_OPERATIONS[operation])(
+                *arguments
+            )
+            return query_iterable.fetch_next_block, (), {}
+
+        if operation == POINT_READ_QUERY_OPERATION:
+            return native_client.ReadItem, tuple(arguments), {}
+
+        function = getattr(native_client, operation, None)
+
+        if function is None:
+            return None
+
+        return function, tuple(arguments), keyword_arguments
+
+    @staticmethod
+    def _get_first_page_options(options: dict) -> dict:
+        """
+        Removes the continuation token from recorded query options.
+        :param options: The recorded options.
+        :rtype: dict
+        """
+        return {k: v for k, v in (options or {}).items() if k != "continuation"}
+
+
+def main(argv: List[str] = None):
+    """
+    The entry point of python -m pycosmosdal.replay.
+    :param argv: The command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pycosmosdal.replay",
+        description="Replays a trace recorded by an OperationRecorder.",
+    )
+    parser.add_argument("trace", help="The path of the trace file.")
+    parser.add_argument(
+        "--host",
+        help="The CosmosDb host url. Requires --master-key. Defaults to the CosmosDb emulator.",
+    )
+    parser.add_argument(
+        "--master-key", help="The CosmosDb access key. Requires --host."
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="The replay speed multiplier."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="The maximum number of concurrent operations.",
+    )
+    parser.add_argument(
+        "--read-only", action="store_true", help="Only replay read operations."
+    )
+    args = parser.parse_args(argv)
+
+    if bool(args.host) != bool(args.master_key):
+        parser.error("--host and --master-key must be passed together.")
+
+    if args.host:
+        client = CosmosDbClient(args.host, args.master_key)
+    else:
+        client = CosmosDbEmulatorClient()
+
+    try:
+        report = WorkloadReplayer(
+            client,
+            speed=args.speed,
+            concurrency=args.concurrency,
+            read_only=args.read_only,
+        ).replay(read_trace(args.trace))
+    finally:
+        client.dispose()
+
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+The ExistingResourceCache class.
+"""
+import threading
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+
+class ExistingResourceCache:
+    """
+    A process-level cache of the databases and collections known to exist, used by
+    DatabaseManager.ensure_database() and CollectionManager.ensure_collection(). The resources of a scope, i.e.
+    the databases of an account or the collections of a database, are listed once and then looked up in the cache.
+
+    The cache is only invalidated by the deletes sent through the managers of the same process. Call clear() if
+    resources are deleted elsewhere.
+    """
+
+    def __init__(self):
+        """
+        Creates an ExistingResourceCache instance.
+        """
+        self._links: Set[Tuple[str, str]] = set()
+        self._listed_scopes: Set[Tuple[str, str]] = set()
+        self._scope_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def contains(self, host: str, resource_link: str) -> bool:
+        """
+        Checks if a resource is known to exist.
+        :param host: The CosmosDb host url.
+        :param resource_link: The resource link.
+        :rtype: bool
+        """
+        return (host, resource_link) in self._links
+
+    def add(self, host: str, resource_link: str):
+        """
+        Records that a resource exists.
+        :param host: The CosmosDb host url.
+        :param resource_link: The resource link.
+        """
+        with self._lock:
+            self._links.add((host, resource_link))
+
+    def remove(self, host: str, resource_link: str):
+        """
+        Records that a resource and its child resources were deleted.
+        :param host: The CosmosDb host url.
+        :param resource_link: The resource link.
+        """
+        prefix = f"{resource_link}/"
+
+        with self._lock:
+            self._links = {
+                (h, l)
+                for h, l in self._links
+                if h != host or (l != resource_link and not l.startswith(prefix))
+            }
+            self._listed_scopes = {
+                (h, l)
+                for h, l in self._listed_scopes
+                if h != host or (l != resource_link and not l.startswith(prefix))
+            }
+
+    def list_once(
+        self,
+        host: str,
+        scope_link: str,
+        list_function: Callable[[], Iterable[str]],
+    ):
+        """
+        Lists the resources of a scope unless the scope was already listed. Concurrent callers wait for a single
+        listing.
+        :param host: The CosmosDb host url.
+        :param scope_link: The link of the scope, e.g. a database link for the collections of a database.
+        :param list_function: A function that returns the links of the resources in the scope.
+        """
+        key = (host, scope_link)
+
+        if key in self._listed_scopes:
+            return
+
+        with self._lock:
+            scope_lock = self._scope_locks.setdefault(key, threading.Lock())
+
+        with scope_lock:
+            if key in self._listed_scopes:
+                return
+
+            resource_links = list(list_function())
+
+            with self._lock:
+                self._links.update((host, l) for l in resource_links)
+                self._listed_scopes.add(key)
+
+    def clear(self):
+        """
+        Forgets every resource.
+        """
+        with self._lock:
+            self._links = set()
+            self._listed_scopes = set()
+
+
+existing_resources = ExistingResourceCache()
@@ -0,0 +1,188 @@
+"""
+The CollectionScanner class.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import reduce
+from typing import Any, Callable, List, Tuple
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbClient
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.models import Document
+
+
+def _scan_partition_key_range(
+    client: CosmosDbClient,
+    collection_id: str,
+    database_id: str,
+    partition_key_range_id: str,
+    continuation: str,
+    map_function: Callable[[Document], Any],
+    reduce_function: Callable[[Any, Any], Any],
+    max_item_count: int,
+    chunk_size: int,
+) -> Tuple[bool, Any, str]:
+    """
+    Reads and maps a chunk of the documents of a single partition key range. This function runs in a worker
+    process.
+    :param continuation: The continuation token the chunk starts from, None for the first chunk.
+    :param chunk_size: The number of documents read before the chunk ends. The chunk ends after the block that
+    reaches it.
+    :return: A tuple. The first item is False if the chunk had no documents. The second item is the reduced
+    value if a reduce function was specified, else the list of mapped values. The third item is the
+    continuation token of the next chunk, None once the range has been read.
+    :rtype: Tuple[bool, Any, str]
+    """
+    query_results = DocumentManager(client).get_documents(
+        collection_id,
+        database_id,
+        max_item_count=max_item_count,
+        partition_key_range_id=partition_key_range_id,
+        continuation=continuation,
+    )
+
+    mapped_values = []
+    read_count = 0
+
+    while read_count < chunk_size:
+        documents = query_results.fetch_next()
+
+        if not documents:
+            query_results.continuation = None
+            break
+
+        read_count += len(documents)
+        mapped_values.extend(map_function(document) for document in documents)
+
+        if reduce_function and len(mapped_values) > 1:
+            mapped_values = [reduce(reduce_function, mapped_values)]
+
+    if reduce_function:
+        if not mapped_values:
+            return False, None, query_results.continuation
+
+        return True, mapped_values[0], query_results.continuation
+
+    return len(mapped_values) > 0, mapped_values, query_results.continuation
+
+
+class CollectionScanner:
+    """
+    Scans a whole collection in parallel. The collection is split by partition key range and each range
+    is read and mapped in a worker process, so CPU-bound per-document work scales with the number of cores.
+
+    A range is read in chunks, one after the other, so a scan can't use more worker processes than the
+    collection has partition key ranges. Each chunk's results are sent back to the calling process when the
+    chunk completes, so a worker only holds one chunk's mapped values at a time.
+    """
+
+    def __init__(self, client: CosmosDbClient, max_workers: int = None):
+        """
+        Creates a CollectionScanner instance.
+        :param client: The client that is responsible for issuing commands to CosmosDb. The client is
+        pickled and recreated in every worker process.
+        :param max_workers: The number of worker processes. Defaults to the number of processors. A scan
+        starts at most one worker process per partition key range.
+        """
+        self.client = client
+        self.max_workers = max_workers
+
+    def scan(
+        self,
+        collection_id: str,
+        database_id: str,
+        map_function: Callable[[Document], Any],
+        **kwargs,
+    ) -> Any:
+        """
+        Runs a map function over every document in a collection.
+        :param collection_id: The collection id.
+        :param database_id: The database id.
+        :param map_function: The function called with each Document. It runs in a worker process so it
+        must be picklable, i.e. a module level function.
+        :param kwargs: Scan options:
+            reduce_function: A function that combines two mapped values into one. Each worker reduces the
+            values of its partition key range and the partial results are reduced again, so the function must
+            be associative and accept its own results. It must be picklable.
+
+            initial: The initial value of the reduction.
+
+            sink: A function called with every mapped value. Values are streamed to the sink as each chunk
+            completes. It is called in the calling process and is ignored when a reduce function is specified.
+
+            max_item_count: The number of documents read per request. Defaults to 1000.
+
+            chunk_size: The number of documents a worker reads before it sends its mapped values back.
+            Defaults to 10 times max_item_count. The mapped values of a chunk are held in memory until then.
+        :return: The reduced value if a reduce function was specified, None if a sink was specified, else
+        the list of mapped values.
+        :rtype: Any
+        """
+        reduce_function = kwargs.get("reduce_function")
+        sink = kwargs.get("sink")
+        max_item_count = int(kwargs.get("max_item_count") or 1000)
+        chunk_size = int(kwargs.get("chunk_size") or max_item_count * 10)
+
+        partition_key_ranges = CollectionManager(self.client).get_partition_key_ranges(
+            collection_id, database_id
+        )
+
+        # The chunks of a range are read one after the other, so more workers than ranges would stay idle.
+        max_workers = max(
+            1, min(self.max_workers or os.cpu_count() or 1, len(partition_key_ranges))
+        )
+        results: List[Any] = []
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+
+            def submit(partition_key_range_id: str, continuation: str = None):
+                future = executor.submit(
+                    _scan_partition_key_range,
+                    self.client,
+                    collection_id,
+                    database_id,
+                    partition_key_range_id,
+                    continuation,
+                    map_function,
+                    reduce_function,
+                    max_item_count,
+                    chunk_size,
+                )
+                futures[future] = partition_key_range_id
+
+            for partition_key_range in partition_key_ranges:
+                submit(partition_key_range["id"])
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    partition_key_range_id = futures.pop(future)
+                    has_values, value, continuation = future.result()
+
+                    if continuation:
+                        submit(partition_key_range_id, continuation)
+
+                    if not has_values:
+                        continue
+
+                    if reduce_function:
+                        results = [reduce(reduce_function, results + [value])]
+                    elif sink:
+                        for mapped_value in value:
+                            sink(mapped_value)
+                    else:
+                        results.extend(value)
+
+        if reduce_function:
+            if "initial" in kwargs:
+                return reduce(reduce_function, results, kwargs["initial"])
+
+            return reduce(reduce_function, results) if results else None
+
+        if sink:
+            return None
+
+        return results
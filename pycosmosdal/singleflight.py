@@ -0,0 +1,93 @@
+"""
+The SingleFlight class.
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from azure.cosmos.errors import HTTPFailure
+from azure.cosmos.http_constants import StatusCodes
+
+
+class _Call:
+    """An in-flight call that concurrent callers wait for."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiter_count = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls. While a call for a key is in flight, other callers asking for the
+    same key wait for it and share its result or error instead of sending their own request.
+    """
+
+    def __init__(self):
+        """
+        Creates a SingleFlight instance.
+        """
+        self.call_count = 0
+        self.collapsed_count = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def execute(
+        self, key: Hashable, function: Callable[[], Any], timeout: float = None
+    ) -> Any:
+        """
+        Calls a function unless a call for the same key is already in flight, in which case the result of
+        that call is returned.
+        :param key: The key that identifies identical calls, e.g. a resource link.
+        :param function: The function to call.
+        :param timeout: The number of seconds a caller waits for a call in flight. If the call doesn't complete
+        in time, an HTTPFailure with a 408 status code is raised. It doesn't limit the caller's own call, which
+        the function is expected to limit.
+        :return: The function's result. Callers that shared a call get a deep copy of the result so they can
+        modify it safely.
+        :rtype: Any
+        """
+        leader = False
+
+        with self._lock:
+            self.call_count += 1
+            call = self._calls.get(key)
+
+            if call:
+                self.collapsed_count += 1
+                call.waiter_count += 1
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise HTTPFailure(
+                    StatusCodes.REQUEST_TIMEOUT,
+                    f"The call in flight did not complete within {timeout} seconds.",
+                )
+
+            if call.error:
+                raise call.error
+
+            return copy.deepcopy(call.result)
+
+        result = None
+
+        try:
+            result = function()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            if call.waiter_count and call.error is None:
+                # The waiters copy a private snapshot, so the caller can modify its result right away.
+                call.result = copy.deepcopy(result)
+
+            call.event.set()
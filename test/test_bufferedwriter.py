@@ -0,0 +1,182 @@
+"""
+BufferedDocumentWriter tests.
+"""
+import time
+from unittest import TestCase
+
+from azure.cosmos.errors import HTTPFailure
+
+from pycosmosdal.bufferedwriter import BufferedDocumentWriter
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.disposable import Disposable
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.errors import DocumentError
+
+DATABASE_NAME = __name__
+COLLECTION_NAME = f"{DATABASE_NAME}_container"
+
+client = CosmosDbEmulatorClient()
+
+
+class BufferedDocumentWriterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database_manager = DatabaseManager(client)
+        cls.database_manager.create_database(DATABASE_NAME)
+
+        CollectionManager(client).create_collection(
+            COLLECTION_NAME, DATABASE_NAME, partition_key=dict(paths=["/id"])
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database_manager.delete_database(DATABASE_NAME)
+
+    def setUp(self):
+        self.document_manager = DocumentManager(client)
+
+    def test_disposable_flushes_last_write(self):
+        with Disposable(
+            BufferedDocumentWriter(
+                self.document_manager,
+                COLLECTION_NAME,
+                DATABASE_NAME,
+                flush_interval=None,
+            )
+        ) as writer:
+            for i in range(10):
+                writer.write(dict(id="counter", count=i))
+
+        document = self.document_manager.get_document(
+            "counter", COLLECTION_NAME, DATABASE_NAME, partition_key="counter"
+        )
+
+        self.assertEqual(9, document.native_resource["count"])
+        self.assertEqual(9, writer.coalesced_count)
+        self.assertEqual(1, writer.flushed_count)
+
+    def test_merge_function(self):
+        with Disposable(
+            BufferedDocumentWriter(
+                self.document_manager,
+                COLLECTION_NAME,
+                DATABASE_NAME,
+                merge_function=lambda pending, new: dict(
+                    new, count=pending["count"] + new["count"]
+                ),
+                flush_interval=None,
+            )
+        ) as writer:
+            for _ in range(10):
+                writer.write(dict(id="merged", count=1))
+
+        document = self.document_manager.get_document(
+            "merged", COLLECTION_NAME, DATABASE_NAME, partition_key="merged"
+        )
+
+        self.assertEqual(10, document.native_resource["count"])
+
+    def test_flush_when_max_pending_reached(self):
+        writer = BufferedDocumentWriter(
+            self.document_manager,
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            max_pending=5,
+            flush_interval=None,
+        )
+
+        try:
+            for i in range(5):
+                writer.write(dict(id=f"foobar-{i}"))
+
+            deadline = time.monotonic() + 10
+
+            while writer.flushed_count < 5 and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            self.assertEqual(0, writer.pending_count)
+            self.assertEqual(5, writer.flushed_count)
+        finally:
+            writer.close()
+
+    def test_failed_documents_are_written_by_the_next_flush(self):
+        writer = BufferedDocumentWriter(
+            FailingDocumentManager(client, failure_count=1),
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            flush_interval=None,
+        )
+
+        try:
+            writer.write(dict(id="retried", count=1))
+
+            with self.assertRaises(DocumentError):
+                writer.flush()
+
+            self.assertEqual(1, writer.pending_count)
+            self.assertEqual(1, writer.flush())
+        finally:
+            writer.close()
+
+        document = self.document_manager.get_document(
+            "retried", COLLECTION_NAME, DATABASE_NAME, partition_key="retried"
+        )
+
+        self.assertEqual(1, document.native_resource["count"])
+
+    def test_background_flush_survives_errors_that_are_not_http_errors(self):
+        writer = BufferedDocumentWriter(
+            FailingDocumentManager(
+                client, failure_count=1, error=ConnectionError("Connection reset.")
+            ),
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            max_pending=1,
+            flush_interval=None,
+        )
+
+        try:
+            writer.write(dict(id="reconnected", count=1))
+            deadline = time.monotonic() + 10
+
+            while not writer._errors and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            self.assertTrue(writer._thread.is_alive())
+            self.assertEqual(1, writer.pending_count)
+
+            writer.write(dict(id="reconnected", count=2))
+
+            while writer.flushed_count < 1 and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            self.assertEqual(0, writer.pending_count)
+
+            with self.assertRaises(ConnectionError):
+                writer.flush()
+        finally:
+            writer.close()
+
+        document = self.document_manager.get_document(
+            "reconnected", COLLECTION_NAME, DATABASE_NAME, partition_key="reconnected"
+        )
+
+        self.assertEqual(2, document.native_resource["count"])
+
+
+class FailingDocumentManager(DocumentManager):
+    """A DocumentManager whose first upserts fail, by default with a 503 error."""
+
+    def __init__(self, client, failure_count: int, error: Exception = None):
+        super().__init__(client)
+        self.failure_count = failure_count
+        self.error = error or DocumentError(HTTPFailure(503, "Service unavailable."))
+
+    def upsert_document(self, document, collection_id, database_id, **kwargs):
+        if self.failure_count:
+            self.failure_count -= 1
+            raise self.error
+
+        return super().upsert_document(document, collection_id, database_id, **kwargs)
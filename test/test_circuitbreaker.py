@@ -0,0 +1,252 @@
+"""
+CircuitBreaker tests.
+"""
+import threading
+import time
+from unittest import TestCase
+
+from azure.cosmos.errors import HTTPFailure
+
+from pycosmosdal.circuitbreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+COLLECTION_LINK = "dbs/database/colls/collection"
+DOCUMENT_LINK = f"{COLLECTION_LINK}/docs/1"
+
+
+def fail(*args, **kwargs):
+    raise HTTPFailure(503, "Service unavailable.")
+
+
+def read(document_link, options=None):
+    return dict(id=document_link.split("/")[-1], value=1)
+
+
+class CircuitBreakerTests(TestCase):
+    def test_failures_open_the_circuit(self):
+        circuit_breaker = CircuitBreaker(min_request_count=4, open_duration=60)
+
+        for _ in range(4):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        self.assertEqual(OPEN, circuit_breaker.get_state(COLLECTION_LINK))
+
+        with self.assertRaises(HTTPFailure) as context:
+            circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK)
+
+        self.assertEqual(503, context.exception.status_code)
+        self.assertEqual(1, circuit_breaker.rejected_count)
+
+    def test_client_errors_do_not_open_the_circuit(self):
+        circuit_breaker = CircuitBreaker(min_request_count=2)
+
+        def not_found(*args, **kwargs):
+            raise HTTPFailure(404, "Not found.")
+
+        for _ in range(4):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, not_found)
+
+        self.assertEqual(CLOSED, circuit_breaker.get_state(DOCUMENT_LINK))
+
+    def test_circuits_are_tracked_per_collection(self):
+        circuit_breaker = CircuitBreaker(min_request_count=2, open_duration=60)
+
+        for _ in range(2):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        self.assertEqual(OPEN, circuit_breaker.get_state(COLLECTION_LINK))
+        self.assertEqual(CLOSED, circuit_breaker.get_state("dbs/database/colls/other"))
+
+    def test_collection_thresholds_override_the_defaults(self):
+        circuit_breaker = CircuitBreaker(
+            min_request_count=2,
+            collection_thresholds={COLLECTION_LINK: dict(slow_call_duration=0)},
+        )
+
+        for _ in range(2):
+            circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK)
+            circuit_breaker.execute(
+                "ReadItem",
+                "dbs/database/colls/other/docs/1",
+                read,
+                "dbs/database/colls/other/docs/1",
+            )
+
+        self.assertEqual(OPEN, circuit_breaker.get_state(COLLECTION_LINK))
+        self.assertEqual(CLOSED, circuit_breaker.get_state("dbs/database/colls/other"))
+
+    def test_a_successful_probe_closes_the_circuit(self):
+        circuit_breaker = CircuitBreaker(min_request_count=2, open_duration=0.05)
+
+        for _ in range(2):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        time.sleep(0.1)
+        document = circuit_breaker.execute(
+            "ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK
+        )
+
+        self.assertEqual("1", document["id"])
+        self.assertEqual(CLOSED, circuit_breaker.get_state(COLLECTION_LINK))
+
+    def test_a_failed_probe_opens_the_circuit_again(self):
+        circuit_breaker = CircuitBreaker(min_request_count=2, open_duration=0.05)
+
+        for _ in range(2):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        time.sleep(0.1)
+
+        with self.assertRaises(HTTPFailure):
+            circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        self.assertEqual(OPEN, circuit_breaker.get_state(COLLECTION_LINK))
+
+    def test_a_half_open_circuit_limits_the_probes(self):
+        circuit_breaker = CircuitBreaker(min_request_count=2, open_duration=0.05)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_read(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return dict(id="1")
+
+        for _ in range(2):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        time.sleep(0.1)
+        probe = threading.Thread(
+            target=circuit_breaker.execute, args=("ReadItem", DOCUMENT_LINK, slow_read)
+        )
+        probe.start()
+        started.wait(5)
+
+        try:
+            self.assertEqual(HALF_OPEN, circuit_breaker.get_state(COLLECTION_LINK))
+
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK)
+        finally:
+            release.set()
+            probe.join()
+
+        self.assertEqual(CLOSED, circuit_breaker.get_state(COLLECTION_LINK))
+
+    def test_requests_above_the_in_flight_limit_are_shed(self):
+        circuit_breaker = CircuitBreaker(max_in_flight=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_read(*args, **kwargs):
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(
+            target=circuit_breaker.execute, args=("ReadItem", DOCUMENT_LINK, slow_read)
+        )
+        thread.start()
+        started.wait(5)
+
+        try:
+            with self.assertRaises(HTTPFailure) as context:
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(429, context.exception.status_code)
+        self.assertEqual(1, circuit_breaker.shed_count)
+        circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK)
+
+    def test_an_open_circuit_serves_cached_point_reads(self):
+        circuit_breaker = CircuitBreaker(
+            min_request_count=2, open_duration=60, fallback_cache_size=10
+        )
+        circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK, {})
+
+        for _ in range(2):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", f"{COLLECTION_LINK}/docs/2", fail)
+
+        document = circuit_breaker.execute(
+            "ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK, {}
+        )
+
+        self.assertEqual(dict(id="1", value=1), document)
+        self.assertEqual(1, circuit_breaker.fallback_count)
+
+    def test_writes_invalidate_cached_documents(self):
+        circuit_breaker = CircuitBreaker(fallback_cache_size=10)
+        circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK, {})
+        circuit_breaker.execute(
+            "UpsertItem",
+            COLLECTION_LINK,
+            lambda link, document: document,
+            COLLECTION_LINK,
+            dict(id="1", value=2),
+        )
+
+        self.assertIsNone(
+            circuit_breaker._get_cached_document("ReadItem", (DOCUMENT_LINK, {}), {})
+        )
+
+    def test_get_collection_link(self):
+        self.assertEqual(
+            COLLECTION_LINK, CircuitBreaker.get_collection_link(DOCUMENT_LINK)
+        )
+        self.assertEqual(
+            COLLECTION_LINK, CircuitBreaker.get_collection_link(COLLECTION_LINK)
+        )
+        self.assertEqual(
+            "dbs/database", CircuitBreaker.get_collection_link("dbs/database")
+        )
+
+    def test_requests_sent_before_the_circuit_opened_are_not_probes(self):
+        circuit_breaker = CircuitBreaker(min_request_count=2, open_duration=0.05)
+        stale_started, stale_release = threading.Event(), threading.Event()
+        probe_started, probe_release = threading.Event(), threading.Event()
+
+        def slow_read(started, release):
+            started.set()
+            release.wait(5)
+            return dict(id="1")
+
+        stale_read = threading.Thread(
+            target=circuit_breaker.execute,
+            args=("ReadItem", DOCUMENT_LINK, slow_read, stale_started, stale_release),
+        )
+        stale_read.start()
+        stale_started.wait(5)
+
+        for _ in range(2):
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, fail)
+
+        time.sleep(0.1)
+        probe = threading.Thread(
+            target=circuit_breaker.execute,
+            args=("ReadItem", DOCUMENT_LINK, slow_read, probe_started, probe_release),
+        )
+        probe.start()
+        probe_started.wait(5)
+
+        try:
+            stale_release.set()
+            stale_read.join()
+
+            self.assertEqual(HALF_OPEN, circuit_breaker.get_state(COLLECTION_LINK))
+
+            with self.assertRaises(HTTPFailure):
+                circuit_breaker.execute("ReadItem", DOCUMENT_LINK, read, DOCUMENT_LINK)
+        finally:
+            stale_release.set()
+            probe_release.set()
+            probe.join()
+
+        self.assertEqual(CLOSED, circuit_breaker.get_state(COLLECTION_LINK))
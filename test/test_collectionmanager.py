@@ -1,14 +1,19 @@
 """
 CollectionManager tests.
 """
+import threading
+import time
 from unittest import TestCase
 
+from azure.cosmos.errors import HTTPFailure
+
 from pycosmosdal.collectionmanager import CollectionManager
 from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
 from pycosmosdal.databasemanager import DatabaseManager
 from pycosmosdal.errors import CollectionError
 
 DATABASE_NAME = __name__
+COLLECTION_LINK = f"dbs/{DATABASE_NAME}/colls/foobar"
 
 client = CosmosDbEmulatorClient()
 
@@ -93,3 +98,286 @@ class CollectionManagerTests(TestCase):
 
     def test_get_collection_when_not_found_returns_None(self):
         self.assertIsNone(self.collection_manager.get_collection("foo", DATABASE_NAME))
+
+    def test_create_collection_with_indexing_policy(self):
+        try:
+            self.collection_manager.create_collection(
+                "foobar",
+                DATABASE_NAME,
+                indexing_policy=dict(
+                    included_paths=["/field1/?"],
+                    excluded_paths=["/*"],
+                    composite_indexes=[
+                        [
+                            dict(path="/field1", order="ascending"),
+                            dict(path="/field2", order="descending"),
+                        ]
+                    ],
+                ),
+            )
+
+            indexing_policy = self.collection_manager.get_collection(
+                "foobar", DATABASE_NAME
+            ).native_resource["indexingPolicy"]
+
+            self.assertEqual(
+                ["/field1/?"], [p["path"] for p in indexing_policy["includedPaths"]]
+            )
+            self.assertEqual(1, len(indexing_policy["compositeIndexes"]))
+        finally:
+            self.collection_manager.delete_collection("foobar", DATABASE_NAME)
+
+    def test_replace_indexing_policy(self):
+        try:
+            self.collection_manager.create_collection("foobar", DATABASE_NAME)
+            self.collection_manager.replace_indexing_policy(
+                "foobar", DATABASE_NAME, dict(excluded_paths=["/field1/*"])
+            )
+
+            indexing_policy = self.collection_manager.get_collection(
+                "foobar", DATABASE_NAME
+            ).native_resource["indexingPolicy"]
+
+            self.assertIn(
+                "/field1/*", [p["path"] for p in indexing_policy["excludedPaths"]]
+            )
+        finally:
+            self.collection_manager.delete_collection("foobar", DATABASE_NAME)
+
+    def test_bulk_load_restores_indexing_policy(self):
+        try:
+            self.collection_manager.create_collection("foobar", DATABASE_NAME)
+            original_paths = self.get_included_paths("foobar")
+            progress = []
+
+            with self.collection_manager.bulk_load(
+                "foobar",
+                DATABASE_NAME,
+                wait_for_reindex=True,
+                poll_interval=0.1,
+                progress_callback=progress.append,
+            ):
+                self.assertEqual([], self.get_included_paths("foobar"))
+
+            self.assertEqual(original_paths, self.get_included_paths("foobar"))
+            self.assertEqual(100, progress[-1])
+        finally:
+            self.collection_manager.delete_collection("foobar", DATABASE_NAME)
+
+    def get_included_paths(self, collection_id: str) -> list:
+        indexing_policy = self.collection_manager.get_collection(
+            collection_id, DATABASE_NAME
+        ).native_resource["indexingPolicy"]
+
+        return [p["path"] for p in indexing_policy["includedPaths"]]
+
+    def test_get_set_throughput(self):
+        try:
+            self.collection_manager.create_collection(
+                "foobar", DATABASE_NAME, throughput=400
+            )
+            self.collection_manager.set_throughput("foobar", DATABASE_NAME, 800)
+
+            self.assertEqual(
+                800, self.collection_manager.get_throughput("foobar", DATABASE_NAME)
+            )
+        finally:
+            self.collection_manager.delete_collection("foobar", DATABASE_NAME)
+
+    def test_scaled_throughput_restores_throughput(self):
+        try:
+            self.collection_manager.create_collection(
+                "foobar", DATABASE_NAME, throughput=400
+            )
+
+            with self.collection_manager.scaled_throughput(
+                "foobar", DATABASE_NAME, 1000
+            ):
+                self.assertEqual(
+                    1000,
+                    self.collection_manager.get_throughput("foobar", DATABASE_NAME),
+                )
+
+            self.assertEqual(
+                400, self.collection_manager.get_throughput("foobar", DATABASE_NAME)
+            )
+        finally:
+            self.collection_manager.delete_collection("foobar", DATABASE_NAME)
+
+    def test_ensure_collection(self):
+        operations = []
+
+        def listener(record):
+            operations.append(record.operation)
+
+        try:
+            self.assertTrue(
+                self.collection_manager.ensure_collection(
+                    "foobar", DATABASE_NAME, partition_key=dict(paths=["/field1"])
+                )
+            )
+
+            client.add_listener(listener)
+            self.assertFalse(
+                self.collection_manager.ensure_collection("foobar", DATABASE_NAME)
+            )
+            self.assertEqual([], operations)
+        finally:
+            client.remove_listener(listener)
+            self.collection_manager.delete_collection("foobar", DATABASE_NAME)
+
+    def test_ensure_collection_lists_collections_once(self):
+        operations = []
+
+        def listener(record):
+            operations.append(record.operation)
+
+        self.collection_manager.create_collection("foo", DATABASE_NAME)
+        client.add_listener(listener)
+
+        try:
+            self.assertFalse(
+                self.collection_manager.ensure_collection("foo", DATABASE_NAME)
+            )
+            self.assertTrue(
+                self.collection_manager.ensure_collection("bar", DATABASE_NAME)
+            )
+
+            listing_count = operations.count("ReadContainers")
+
+            self.assertTrue(
+                self.collection_manager.ensure_collection("baz", DATABASE_NAME)
+            )
+            self.assertEqual(listing_count, operations.count("ReadContainers"))
+        finally:
+            client.remove_listener(listener)
+
+            for collection_id in ("foo", "bar", "baz"):
+                self.collection_manager.delete_collection(collection_id, DATABASE_NAME)
+
+
+class ScaledThroughputTests(TestCase):
+    def setUp(self):
+        self.collection_manager = StubCollectionManager(client)
+
+    def test_restores_throughput_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.collection_manager.scaled_throughput(
+                "foobar", DATABASE_NAME, 1000
+            ):
+                raise ValueError("foobar")
+
+        self.assertEqual([400, 1000, 400], self.collection_manager.throughputs)
+
+    def test_throttled_operations_trigger_a_scale_up(self):
+        with self.collection_manager.scaled_throughput(
+            "foobar",
+            DATABASE_NAME,
+            1000,
+            max_throughput=2000,
+            window=10,
+            throttle_rate=0.5,
+            scale_factor=2,
+        ):
+            self.execute(5, throttled=True)
+            self.execute(5, throttled=False)
+            self.wait_for_throughput(2000)
+
+        self.assertEqual([400, 1000, 2000, 400], self.collection_manager.throughputs)
+
+    def test_unthrottled_operations_and_other_collections_dont_trigger_a_scale_up(
+        self,
+    ):
+        with self.collection_manager.scaled_throughput(
+            "foobar",
+            DATABASE_NAME,
+            1000,
+            max_throughput=2000,
+            window=10,
+            throttle_rate=0.5,
+        ):
+            self.execute(4, throttled=True)
+            self.execute(6, throttled=False)
+            self.execute(10, throttled=True, resource_link=f"{COLLECTION_LINK}bar")
+            time.sleep(0.1)
+
+        self.assertEqual([400, 1000, 400], self.collection_manager.throughputs)
+
+    def test_failed_scale_up_is_reported_to_the_error_callback(self):
+        self.collection_manager.failing_throughput = 1500
+        errors = []
+
+        with self.collection_manager.scaled_throughput(
+            "foobar",
+            DATABASE_NAME,
+            1000,
+            max_throughput=2000,
+            window=10,
+            error_callback=errors.append,
+        ):
+            # The operations raise their own error, not the error of the scale-up.
+            self.execute(10, throttled=True)
+            deadline = time.monotonic() + 5
+
+            while not errors and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertIsInstance(errors[0], CollectionError)
+        self.assertEqual([400, 1000, 400], self.collection_manager.throughputs)
+
+    def test_scale_up_in_flight_completes_before_the_throughput_is_restored(self):
+        self.collection_manager.slow_throughput = 1500
+
+        with self.collection_manager.scaled_throughput(
+            "foobar", DATABASE_NAME, 1000, max_throughput=2000, window=10
+        ):
+            self.execute(10, throttled=True)
+            self.collection_manager.slow_started.wait(5)
+
+        self.assertEqual([400, 1000, 1500, 400], self.collection_manager.throughputs)
+
+    def execute(
+        self, count: int, throttled: bool, resource_link: str = COLLECTION_LINK
+    ):
+        def read():
+            if throttled:
+                raise HTTPFailure(429, "Request rate is large.")
+
+        for _ in range(count):
+            try:
+                client.execute("ReadItem", f"{resource_link}/docs/foobar", read)
+            except HTTPFailure as e:
+                self.assertEqual(429, e.status_code)
+
+    def wait_for_throughput(self, throughput: int):
+        deadline = time.monotonic() + 5
+
+        while (
+            self.collection_manager.throughputs[-1] != throughput
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+
+
+class StubCollectionManager(CollectionManager):
+    """A CollectionManager that keeps the throughput of a collection in memory."""
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.throughputs = [400]
+        self.failing_throughput = None
+        self.slow_throughput = None
+        self.slow_started = threading.Event()
+
+    def get_throughput(self, collection_id, database_id, **kwargs):
+        return self.throughputs[-1]
+
+    def set_throughput(self, collection_id, database_id, throughput, **kwargs):
+        if throughput == self.failing_throughput:
+            raise CollectionError(HTTPFailure(503, "Service unavailable."))
+
+        if throughput == self.slow_throughput:
+            self.slow_started.set()
+            time.sleep(0.2)
+
+        self.throughputs.append(throughput)
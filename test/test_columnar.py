@@ -0,0 +1,79 @@
+"""
+ColumnarBuilder tests.
+"""
+import math
+from array import array
+from unittest import TestCase
+
+from pycosmosdal.columnar import ColumnarBuilder
+
+DOCUMENTS = [
+    dict(id="1", price=1.5, quantity=2, shipped=True, address=dict(city="Oslo")),
+    dict(id="2", price=None, quantity=3, shipped=False, address=dict(city="Rome")),
+    dict(id="3", price=4.0, items=[dict(sku="a")]),
+]
+
+
+class ColumnarBuilderTests(TestCase):
+    def test_append_creates_typed_columns(self):
+        builder = ColumnarBuilder(
+            dict(price="float", quantity="int", shipped="bool", id="str"),
+            backend="array",
+        )
+        builder.append(DOCUMENTS[:2])
+        builder.append(DOCUMENTS[2:])
+        columns = builder.build()
+
+        self.assertEqual(3, builder.row_count)
+        self.assertIsInstance(columns["price"], array)
+        self.assertEqual([1.5, 4.0], [columns["price"][0], columns["price"][2]])
+        self.assertTrue(math.isnan(columns["price"][1]))
+        self.assertEqual(array("q", [2, 3, 0]), columns["quantity"])
+        self.assertEqual(array("b", [1, 0, 0]), columns["shipped"])
+        self.assertEqual(["1", "2", "3"], columns["id"])
+
+    def test_nested_paths(self):
+        builder = ColumnarBuilder(
+            {"address.city": "str", "items.0.sku": "str"}, backend="array"
+        )
+        builder.append(DOCUMENTS)
+        columns = builder.build()
+
+        self.assertEqual(["Oslo", "Rome", None], columns["address.city"])
+        self.assertEqual([None, None, "a"], columns["items.0.sku"])
+
+    def test_skip_leaves_out_documents_with_nulls(self):
+        builder = ColumnarBuilder(
+            dict(price="float", quantity="int"), null_handling="skip", backend="array"
+        )
+
+        self.assertEqual(1, builder.append(DOCUMENTS))
+        self.assertEqual(array("q", [2]), builder.build()["quantity"])
+
+    def test_fill_values(self):
+        builder = ColumnarBuilder(
+            ["price"], fill_values=dict(price=-1.0), backend="array"
+        )
+        builder.append(DOCUMENTS)
+
+        self.assertEqual(array("d", [1.5, -1.0, 4.0]), builder.build()["price"])
+
+    def test_raise_raises_ValueError(self):
+        builder = ColumnarBuilder(["price"], null_handling="raise", backend="array")
+
+        with self.assertRaises(ValueError):
+            builder.append(DOCUMENTS)
+
+    def test_invalid_values_keep_columns_aligned(self):
+        builder = ColumnarBuilder(dict(quantity="int", id="int"), backend="array")
+        builder.append([dict(id=1, quantity=1)])
+
+        with self.assertRaises(ValueError):
+            builder.append([dict(id="x", quantity=2)])
+
+        columns = builder.build()
+        self.assertEqual(len(columns["quantity"]), len(columns["id"]))
+
+    def test_invalid_column_type_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            ColumnarBuilder(dict(price="decimal"))
@@ -0,0 +1,54 @@
+"""
+FieldCompressionCodec tests.
+"""
+import base64
+import os
+from unittest import TestCase
+
+from pycosmosdal.compression import COMPRESSED_FIELD_MARKER, FieldCompressionCodec
+
+
+class FieldCompressionCodecTests(TestCase):
+    def setUp(self):
+        self.codec = FieldCompressionCodec(["body", "details.items"], threshold=100)
+
+    def test_encode_decode_round_trip(self):
+        document = {
+            "id": "foobar",
+            "body": "lorem ipsum " * 100,
+            "details": {"items": [dict(product_id=i) for i in range(50)], "count": 50},
+        }
+
+        encoded_document = self.codec.encode(document)
+
+        self.assertIn(COMPRESSED_FIELD_MARKER, encoded_document["body"])
+        self.assertIn(COMPRESSED_FIELD_MARKER, encoded_document["details"]["items"])
+        self.assertEqual(50, encoded_document["details"]["count"])
+        self.assertEqual(document, self.codec.decode(encoded_document))
+
+    def test_encode_does_not_modify_document(self):
+        document = {"id": "foobar", "details": {"items": "lorem ipsum " * 100}}
+        self.codec.encode(document)
+        self.assertEqual("lorem ipsum " * 100, document["details"]["items"])
+
+    def test_encode_skips_values_below_threshold(self):
+        document = {"id": "foobar", "body": "lorem ipsum"}
+        self.assertIs(document, self.codec.encode(document))
+        self.assertEqual(0, self.codec.savings)
+
+    def test_encode_reports_savings(self):
+        self.codec.encode({"id": "foobar", "body": "lorem ipsum " * 100})
+        self.assertGreater(self.codec.savings, 0.5)
+
+    def test_encode_skips_values_that_dont_shrink(self):
+        document = {"id": "foobar", "body": base64.b64encode(os.urandom(150)).decode()}
+
+        self.assertIs(document, self.codec.encode(document))
+        self.assertEqual(0, self.codec.original_bytes)
+        self.assertEqual(0, self.codec.encoded_bytes)
+
+    def test_compress_id_raises_ValueError(self):
+        self.assertRaises(ValueError, FieldCompressionCodec, ["id"])
+
+    def test_unsupported_algorithm_raises_ValueError(self):
+        self.assertRaises(ValueError, FieldCompressionCodec, ["body"], algorithm="lz4")
@@ -0,0 +1,166 @@
+"""
+CollectionCopier tests.
+"""
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.copier import CollectionCopier, _Checkpoint
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.documentmanager import DocumentManager
+
+DATABASE_NAME = __name__
+SOURCE_COLLECTION_NAME = f"{DATABASE_NAME}_source"
+TARGET_COLLECTION_NAME = f"{DATABASE_NAME}_target"
+DOCUMENT_COUNT = 25
+
+client = CosmosDbEmulatorClient()
+
+
+class CollectionCopierTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database_manager = DatabaseManager(client)
+        cls.database_manager.create_database(DATABASE_NAME)
+
+        CollectionManager(client).create_collection(
+            SOURCE_COLLECTION_NAME, DATABASE_NAME, partition_key=dict(paths=["/id"])
+        )
+
+        document_manager = DocumentManager(client)
+
+        for i in range(DOCUMENT_COUNT):
+            document_manager.upsert_document(
+                dict(id=f"doc-{i}", owner_id=f"owner-{i % 3}", quantity=i),
+                SOURCE_COLLECTION_NAME,
+                DATABASE_NAME,
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database_manager.delete_database(DATABASE_NAME)
+
+    def setUp(self):
+        self.collection_manager = CollectionManager(client)
+        self.document_manager = DocumentManager(client)
+
+    def tearDown(self):
+        if self.collection_manager.get_collection(
+            TARGET_COLLECTION_NAME, DATABASE_NAME
+        ):
+            self.collection_manager.delete_collection(
+                TARGET_COLLECTION_NAME, DATABASE_NAME
+            )
+
+    def test_copy_with_new_partition_key(self):
+        copier = CollectionCopier(
+            client, max_item_count=10, max_request_units_per_second=1000
+        )
+
+        result = copier.copy(
+            SOURCE_COLLECTION_NAME,
+            DATABASE_NAME,
+            TARGET_COLLECTION_NAME,
+            partition_key=dict(paths=["/owner_id"]),
+        )
+
+        self.assertTrue(result.verified)
+        self.assertEqual(DOCUMENT_COUNT, result.target_count)
+
+        document = self.document_manager.get_document(
+            "doc-4", TARGET_COLLECTION_NAME, DATABASE_NAME, partition_key="owner-1"
+        )
+        self.assertEqual(4, document.native_resource["quantity"])
+
+    def test_copy_with_transform(self):
+        def transform(document: dict) -> dict:
+            if document["quantity"] % 5 == 0:
+                return None
+
+            return dict(document, quantity=document["quantity"] * 2)
+
+        result = CollectionCopier(client).copy(
+            SOURCE_COLLECTION_NAME,
+            DATABASE_NAME,
+            TARGET_COLLECTION_NAME,
+            partition_key=dict(paths=["/owner_id"]),
+            transform=transform,
+        )
+
+        self.assertTrue(result.verified)
+        self.assertEqual(5, result.skipped_count)
+        self.assertEqual(DOCUMENT_COUNT - 5, result.target_count)
+
+    def test_copy_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, "checkpoint.json")
+            copier = CollectionCopier(client, max_item_count=10)
+
+            copier.copy(
+                SOURCE_COLLECTION_NAME,
+                DATABASE_NAME,
+                TARGET_COLLECTION_NAME,
+                checkpoint_path=checkpoint_path,
+            )
+
+            with open(checkpoint_path, "r", encoding="utf-8") as file:
+                partition_key_ranges = json.load(file)["partition_key_ranges"]
+
+            self.assertTrue(all(r["done"] for r in partition_key_ranges.values()))
+
+            result = copier.copy(
+                SOURCE_COLLECTION_NAME,
+                DATABASE_NAME,
+                TARGET_COLLECTION_NAME,
+                checkpoint_path=checkpoint_path,
+            )
+
+        self.assertTrue(result.verified)
+        self.assertEqual(DOCUMENT_COUNT, result.copied_count)
+
+
+class CheckpointTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.directory.name, "checkpoint.json")
+        self.checkpoint = _Checkpoint(self.checkpoint_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_children_of_a_copied_range_are_skipped(self):
+        self.checkpoint.save("0", None, 10, 1)
+        self.checkpoint.reconcile(
+            [dict(id="1", parents=["0"]), dict(id="2", parents=["0"])]
+        )
+
+        checkpoint = _Checkpoint(self.checkpoint_path)
+
+        self.assertTrue(checkpoint.is_done("1"))
+        self.assertTrue(checkpoint.is_done("2"))
+        self.assertEqual([10, 1], checkpoint.get_counts())
+
+    def test_children_of_a_partly_copied_range_are_copied_and_counted_once(self):
+        self.checkpoint.save("0", "continuation", 4, 0)
+        self.checkpoint.reconcile(
+            [dict(id="1", parents=["0"]), dict(id="2", parents=["0"])]
+        )
+
+        self.assertFalse(self.checkpoint.is_done("1"))
+        self.assertIsNone(self.checkpoint.get_continuation("1"))
+        self.assertEqual([0, 0], self.checkpoint.get_counts())
+
+        self.checkpoint.save("1", None, 6, 0)
+        self.checkpoint.save("2", None, 4, 0)
+
+        self.assertEqual([10, 0], self.checkpoint.get_counts())
+
+    def test_unchanged_ranges_resume(self):
+        self.checkpoint.save("0", "continuation", 4, 0)
+        self.checkpoint.reconcile([dict(id="0", parents=[])])
+
+        self.assertEqual("continuation", self.checkpoint.get_continuation("0"))
+        self.assertEqual([4, 0], self.checkpoint.get_counts())
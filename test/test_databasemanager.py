@@ -49,3 +49,32 @@ class DatabaseManagerTests(TestCase):
 
     def test_find_database_when_not_exists_returns_none(self):
         self.assertIsNone(self.database_manager.get_database("foo"))
+
+    def test_ensure_database(self):
+        operations = []
+
+        def listener(record):
+            operations.append(record.operation)
+
+        try:
+            self.assertTrue(self.database_manager.ensure_database("foo"))
+
+            client.add_listener(listener)
+            self.assertFalse(self.database_manager.ensure_database("foo"))
+            self.assertEqual([], operations)
+
+            self.assertEqual(
+                "foo", self.database_manager.get_database("foo").resource_id
+            )
+        finally:
+            client.remove_listener(listener)
+            self.database_manager.delete_database("foo")
+
+    def test_ensure_database_after_delete_creates_database(self):
+        try:
+            self.database_manager.ensure_database("foo")
+            self.database_manager.delete_database("foo")
+
+            self.assertTrue(self.database_manager.ensure_database("foo"))
+        finally:
+            self.database_manager.delete_database("foo")
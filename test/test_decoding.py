@@ -0,0 +1,116 @@
+"""
+Typed decoding tests.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from unittest import TestCase
+
+from pycosmosdal.decoding import get_decoder
+
+
+@dataclass
+class LineItem:
+    sku: str
+    price: float = 0.0
+
+
+@dataclass
+class Order:
+    id: str
+    items: List[LineItem]
+    timestamp: int = field(default=0, metadata=dict(cosmos_name="_ts"))
+    note: Optional[str] = None
+    shipping: Optional[LineItem] = None
+    discounts: Dict[str, LineItem] = field(default_factory=dict)
+
+
+@dataclass
+class Category:
+    name: str
+    children: List["Category"] = field(default_factory=list)
+
+
+@dataclass
+class Employee:
+    name: str
+    department: Optional["Department"] = None
+
+
+@dataclass
+class Department:
+    name: str
+    manager: Optional[Employee] = None
+
+
+class DecodingTests(TestCase):
+    def test_decode_nested_fields_and_renames(self):
+        order = get_decoder(Order)(
+            dict(
+                id="1",
+                items=[dict(sku="a", price=2.5)],
+                shipping=dict(sku="s"),
+                discounts=dict(spring=dict(sku="d", price=1)),
+                _ts=1589500000,
+                _etag="ignored",
+            )
+        )
+
+        self.assertEqual(
+            Order(
+                "1",
+                [LineItem("a", 2.5)],
+                1589500000,
+                None,
+                LineItem("s"),
+                dict(spring=LineItem("d", 1)),
+            ),
+            order,
+        )
+
+    def test_decode_recursive_dataclass(self):
+        category = get_decoder(Category)(
+            dict(name="root", children=[dict(name="child")])
+        )
+
+        self.assertEqual(Category("root", [Category("child")]), category)
+
+    def test_decode_mutually_recursive_dataclasses(self):
+        employee = get_decoder(Employee)(
+            dict(
+                name="a",
+                department=dict(name="b", manager=dict(name="c", department=None)),
+            )
+        )
+
+        self.assertEqual(
+            Employee("a", Department("b", Employee("c"))),
+            employee,
+        )
+        self.assertEqual(
+            Department("b", Employee("c", Department("d"))),
+            get_decoder(Department)(
+                dict(name="b", manager=dict(name="c", department=dict(name="d")))
+            ),
+        )
+
+    def test_decoder_is_cached(self):
+        self.assertIs(get_decoder(Order), get_decoder(Order))
+
+    def test_missing_required_field_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            get_decoder(Order)(dict(items=[]))
+
+    def test_validate_raises_ValueError_on_wrong_type(self):
+        with self.assertRaises(ValueError):
+            get_decoder(Order, validate=True)(dict(id=1, items=[]))
+
+        self.assertEqual(
+            [LineItem("a", 1)],
+            get_decoder(Order, validate=True)(
+                dict(id="1", items=[dict(sku="a", price=1)])
+            ).items,
+        )
+
+    def test_non_dataclass_raises_TypeError(self):
+        with self.assertRaises(TypeError):
+            get_decoder(dict)
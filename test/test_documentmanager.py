@@ -5,10 +5,13 @@ from datetime import date
 from unittest import TestCase
 
 from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.compression import COMPRESSED_FIELD_MARKER, FieldCompressionCodec
 from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
 from pycosmosdal.databasemanager import DatabaseManager
 from pycosmosdal.documentmanager import DocumentManager
 from pycosmosdal.errors import DocumentError
+from pycosmosdal.hedging import HedgingPolicy
+from pycosmosdal.querybuilder import QueryBuilder
 
 DATABASE_NAME = __name__
 COLLECTION_NAME = f"{DATABASE_NAME}_container"
@@ -177,6 +180,115 @@ class DocumentManagerTests(TestCase):
                 "foobar", COLLECTION_NAME, DATABASE_NAME
             )
 
+    def test_query_documents_with_query_builder(self):
+        try:
+            for i in range(0, 3):
+                self.document_manager.upsert_document(
+                    DocumentManagerTests.get_test_document(f"foobar-{i}"),
+                    COLLECTION_NAME,
+                    DATABASE_NAME,
+                )
+
+            query = (
+                QueryBuilder()
+                .select("subtotal", "items")
+                .where("id", "IN", ["foobar-0", "foobar-2"])
+                .where("subtotal", ">", 400)
+                .order_by("id")
+            )
+
+            documents = self.document_manager.query_documents(
+                COLLECTION_NAME, DATABASE_NAME, query
+            ).fetch_next()
+
+            self.assertEqual(
+                ["foobar-0", "foobar-2"], [d.resource_id for d in documents]
+            )
+            self.assertEqual(
+                {"id", "subtotal", "items"}, set(documents[0].native_resource)
+            )
+        finally:
+            for i in range(0, 3):
+                self.document_manager.delete_document(
+                    f"foobar-{i}", COLLECTION_NAME, DATABASE_NAME
+                )
+
+    def test_upsert_get_document_with_codec(self):
+        document_manager = DocumentManager(
+            client, FieldCompressionCodec(["items"], threshold=10)
+        )
+
+        try:
+            document = DocumentManagerTests.get_test_document("foobar")
+            document_manager.upsert_document(document, COLLECTION_NAME, DATABASE_NAME)
+
+            stored_document = self.document_manager.get_document(
+                "foobar", COLLECTION_NAME, DATABASE_NAME
+            )
+            self.assertIn(
+                COMPRESSED_FIELD_MARKER, stored_document.native_resource["items"]
+            )
+
+            query_result = document_manager.query_documents(
+                COLLECTION_NAME, DATABASE_NAME, "SELECT * FROM r WHERE r.id='foobar'",
+            )
+            self.assertEqual(
+                document["items"], query_result.fetch_next()[0].native_resource["items"]
+            )
+        finally:
+            self.document_manager.delete_document(
+                "foobar", COLLECTION_NAME, DATABASE_NAME
+            )
+
+    def test_get_document_with_hedging_policy(self):
+        hedging_policy = HedgingPolicy(initial_delay=0, min_samples=0)
+        document_manager = DocumentManager(client, hedging_policy=hedging_policy)
+
+        try:
+            self.document_manager.upsert_document(
+                DocumentManagerTests.get_test_document("foobar"),
+                COLLECTION_NAME,
+                DATABASE_NAME,
+            )
+
+            for _ in range(10):
+                document = document_manager.get_document(
+                    "foobar", COLLECTION_NAME, DATABASE_NAME
+                )
+                self.assertEqual("foobar", document.resource_id)
+
+            self.assertGreaterEqual(hedging_policy.read_count, 10)
+            self.assertGreater(hedging_policy.read_request_charge, 0)
+        finally:
+            hedging_policy.close()
+            self.document_manager.delete_document(
+                "foobar", COLLECTION_NAME, DATABASE_NAME
+            )
+
+    def test_get_document_when_timeout_expires_raises_DocumentError(self):
+        try:
+            self.document_manager.get_document(
+                "foobar", COLLECTION_NAME, DATABASE_NAME, timeout=0
+            )
+            self.fail("DocumentError not raised")
+        except DocumentError as e:
+            self.assertEqual(408, e.status_code)
+
+    def test_query_results_after_a_timeout_raise_DocumentError(self):
+        query_results = self.document_manager.query_documents(
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            "SELECT * FROM c",
+            enable_cross_partition_query=True,
+            timeout=0,
+        )
+
+        for _ in range(2):
+            with self.assertRaises(DocumentError) as context:
+                query_results.fetch_next()
+
+            self.assertEqual(408, context.exception.status_code)
+
     @staticmethod
     def get_test_document(document_id: str) -> dict:
         return {
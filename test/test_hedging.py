@@ -0,0 +1,123 @@
+"""
+HedgingPolicy tests.
+"""
+import threading
+import time
+from unittest import TestCase
+
+from azure.cosmos.errors import HTTPFailure
+
+from pycosmosdal.hedging import HedgingPolicy
+
+
+class HedgingPolicyTests(TestCase):
+    def setUp(self):
+        self.hedging_policy = HedgingPolicy(
+            initial_delay=0.01, min_samples=0, max_extra_request_charge_ratio=1.0
+        )
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.hedging_policy.close()
+
+    def read_function(self, *results):
+        """
+        Creates a read function whose calls sleep and return, or raise, the next of the given results.
+        """
+
+        def read():
+            with self.lock:
+                sleep, result = results[len(self.calls) % len(results)]
+                self.calls.append(result)
+
+            time.sleep(sleep)
+
+            if isinstance(result, Exception):
+                raise result
+
+            return result
+
+        return read
+
+    def test_first_read_without_samples(self):
+        read = self.read_function((0, "foobar"))
+
+        self.assertEqual(0.01, self.hedging_policy.delay)
+        self.assertEqual("foobar", self.hedging_policy.execute(read))
+        self.assertEqual(0, self.hedging_policy.hedged_read_count)
+
+    def test_no_hedge_before_a_request_charge_is_recorded(self):
+        read = self.read_function((0.1, "primary"), (0, "hedge"))
+
+        self.assertEqual("primary", self.hedging_policy.execute(read))
+        self.assertEqual(1, len(self.calls))
+
+    def test_hedge_is_sent_after_the_delay(self):
+        self.hedging_policy.record_request_charge(1.0)
+        read = self.read_function((0.5, "primary"), (0, "hedge"))
+
+        start = time.perf_counter()
+        self.assertEqual("hedge", self.hedging_policy.execute(read))
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(["primary", "hedge"], self.calls)
+        self.assertEqual(1, self.hedging_policy.hedged_read_count)
+        self.assertEqual(1.0, self.hedging_policy.hedged_request_charge)
+
+    def test_budget_stops_further_hedges(self):
+        self.hedging_policy.record_request_charge(1.0)
+        read = self.read_function((0.2, "foobar"))
+        results = []
+
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.hedging_policy.execute(read))
+            )
+            for _ in range(3)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(["foobar"] * 3, results)
+        self.assertEqual(1, self.hedging_policy.hedged_read_count)
+        self.assertEqual(4, len(self.calls))
+
+    def test_first_success_wins(self):
+        self.hedging_policy.record_request_charge(1.0)
+        read = self.read_function((0.1, HTTPFailure(503, "foobar")), (0.2, "hedge"))
+
+        self.assertEqual("hedge", self.hedging_policy.execute(read))
+
+    def test_error_is_raised_when_all_reads_fail(self):
+        self.hedging_policy.record_request_charge(1.0)
+        read = self.read_function((0.1, HTTPFailure(503, "foobar")))
+
+        with self.assertRaises(HTTPFailure) as context:
+            self.hedging_policy.execute(read)
+
+        self.assertEqual(503, context.exception.status_code)
+        self.assertEqual(2, len(self.calls))
+
+    def test_timeout_raises_408(self):
+        self.hedging_policy.record_request_charge(1.0)
+        read = self.read_function((0.5, "foobar"))
+
+        with self.assertRaises(HTTPFailure) as context:
+            self.hedging_policy.execute(read, timeout=0.1)
+
+        self.assertEqual(408, context.exception.status_code)
+        self.assertEqual(2, len(self.calls))
+
+    def test_timeout_shorter_than_the_delay_raises_408(self):
+        read = self.read_function((0.5, "foobar"))
+
+        with self.assertRaises(HTTPFailure) as context:
+            self.hedging_policy.execute(read, timeout=0.005)
+
+        self.assertEqual(408, context.exception.status_code)
+        self.assertEqual(1, len(self.calls))
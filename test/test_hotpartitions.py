@@ -0,0 +1,122 @@
+"""
+HotPartitionAnalyzer tests.
+"""
+import os
+import tempfile
+from unittest import TestCase
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.hotpartitions import HotPartitionAnalyzer, HotPartitionReport
+from pycosmosdal.recorder import OperationRecorder, read_trace
+
+DATABASE_NAME = __name__
+COLLECTION_NAME = f"{DATABASE_NAME}_container"
+
+client = CosmosDbEmulatorClient()
+
+
+class HotPartitionAnalyzerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database_manager = DatabaseManager(client)
+        cls.database_manager.create_database(DATABASE_NAME)
+
+        CollectionManager(client).create_collection(
+            COLLECTION_NAME, DATABASE_NAME, partition_key=dict(paths=["/owner_id"])
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database_manager.delete_database(DATABASE_NAME)
+
+    def setUp(self):
+        self.document_manager = DocumentManager(client)
+        self.analyzer = HotPartitionAnalyzer(
+            self.document_manager,
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            "/owner_id",
+            sample_rate=1.0,
+        )
+
+    def test_sampling_hook_ranks_hot_partition_key_first(self):
+        self.analyzer.start()
+
+        try:
+            self.run_workload()
+        finally:
+            self.analyzer.stop()
+
+        report = self.analyzer.get_report()
+        hot_partition_key = report.partition_keys[0]
+
+        self.assertEqual("hot", hot_partition_key.partition_key)
+        self.assertEqual(9, hot_partition_key.write_count)
+        self.assertEqual(9, hot_partition_key.read_count)
+        self.assertEqual(9, hot_partition_key.document_count)
+        self.assertGreater(report.write_skew, 1)
+        self.assertGreater(report.read_skew, 1)
+
+    def test_add_trace(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.jsonl.gz")
+            recorder = OperationRecorder(path)
+            client.add_listener(recorder)
+
+            try:
+                self.run_workload()
+            finally:
+                client.remove_listener(recorder)
+                recorder.close()
+
+            self.analyzer.add_trace(read_trace(path))
+
+        report = self.analyzer.get_report()
+
+        self.assertEqual("hot", report.partition_keys[0].partition_key)
+        self.assertEqual(4, len(report.partition_keys))
+
+    def test_sample_documents(self):
+        self.run_workload()
+        self.analyzer.sample_documents(max_item_count=5)
+
+        report = self.analyzer.get_report()
+
+        self.assertEqual(
+            "hot",
+            max(report.partition_keys, key=lambda s: s.document_count).partition_key,
+        )
+        self.assertGreater(report.size_skew, 1)
+
+    def test_sample_documents_scales_the_sample_up(self):
+        self.run_workload()
+        self.analyzer.sample_documents(max_documents=6, max_item_count=2)
+
+        report = self.analyzer.get_report()
+
+        self.assertAlmostEqual(
+            12, sum(s.document_count for s in report.partition_keys), delta=1
+        )
+        self.assertTrue(any(s.estimated for s in report.partition_keys))
+        self.assertIn("(estimated)", str(report))
+
+    def test_get_skew(self):
+        self.assertEqual(1.0, HotPartitionReport.get_skew([2, 2, 2]))
+        self.assertEqual(3.0, HotPartitionReport.get_skew([3, 0, 0]))
+        self.assertEqual(0.0, HotPartitionReport.get_skew([0, 0]))
+
+    def run_workload(self):
+        for i in range(12):
+            owner_id = "hot" if i % 4 else f"cold-{i}"
+
+            self.document_manager.upsert_document(
+                dict(id=f"doc-{i}", owner_id=owner_id, quantity=i),
+                COLLECTION_NAME,
+                DATABASE_NAME,
+            )
+            self.document_manager.get_document(
+                f"doc-{i}", COLLECTION_NAME, DATABASE_NAME, partition_key=owner_id
+            )
@@ -0,0 +1,120 @@
+"""
+IndexAdvisor tests.
+"""
+from unittest import TestCase
+
+from pycosmosdal.diagnostics import OperationRecord, QueryMetrics
+from pycosmosdal.indexadvisor import IndexAdvisor
+
+QUERY = "SELECT * FROM c WHERE c.owner_id = @owner_id ORDER BY c.created DESC"
+
+
+class IndexAdvisorTests(TestCase):
+    def test_parse_query_metrics(self):
+        query_metrics = QueryMetrics.parse(
+            "totalExecutionTimeInMs=1.50;retrievedDocumentCount=100;outputDocumentCount=25;"
+            "indexUtilizationRatio=0.50",
+            10.0,
+        )
+
+        self.assertEqual(1.5, query_metrics.total_execution_time)
+        self.assertEqual(100, query_metrics.retrieved_document_count)
+        self.assertEqual(25, query_metrics.output_document_count)
+        self.assertEqual(0.5, query_metrics.index_hit_ratio)
+        self.assertEqual(0.75, query_metrics.wasted_ratio)
+
+    def test_parse_query(self):
+        alias, filters, order_by, properties = IndexAdvisor.parse_query(
+            "SELECT r.id FROM root r WHERE r.owner_id = @owner_id AND r.address['city'] >= @city "
+            "ORDER BY r.created DESC"
+        )
+
+        self.assertEqual("r", alias)
+        self.assertEqual([("/owner_id", "="), ("/address/city", "range")], filters)
+        self.assertEqual([("/created", "descending")], order_by)
+        self.assertEqual({"id", "owner_id", "address", "created"}, properties)
+
+    def test_composite_index_is_recommended_for_wasteful_queries(self):
+        advisor = IndexAdvisor("collection", "database")
+        advisor.add_query(
+            QUERY,
+            [
+                QueryMetrics(
+                    dict(retrievedDocumentCount=100, outputDocumentCount=10), 50.0
+                )
+            ],
+        )
+        recommendations = advisor.get_recommendations()
+
+        self.assertEqual(1, len(recommendations))
+        self.assertEqual("composite_index", recommendations[0].kind)
+        self.assertEqual(
+            [
+                dict(path="/owner_id", order="ascending"),
+                dict(path="/created", order="descending"),
+            ],
+            recommendations[0].paths,
+        )
+        self.assertAlmostEqual(
+            45.0, recommendations[0].estimated_request_charge_savings
+        )
+
+    def test_existing_composite_index_isnt_recommended(self):
+        advisor = IndexAdvisor(
+            "collection",
+            "database",
+            indexing_policy=dict(
+                compositeIndexes=[
+                    [
+                        dict(path="/owner_id", order="descending"),
+                        dict(path="/created", order="ascending"),
+                    ]
+                ]
+            ),
+        )
+        advisor.add_query(
+            QUERY,
+            [
+                QueryMetrics(
+                    dict(retrievedDocumentCount=100, outputDocumentCount=10), 50
+                )
+            ],
+        )
+
+        self.assertEqual([], advisor.get_recommendations())
+
+    def test_unqueried_properties_are_recommended_as_excluded_paths(self):
+        advisor = IndexAdvisor("collection", "database", partition_key_path="/tenant")
+        advisor.add_query(QUERY, [])
+        advisor.add_write(
+            dict(
+                id="1",
+                tenant="a",
+                owner_id="b",
+                created=1,
+                payload=dict(lines=[1, 2, 3]),
+                note="c",
+            ),
+            10.0,
+        )
+        recommendations = advisor.get_recommendations()
+
+        self.assertEqual(
+            [["/payload/*"], ["/note/?"]], [r.paths for r in recommendations]
+        )
+        self.assertTrue(all(r.kind == "excluded_path" for r in recommendations))
+
+    def test_queries_without_metrics_read_their_properties(self):
+        advisor = IndexAdvisor("collection", "database")
+        advisor(
+            OperationRecord(
+                "FetchNextBlock",
+                "dbs/database/colls/collection",
+                0.01,
+                arguments=("dbs/database/colls/collection", dict(query=QUERY), {}),
+            )
+        )
+        advisor.add_write(dict(id="1", owner_id="a", created=1, note="b"), 10.0)
+        recommendations = advisor.get_recommendations()
+
+        self.assertEqual([["/note/?"]], [r.paths for r in recommendations])
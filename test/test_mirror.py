@@ -0,0 +1,127 @@
+"""
+CollectionMirror tests.
+"""
+import time
+from dataclasses import dataclass
+from unittest import TestCase
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.disposable import Disposable
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.mirror import CollectionMirror
+
+DATABASE_NAME = __name__
+COLLECTION_NAME = f"{DATABASE_NAME}_container"
+
+client = CosmosDbEmulatorClient()
+
+
+@dataclass
+class Tenant:
+    id: str
+    tenant_id: int
+
+
+class CollectionMirrorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database_manager = DatabaseManager(client)
+        cls.database_manager.create_database(DATABASE_NAME)
+
+        CollectionManager(client).create_collection(
+            COLLECTION_NAME, DATABASE_NAME, partition_key=dict(paths=["/tenant_id"])
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database_manager.delete_database(DATABASE_NAME)
+
+    def setUp(self):
+        self.document_manager = DocumentManager(client)
+
+        for i in range(10):
+            self.document_manager.upsert_document(
+                dict(
+                    id=str(i),
+                    tenant_id=f"tenant{i % 2}",
+                    plan=dict(name="pro" if i < 3 else "free"),
+                ),
+                COLLECTION_NAME,
+                DATABASE_NAME,
+            )
+
+    def create_mirror(self, **kwargs) -> CollectionMirror:
+        return CollectionMirror(
+            self.document_manager,
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            indexes=["tenant_id", "plan.name"],
+            poll_interval=None,
+            **kwargs,
+        )
+
+    def test_reads_are_served_from_the_mirror(self):
+        with Disposable(self.create_mirror()) as mirror:
+            self.assertEqual(10, len(mirror))
+            self.assertEqual("tenant1", mirror.get("3").native_resource["tenant_id"])
+            self.assertEqual(
+                {"0", "2", "4", "6", "8"},
+                {d.resource_id for d in mirror.find("tenant_id", "tenant0")},
+            )
+            self.assertEqual(3, len(mirror.find("plan.name", "pro")))
+            self.assertIsNone(mirror.find_one("plan.name", "enterprise"))
+            self.assertIsNotNone(mirror.staleness)
+            self.assertEqual(1, mirror.reload_count)
+
+    def test_refresh_applies_the_changed_documents(self):
+        with Disposable(self.create_mirror()) as mirror:
+            self.assertEqual(3, len(mirror.find("plan.name", "pro")))
+
+            self.document_manager.upsert_document(
+                dict(id="9", tenant_id="tenant1", plan=dict(name="pro")),
+                COLLECTION_NAME,
+                DATABASE_NAME,
+            )
+            mirror.refresh()
+
+            self.assertEqual(4, len(mirror.find("plan.name", "pro")))
+            self.assertEqual(6, len(mirror.find("plan.name", "free")))
+            self.assertEqual(1, mirror.poll_count)
+
+    def test_reload_drops_the_deleted_documents(self):
+        with Disposable(self.create_mirror(reload_interval=0)) as mirror:
+            self.assertIsNotNone(mirror.get("5", partition_key="tenant1"))
+
+            self.document_manager.delete_document(
+                "5", COLLECTION_NAME, DATABASE_NAME, partition_key="tenant1"
+            )
+            mirror.refresh()
+
+            self.assertIsNone(mirror.get("5", partition_key="tenant1"))
+            self.assertEqual(9, len(mirror))
+
+    def test_errors_are_stored_and_polling_continues(self):
+        mirror = CollectionMirror(
+            self.document_manager,
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            poll_interval=0.05,
+            model_type=Tenant,
+            validate_model=True,
+        )
+
+        try:
+            for _ in range(2):
+                mirror.last_error = None
+                deadline = time.monotonic() + 10
+
+                while mirror.last_error is None and time.monotonic() < deadline:
+                    time.sleep(0.05)
+
+                self.assertIsInstance(mirror.last_error, ValueError)
+
+            self.assertIsNone(mirror.staleness)
+        finally:
+            mirror.close()
@@ -0,0 +1,48 @@
+"""
+AdaptivePageSizer tests.
+"""
+from unittest import TestCase
+
+from pycosmosdal.pagesizing import AdaptivePageSizer
+
+
+class AdaptivePageSizerTests(TestCase):
+    def test_full_pages_within_targets_grow_the_page_size(self):
+        page_sizer = AdaptivePageSizer(initial_page_size=100, max_page_size=300)
+
+        self.assertEqual(200, page_sizer.record_page(100, 0.01, 100))
+        self.assertEqual(300, page_sizer.record_page(200, 0.02, 200))
+        self.assertEqual(["growth", "growth"], [d.reason for d in page_sizer.decisions])
+
+    def test_partial_pages_keep_the_page_size(self):
+        page_sizer = AdaptivePageSizer(initial_page_size=100)
+
+        self.assertEqual(100, page_sizer.record_page(40, 0.01, 40))
+        self.assertEqual([], page_sizer.decisions)
+
+    def test_throttled_pages_shrink_the_page_size(self):
+        page_sizer = AdaptivePageSizer(initial_page_size=100, min_page_size=30)
+
+        self.assertEqual(50, page_sizer.record_page(100, 0.01, 100, throttled=True))
+        self.assertEqual(30, page_sizer.record_page(50, 0.01, 50, throttled=True))
+        self.assertEqual("throttled", page_sizer.decisions[-1].reason)
+
+    def test_slow_pages_shrink_the_page_size_to_the_target_duration(self):
+        page_sizer = AdaptivePageSizer(initial_page_size=100, target_page_duration=0.5)
+
+        self.assertEqual(50, page_sizer.record_page(100, 1.0, 100))
+        self.assertEqual("duration", page_sizer.decisions[0].reason)
+
+    def test_large_pages_shrink_the_page_size_to_the_max_page_bytes(self):
+        page_sizer = AdaptivePageSizer(
+            initial_page_size=100, min_page_size=1, max_page_bytes=10000
+        )
+
+        self.assertEqual(
+            20, page_sizer.record_page(100, 0.01, 100, response_bytes=50000)
+        )
+        self.assertEqual("response_bytes", page_sizer.decisions[0].reason)
+
+    def test_invalid_page_sizes_raise_ValueError(self):
+        with self.assertRaises(ValueError):
+            AdaptivePageSizer(initial_page_size=5, min_page_size=10)
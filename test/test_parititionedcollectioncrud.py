@@ -9,6 +9,7 @@ from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
 from pycosmosdal.databasemanager import DatabaseManager
 from pycosmosdal.documentmanager import DocumentManager
 from pycosmosdal.errors import DocumentError
+from pycosmosdal.querybuilder import QueryBuilder
 
 DATABASE_NAME = __name__
 PARTITIONED_COLLECTION_NAME = f"{DATABASE_NAME}_container_partitioned"
@@ -113,6 +114,156 @@ class PartitionedCollectionCrudTests(TestCase):
 
         self.assertEqual(document_id, document.resource_id)
 
+    def test_partitioned_collection_id_query_uses_point_read(self):
+        document_id = str(1)
+        operations = []
+
+        self.document_manager.upsert_document(
+            PartitionedCollectionCrudTests.get_test_document(document_id),
+            PARTITIONED_COLLECTION_NAME,
+            DATABASE_NAME,
+        )
+
+        def listener(record):
+            operations.append(record.operation)
+
+        client.add_listener(listener)
+
+        try:
+            query_result = self.document_manager.query_documents(
+                PARTITIONED_COLLECTION_NAME,
+                DATABASE_NAME,
+                "SELECT * FROM r WHERE r.id=@id",
+                [dict(name="@id", value=document_id)],
+                partition_key=document_id,
+            )
+
+            documents = query_result.fetch_next()
+            self.assertEqual([], query_result.fetch_next())
+        finally:
+            client.remove_listener(listener)
+
+        self.assertEqual([document_id], [d.resource_id for d in documents])
+        self.assertEqual(["PointReadQuery", "PointReadQuery"], operations)
+
+    def test_partitioned_collection_id_query_when_document_missing_returns_no_documents(
+        self,
+    ):
+        query_result = self.document_manager.query_documents(
+            PARTITIONED_COLLECTION_NAME,
+            DATABASE_NAME,
+            "SELECT * FROM r WHERE r.id='missing'",
+            partition_key="missing",
+        )
+
+        self.assertEqual([], query_result.fetch_next())
+
+    def test_partitioned_collection_delete_documents(self):
+        for document_id in ("delete1", "delete2", "keep1"):
+            self.document_manager.upsert_document(
+                PartitionedCollectionCrudTests.get_test_document(document_id),
+                PARTITIONED_COLLECTION_NAME,
+                DATABASE_NAME,
+            )
+
+        query = "SELECT * FROM r WHERE STARTSWITH(r.id, @prefix)"
+        parameters = [dict(name="@prefix", value="delete")]
+        progress = []
+
+        result = self.document_manager.delete_documents(
+            PARTITIONED_COLLECTION_NAME,
+            DATABASE_NAME,
+            query,
+            parameters,
+            max_item_count=1,
+            progress=progress.append,
+        )
+
+        self.assertEqual(2, result.deleted_count)
+        self.assertEqual(2, len(progress))
+        self.assertRaises(
+            DocumentError,
+            self.document_manager.get_document,
+            "delete1",
+            PARTITIONED_COLLECTION_NAME,
+            DATABASE_NAME,
+            partition_key="delete1",
+        )
+        self.assertEqual(
+            "keep1",
+            self.document_manager.get_document(
+                "keep1",
+                PARTITIONED_COLLECTION_NAME,
+                DATABASE_NAME,
+                partition_key="keep1",
+            ).resource_id,
+        )
+        self.assertEqual(
+            0,
+            self.document_manager.delete_documents(
+                PARTITIONED_COLLECTION_NAME, DATABASE_NAME, query, parameters
+            ).matched_count,
+        )
+
+    def test_delete_documents_without_partition_key_value(self):
+        collection_name = f"{PARTITIONED_COLLECTION_NAME}_owner"
+        self.collection_manager.create_collection(
+            collection_name, DATABASE_NAME, partition_key=dict(paths=["/owner"])
+        )
+
+        try:
+            for document in (dict(id="1"), dict(id="2", owner=None)):
+                self.document_manager.upsert_document(
+                    document, collection_name, DATABASE_NAME
+                )
+
+            result = self.document_manager.delete_documents(
+                collection_name, DATABASE_NAME, "SELECT * FROM c"
+            )
+
+            self.assertEqual(2, result.deleted_count)
+            self.assertEqual(0, result.missing_count)
+            self.assertEqual(
+                [],
+                self.document_manager.query_documents(
+                    collection_name,
+                    DATABASE_NAME,
+                    "SELECT * FROM c",
+                    enable_cross_partition_query=True,
+                ).fetch_next(),
+            )
+        finally:
+            self.collection_manager.delete_collection(collection_name, DATABASE_NAME)
+
+    def test_query_builder_with_falsy_partition_key(self):
+        collection_name = f"{PARTITIONED_COLLECTION_NAME}_shard"
+        self.collection_manager.create_collection(
+            collection_name, DATABASE_NAME, partition_key=dict(paths=["/shard"])
+        )
+
+        try:
+            self.document_manager.upsert_document(
+                dict(id="1", shard=0), collection_name, DATABASE_NAME
+            )
+
+            documents = self.document_manager.query_documents(
+                collection_name,
+                DATABASE_NAME,
+                QueryBuilder("/shard").where("shard", "=", 0),
+            ).fetch_next()
+
+            self.assertEqual(["1"], [d.resource_id for d in documents])
+        finally:
+            self.collection_manager.delete_collection(collection_name, DATABASE_NAME)
+
+    def test_get_delete_query_projects_id_and_partition_key(self):
+        self.assertEqual(
+            'SELECT TOP 10 r.id, r["owner"]["id"] AS partitionKey FROM root r WHERE r.ttl > 0',
+            DocumentManager.get_delete_query(
+                "SELECT TOP 10 * FROM root r WHERE r.ttl > 0", "/owner/id"
+            ),
+        )
+
     @staticmethod
     def get_test_document(document_id: str) -> dict:
         return {
@@ -0,0 +1,87 @@
+"""
+QueryBuilder tests.
+"""
+from unittest import TestCase
+
+from pycosmosdal.querybuilder import QueryBuilder
+
+
+class QueryBuilderTests(TestCase):
+    def test_compile_select_all(self):
+        self.assertEqual(dict(query="SELECT * FROM c"), QueryBuilder().compile())
+
+    def test_compile_projection_always_includes_id(self):
+        query_spec = QueryBuilder().select("subtotal", "address.city").compile()
+
+        self.assertEqual(
+            "SELECT c.id, c.subtotal, c.address.city FROM c", query_spec["query"]
+        )
+
+    def test_compile_predicates(self):
+        query_spec = (
+            QueryBuilder()
+            .where("subtotal", ">=", 400)
+            .where("account_number", "startswith", "Account")
+            .where("status", "IN", ["open", "paid"])
+            .compile()
+        )
+
+        self.assertEqual(
+            "SELECT * FROM c WHERE c.subtotal >= @p0 AND STARTSWITH(c.account_number, @p1) "
+            "AND c.status IN (@p2_0, @p2_1)",
+            query_spec["query"],
+        )
+        self.assertEqual(
+            [
+                dict(name="@p0", value=400),
+                dict(name="@p1", value="Account"),
+                dict(name="@p2_0", value="open"),
+                dict(name="@p2_1", value="paid"),
+            ],
+            query_spec["parameters"],
+        )
+
+    def test_compile_order_by_offset_limit(self):
+        query_spec = (
+            QueryBuilder(alias="r")
+            .order_by("order_date", descending=True)
+            .offset(20)
+            .limit(10)
+            .compile()
+        )
+
+        self.assertEqual(
+            "SELECT * FROM r ORDER BY r.order_date DESC OFFSET @offset LIMIT @limit",
+            query_spec["query"],
+        )
+        self.assertEqual(
+            [dict(name="@offset", value=20), dict(name="@limit", value=10)],
+            query_spec["parameters"],
+        )
+
+    def test_compile_quotes_field_names_that_are_not_identifiers(self):
+        query_spec = QueryBuilder().where("order-date", "=", "2020-05-14").compile()
+        self.assertEqual(
+            'SELECT * FROM c WHERE c["order-date"] = @p0', query_spec["query"]
+        )
+
+    def test_compile_caches_query_text_per_shape(self):
+        first = QueryBuilder().select("subtotal").where("id", "=", "foo").compile()
+        second = QueryBuilder().select("subtotal").where("id", "=", "bar").compile()
+
+        self.assertIs(first["query"], second["query"])
+        self.assertEqual("bar", second["parameters"][0]["value"])
+
+    def test_get_partition_key(self):
+        query = QueryBuilder("/owner/id").where("owner.id", "=", "foobar")
+        self.assertEqual((True, "foobar"), query.get_partition_key())
+
+        query = QueryBuilder("/owner/id").where("owner.id", ">", "foobar")
+        self.assertEqual((False, None), query.get_partition_key())
+
+        query = QueryBuilder().where("owner.id", "=", "foobar")
+        self.assertEqual((False, None), query.get_partition_key())
+
+    def test_where_unsupported_operator_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            QueryBuilder().where("id", "LIKE", "foo%")
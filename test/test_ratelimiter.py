@@ -0,0 +1,29 @@
+"""
+RequestUnitRateLimiter tests.
+"""
+import time
+from unittest import TestCase
+
+from pycosmosdal.ratelimiter import RequestUnitRateLimiter
+
+
+class RequestUnitRateLimiterTests(TestCase):
+    def test_wait_returns_immediately_within_budget(self):
+        rate_limiter = RequestUnitRateLimiter(100)
+        rate_limiter.consume(50)
+
+        self.assertEqual(0.0, rate_limiter.wait())
+
+    def test_wait_blocks_while_budget_is_overdrawn(self):
+        rate_limiter = RequestUnitRateLimiter(100, burst=10)
+        rate_limiter.consume(15)
+
+        start = time.monotonic()
+        rate_limiter.wait()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        self.assertEqual(15, rate_limiter.consumed_request_charge)
+
+    def test_invalid_budget_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            RequestUnitRateLimiter(0)
@@ -0,0 +1,139 @@
+"""
+OperationRecorder and WorkloadReplayer tests.
+"""
+import os
+import tempfile
+from unittest import TestCase
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.diagnostics import OperationRecord
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.recorder import OperationRecorder, read_trace
+from pycosmosdal.replay import WorkloadReplayer, main
+
+DATABASE_NAME = __name__
+COLLECTION_NAME = f"{DATABASE_NAME}_container"
+
+client = CosmosDbEmulatorClient()
+
+
+class OperationRecorderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database_manager = DatabaseManager(client)
+        cls.database_manager.create_database(DATABASE_NAME)
+
+        CollectionManager(client).create_collection(COLLECTION_NAME, DATABASE_NAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database_manager.delete_database(DATABASE_NAME)
+
+    def setUp(self):
+        self.document_manager = DocumentManager(client)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "trace.jsonl.gz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record_operations(self):
+        self.record_workload()
+
+        entries = list(read_trace(self.path))
+        operations = [e["operation"] for e in entries]
+
+        self.assertEqual(["UpsertItem"] * 5 + ["ReadItem"] * 5, operations[:10])
+        self.assertIn("FetchNextBlock", operations)
+
+        read = entries[5]
+        self.assertEqual(read["resource_link"], read["arguments"][0])
+        self.assertGreater(read["request_charge"], 0)
+        self.assertGreater(read["result_size"], 0)
+        self.assertIsNone(read["status_code"])
+
+    def test_record_without_arguments(self):
+        recorder = OperationRecorder(self.path, record_arguments=False)
+        client.add_listener(recorder)
+
+        try:
+            self.document_manager.upsert_document(
+                dict(id="foobar"), COLLECTION_NAME, DATABASE_NAME
+            )
+        finally:
+            client.remove_listener(recorder)
+            recorder.close()
+
+        entries = list(read_trace(self.path))
+
+        self.assertEqual(1, len(entries))
+        self.assertNotIn("arguments", entries[0])
+
+    def test_replay(self):
+        self.record_workload()
+
+        report = WorkloadReplayer(client, speed=10, concurrency=4).replay(
+            read_trace(self.path)
+        )
+
+        self.assertEqual(11, report.operation_count)
+        self.assertEqual(0, report.error_count)
+        self.assertGreater(report.request_charge, 0)
+        self.assertGreater(report.get_latency_percentile(99, "ReadItem"), 0)
+
+    def test_replay_read_only(self):
+        self.record_workload()
+
+        report = WorkloadReplayer(client, speed=10, read_only=True).replay(
+            read_trace(self.path)
+        )
+
+        self.assertEqual(6, report.operation_count)
+        self.assertEqual(5, report.skipped_count)
+
+    def test_record_operation_that_cannot_be_serialized(self):
+        arguments = []
+        arguments.append(arguments)
+        recorder = OperationRecorder(self.path)
+
+        recorder(OperationRecord("ReadItem", "foobar", 0.1, arguments=(arguments,)))
+        recorder(OperationRecord("ReadItem", "foobar", 0.1))
+        recorder.close()
+
+        self.assertEqual(1, recorder.record_count)
+        self.assertIsInstance(recorder.last_error, ValueError)
+        self.assertEqual(1, len(list(read_trace(self.path))))
+
+    def test_replay_requires_host_and_master_key_together(self):
+        with self.assertRaises(SystemExit):
+            main([self.path, "--host", "https://localhost:8081"])
+
+        with self.assertRaises(SystemExit):
+            main([self.path, "--master-key", "foobar"])
+
+    def record_workload(self):
+        recorder = OperationRecorder(self.path)
+        client.add_listener(recorder)
+
+        try:
+            for i in range(5):
+                self.document_manager.upsert_document(
+                    dict(id=f"foobar-{i}", quantity=i), COLLECTION_NAME, DATABASE_NAME
+                )
+
+            for i in range(5):
+                self.document_manager.get_document(
+                    f"foobar-{i}", COLLECTION_NAME, DATABASE_NAME
+                )
+
+            self.document_manager.query_documents(
+                COLLECTION_NAME,
+                DATABASE_NAME,
+                "SELECT * FROM r WHERE r.quantity > @quantity",
+                [dict(name="@quantity", value=2)],
+            ).fetch_next()
+        finally:
+            client.remove_listener(recorder)
+            recorder.close()
@@ -0,0 +1,91 @@
+"""
+CollectionScanner tests.
+"""
+from unittest import TestCase
+
+from pycosmosdal.collectionmanager import CollectionManager
+from pycosmosdal.cosmosdbclient import CosmosDbEmulatorClient
+from pycosmosdal.databasemanager import DatabaseManager
+from pycosmosdal.documentmanager import DocumentManager
+from pycosmosdal.models import Document
+from pycosmosdal.scanner import CollectionScanner
+
+DATABASE_NAME = __name__
+COLLECTION_NAME = f"{DATABASE_NAME}_container"
+DOCUMENT_COUNT = 20
+
+client = CosmosDbEmulatorClient()
+
+
+def get_quantity(document: Document) -> int:
+    return document.native_resource["quantity"]
+
+
+def add(x: int, y: int) -> int:
+    return x + y
+
+
+class CollectionScannerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database_manager = DatabaseManager(client)
+        cls.database_manager.create_database(DATABASE_NAME)
+
+        CollectionManager(client).create_collection(
+            COLLECTION_NAME, DATABASE_NAME, partition_key=dict(paths=["/id"])
+        )
+
+        document_manager = DocumentManager(client)
+
+        for i in range(DOCUMENT_COUNT):
+            document_manager.upsert_document(
+                dict(id=f"doc-{i}", quantity=i), COLLECTION_NAME, DATABASE_NAME
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database_manager.delete_database(DATABASE_NAME)
+
+    def setUp(self):
+        self.scanner = CollectionScanner(client, max_workers=2)
+
+    def test_scan_returns_mapped_values(self):
+        quantities = self.scanner.scan(COLLECTION_NAME, DATABASE_NAME, get_quantity)
+        self.assertEqual(list(range(DOCUMENT_COUNT)), sorted(quantities))
+
+    def test_scan_with_reduce_function(self):
+        total = self.scanner.scan(
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            get_quantity,
+            reduce_function=add,
+            initial=0,
+            max_item_count=3,
+        )
+
+        self.assertEqual(sum(range(DOCUMENT_COUNT)), total)
+
+    def test_scan_with_sink(self):
+        quantities = []
+
+        result = self.scanner.scan(
+            COLLECTION_NAME, DATABASE_NAME, get_quantity, sink=quantities.append
+        )
+
+        self.assertIsNone(result)
+        self.assertEqual(list(range(DOCUMENT_COUNT)), sorted(quantities))
+
+    def test_scan_in_chunks(self):
+        quantities = []
+
+        result = self.scanner.scan(
+            COLLECTION_NAME,
+            DATABASE_NAME,
+            get_quantity,
+            sink=quantities.append,
+            max_item_count=2,
+            chunk_size=3,
+        )
+
+        self.assertIsNone(result)
+        self.assertEqual(list(range(DOCUMENT_COUNT)), sorted(quantities))
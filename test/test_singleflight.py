@@ -0,0 +1,132 @@
+"""
+SingleFlight tests.
+"""
+import threading
+import time
+from unittest import TestCase
+
+from azure.cosmos.errors import HTTPFailure
+
+from pycosmosdal.singleflight import SingleFlight
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+
+    def test_concurrent_calls_are_collapsed(self):
+        call_count = []
+        results = []
+
+        def function():
+            call_count.append(1)
+            time.sleep(0.1)
+            return dict(id="foobar")
+
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    self.single_flight.execute("foobar", function)
+                )
+            )
+            for _ in range(10)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(call_count))
+        self.assertEqual(10, len(results))
+        self.assertEqual(10, self.single_flight.call_count)
+        self.assertEqual(9, self.single_flight.collapsed_count)
+        self.assertEqual(10, len({id(result) for result in results}))
+
+    def test_sequential_calls_are_not_collapsed(self):
+        self.single_flight.execute("foobar", lambda: 1)
+        self.single_flight.execute("foobar", lambda: 2)
+
+        self.assertEqual(2, self.single_flight.call_count)
+        self.assertEqual(0, self.single_flight.collapsed_count)
+
+    def test_error_is_shared(self):
+        errors = []
+        started = threading.Event()
+
+        def function():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("foobar")
+
+        def call():
+            try:
+                self.single_flight.execute("foobar", function)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+
+        follower = threading.Thread(target=call)
+        follower.start()
+
+        leader.join()
+        follower.join()
+
+        self.assertEqual(2, len(errors))
+        self.assertEqual(1, self.single_flight.collapsed_count)
+
+    def test_base_exception_is_shared(self):
+        errors = []
+        started = threading.Event()
+
+        def function():
+            started.set()
+            time.sleep(0.1)
+            raise SystemExit(1)
+
+        def call():
+            try:
+                self.single_flight.execute("foobar", function)
+            except SystemExit as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+
+        follower = threading.Thread(target=call)
+        follower.start()
+
+        leader.join()
+        follower.join()
+
+        self.assertEqual(2, len(errors))
+        self.assertEqual(1, self.single_flight.collapsed_count)
+
+    def test_waiting_caller_times_out(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def function():
+            started.set()
+            release.wait(5)
+            return 1
+
+        leader = threading.Thread(
+            target=lambda: self.single_flight.execute("foobar", function)
+        )
+        leader.start()
+        started.wait()
+
+        try:
+            with self.assertRaises(HTTPFailure) as context:
+                self.single_flight.execute("foobar", function, timeout=0.05)
+
+            self.assertEqual(408, context.exception.status_code)
+        finally:
+            release.set()
+            leader.join()